@@ -1,21 +1,124 @@
+"""Open Metadata
+
+Public symbols are imported upon first access, such that
+`import openmetadata` remains cheap for short-lived processes.
+Logging is likewise set-up upon first access.
+
+E.g.
+>>> import openmetadata as om  # Imports nothing but constant
+>>> om.read                    # Imports transaction and domain
+
+"""
+
+import sys
+import types
+
 import constant
-from transaction import write, read, update, delete, cascade
-from domain import Folder, Channel, Key, Factory
 from openmetadata import __version__
 
-import logging
-import sys
+# Name --> (module, attribute), where attribute
+# None means the module itself.
+_lazy = {
+    'write': ('transaction', 'write'),
+    'read': ('transaction', 'read'),
+    'read_many': ('transaction', 'read_many'),
+    'update': ('transaction', 'update'),
+    'update_many': ('transaction', 'update_many'),
+    'delete': ('transaction', 'delete'),
+    'exists': ('transaction', 'exists'),
+    'cascade': ('transaction', 'cascade'),
+    'sync': ('mirror', 'sync'),
+    'diff': ('mirror', 'diff'),
+    'table': ('tabular', 'table'),
+    'Folder': ('domain', 'Folder'),
+    'Channel': ('domain', 'Channel'),
+    'Key': ('domain', 'Key'),
+    'Factory': ('domain', 'Factory'),
+    'SchemaError': ('exception', 'SchemaError'),
+    'transaction': ('transaction', None),
+    'domain': ('domain', None),
+    'process': ('process', None),
+    'trash': ('trash', None),
+    'cache': ('cache', None),
+    'revision': ('revision', None),
+    'lock': ('lock', None),
+    'overlay': ('overlay', None),
+    'util': ('util', None),
+    'writebehind': ('writebehind', None),
+    'archive': ('archive', None),
+    'backend': ('backend', None),
+    'server': ('server', None),
+    'template': ('template', None),
+    'journal': ('journal', None),
+    'mirror': ('mirror', None),
+    'manifest': ('manifest', None),
+    'tabular': ('tabular', None),
+    'schema': ('schema', None),
+    'pointer': ('pointer', None),
+    'exception': ('exception', None),
+}
+
+_logging = ('log', 'formatter', 'stream_handler')
+
+
+def _setuplogging():
+    """Initiate logging for main level"""
+    module = sys.modules[__name__]
+    if 'log' in module.__dict__:
+        return
+
+    import logging
+
+    log = logging.getLogger('openmetadata')
+    log.setLevel(logging.WARNING)
+    # log.setLevel(logging.INFO)
+    # log.setLevel(logging.DEBUG)
+
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    log.addHandler(stream_handler)
+
+    module.formatter = formatter
+    module.stream_handler = stream_handler
+    module.log = log
+
+
+class _LazyModule(types.ModuleType):
+    """Module importing its public symbols upon first access"""
+
+    def __getattr__(self, name):
+        if name in _logging:
+            _setuplogging()
+            return self.__dict__[name]
+
+        try:
+            module, attr = _lazy[name]
+        except KeyError:
+            raise AttributeError("'module' object has no attribute %r" % name)
+
+        _setuplogging()
+
+        __import__('openmetadata.' + module)
+        value = sys.modules['openmetadata.' + module]
+        if attr is not None:
+            value = getattr(value, attr)
+
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_lazy) | set(_logging))
+
+
+_module = _LazyModule(__name__, __doc__)
+_module.__dict__.update(sys.modules[__name__].__dict__)
 
-# Initiate logging for main level
-log = logging.getLogger('openmetadata')
-log.setLevel(logging.WARNING)
-# log.setLevel(logging.INFO)
-# log.setLevel(logging.DEBUG)
+# Keep a reference to the original module; its globals
+# are cleared once it is garbage collected.
+_module._original = sys.modules[__name__]
 
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-stream_handler = logging.StreamHandler()
-stream_handler.setFormatter(formatter)
-log.addHandler(stream_handler)
+sys.modules[__name__] = _module
 
 # Used in distutils
-# Name = 'Open Metadata'
\ No newline at end of file
+# Name = 'Open Metadata'
@@ -0,0 +1,225 @@
+"""Read-only metadata from a single zip archive
+
+# Overview
+    Shipping metadata means copying thousands of tiny files. Instead,
+    a root may be snapshot into a single archive and opened with the
+    same Folder, Channel and Key objects as though it were on disk.
+
+    Paths within a mounted archive are prefixed by the path of the
+    archive itself.
+
+    E.g.
+    >>> archive.snapshot('/projects/hulk', '/remote/hulk.zip')
+    >>> folder = archive.open('/remote/hulk.zip')
+    >>> folder.path
+    '/remote/hulk.zip'
+    >>> om.read('/remote/hulk.zip/shots/1000', 'properties')
+    {'camera': {'fps': 24}}
+
+    The central directory of the archive is read once upon mounting
+    and kept as an in-memory index. Listing never touches the disk,
+    and reading a key costs one read of the archive. Archives are
+    mounted as read-only backends, see backend.py
+
+    Only metadata is archived; that is, the contents of each .meta
+    folder, excluding hidden items such as .deleted tombstones and
+    revision history.
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import time
+import logging
+import zipfile
+import threading
+
+from openmetadata import backend
+from openmetadata import constant
+
+log = logging.getLogger('openmetadata.archive')
+
+
+def _included(name):
+    """Is `name`, within a .meta folder, included in a snapshot?"""
+    return name == constant.Meta or not (name.startswith(".") or
+                                         name in constant.HiddenKeys)
+
+
+def snapshot(root, path):
+    """Write metadata of `root` into a new archive at `path`
+
+    Returns
+        Number of keys archived
+
+    """
+
+    root = os.path.abspath(root)
+    count = 0
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for dirpath, dirnames, filenames in os.walk(root):
+            relpath = os.path.relpath(dirpath, root)
+            parts = [] if relpath == os.curdir else relpath.split(os.sep)
+            inmeta = constant.Meta in parts
+
+            if inmeta:
+                # Directory entries preserve empty channels
+                archive.writestr('/'.join(parts) + '/', '')
+
+                dirnames[:] = [d for d in dirnames if _included(d)]
+
+                for filename in filenames:
+                    if not _included(filename):
+                        continue
+
+                    name = '/'.join(parts + [filename])
+                    archive.write(os.path.join(dirpath, filename), name)
+                    count += 1
+
+            else:
+                # Look for metadata further down, skipping
+                # hidden folders other than .meta
+                dirnames[:] = [d for d in dirnames
+                               if d == constant.Meta or not d.startswith(".")]
+
+    log.info("snapshot(): Archived %i keys of %s into %s"
+             % (count, root, path))
+
+    return count
+
+
+class Archive(backend.Backend):
+    """Read-only backend serving the contents of an archive
+
+    Parameters
+        path    (str)   : Absolute path to archive, also its mount point
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.stat(path).st_mtime
+
+        self._zipfile = zipfile.ZipFile(path, 'r')
+        self._lock = threading.Lock()
+
+        # {directory: set(basename)} and {file: ZipInfo}
+        self._dirs = {'': set()}
+        self._files = {}
+
+        for info in self._zipfile.infolist():
+            name = info.filename.rstrip('/')
+            if not name:
+                continue
+
+            if info.filename.endswith('/'):
+                self._adddir(name)
+            else:
+                self._files[name] = info
+                self._adddir(name.rsplit('/', 1)[0] if '/' in name else '')
+                self._dirs[self._parent(name)].add(name.rsplit('/', 1)[-1])
+
+    def __repr__(self):
+        return "%s.Archive(%r)" % (__name__, self.path)
+
+    def _parent(self, name):
+        return name.rsplit('/', 1)[0] if '/' in name else ''
+
+    def _adddir(self, name):
+        while name not in self._dirs:
+            self._dirs[name] = set()
+            if not name:
+                break
+
+            parent = self._parent(name)
+            self._dirs.setdefault(parent, set()).add(name.rsplit('/', 1)[-1])
+            name = parent
+
+    def name(self, path):
+        """Return name within archive of absolute `path`"""
+        relpath = os.path.relpath(path, self.path)
+        if relpath == os.curdir:
+            return ''
+        return relpath.replace(os.sep, '/')
+
+    def exists(self, path):
+        name = self.name(path)
+        return name in self._dirs or name in self._files
+
+    def isdir(self, path):
+        return self.name(path) in self._dirs
+
+    def listdir(self, path):
+        name = self.name(path)
+        try:
+            return sorted(self._dirs[name])
+        except KeyError:
+            raise OSError('"%s" not found' % path)
+
+    def stat(self, path):
+        name = self.name(path)
+        if name in self._dirs:
+            # Archives never change once mounted
+            return backend.Stat(self.mtime, 0)
+
+        try:
+            info = self._files[name]
+        except KeyError:
+            raise OSError('"%s" not found' % path)
+
+        mtime = time.mktime(info.date_time + (0, 0, -1))
+        return backend.Stat(mtime, info.file_size)
+
+    def signature(self, path):
+        try:
+            info = self._files[self.name(path)]
+        except KeyError:
+            raise OSError('"%s" not found' % path)
+
+        mtime = time.mktime(info.date_time + (0, 0, -1))
+        return (path, int(mtime * 1e9), info.file_size, info.CRC)
+
+    def read(self, path):
+        """Return contents of file at `path`"""
+        try:
+            info = self._files[self.name(path)]
+        except KeyError:
+            raise IOError('"%s" not found' % path)
+
+        with self._lock:
+            return self._zipfile.read(info)
+
+    def close(self):
+        self._zipfile.close()
+
+
+def mount(path):
+    """Make archive at `path` readable under `path`
+
+    Returns
+        Archive
+
+    """
+
+    path = os.path.abspath(path)
+    archive = backend.mounts().get(path)
+    if not isinstance(archive, Archive):
+        archive = Archive(path)
+        backend.mount(path, archive)
+    return archive
+
+
+def unmount(path):
+    archive = backend.unmount(path)
+    if archive is not None:
+        archive.close()
+
+
+def open(path):
+    """Mount archive at `path` and return its root Folder"""
+    from openmetadata import domain
+
+    archive = mount(path)
+    return domain.Folder(archive.path)
@@ -0,0 +1,586 @@
+"""Storage of metadata
+
+# Overview
+    The domain layer never touches storage directly. Instead, each
+    path is served by the Backend mounted at the longest prefix of
+    that path, defaulting to the local file-system.
+
+    E.g.
+    >>> backend.mount('/memory', backend.Memory())
+    >>> om.update('/memory/shots/1000', 'properties', 'fps', 24)
+    >>> om.read('/memory/shots/1000')
+    {'properties': {'fps': 24}}
+    >>> backend.unmount('/memory')
+
+    Every feature stores through the backend of its path, including
+    locks, the journal, revisions, the trash and indexes of pointers,
+    such that each works without disk on the Memory backend.
+
+    Backends not served from the file-system are not local; binary keys
+    are then read and written as a whole, rather than memory-mapped
+    and streamed, and locks are held within the current process only.
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import time
+import errno
+import logging
+import itertools
+import threading
+import contextlib
+import collections
+from abc import ABCMeta, abstractmethod
+
+log = logging.getLogger('openmetadata.backend')
+
+Stat = collections.namedtuple('Stat', ['mtime', 'size'])
+
+
+def _error(cls, path, code=errno.ENOENT):
+    return cls(code, os.strerror(code), path)
+
+
+class Backend(object):
+    """Required interface to each backend
+
+    Paths are absolute, including the prefix at which
+    the backend is mounted.
+
+    """
+
+    __metaclass__ = ABCMeta
+
+    # Are paths served from the local file-system?
+    local = False
+
+    def __repr__(self):
+        return "%s.%s()" % (__name__, self.__class__.__name__)
+
+    @abstractmethod
+    def exists(self, path):
+        pass
+
+    @abstractmethod
+    def isdir(self, path):
+        pass
+
+    @abstractmethod
+    def listdir(self, path):
+        """Return basenames within directory `path`, raises OSError"""
+        pass
+
+    @abstractmethod
+    def stat(self, path):
+        """Return Stat of `path`, raises OSError"""
+        pass
+
+    def signature(self, path):
+        """Return identity of contents of `path`, see cache.signature()"""
+        stat = self.stat(path)
+        return (path, int(stat.mtime * 1e9), stat.size)
+
+    @abstractmethod
+    def read(self, path):
+        """Return contents of file `path`, raises IOError"""
+        pass
+
+    def open(self, path):
+        """Return file-object of file `path`, the caller closes it
+
+        The file-object is read-only and seekable. Raises IOError.
+
+        """
+
+        import io
+        return io.BytesIO(self.read(path))
+
+    def walk(self, path):
+        """Yield (dirpath, dirnames, filenames) beneath `path`
+
+        As per os.walk(), top-down such that `dirnames`
+        may be pruned in-place.
+
+        """
+
+        try:
+            basenames = self.listdir(path)
+        except OSError:
+            return
+
+        dirnames, filenames = [], []
+        for basename in basenames:
+            if self.isdir(os.path.join(path, basename)):
+                dirnames.append(basename)
+            else:
+                filenames.append(basename)
+
+        yield path, dirnames, filenames
+
+        for dirname in dirnames:
+            for entry in self.walk(os.path.join(path, dirname)):
+                yield entry
+
+    def lock(self, path, shared=False, create=True):
+        """Return lock of `path`, see lock.py
+
+        Locks of backends other than the file-system
+        are held within the current process only.
+
+        """
+
+        from openmetadata import lock
+        return lock.ThreadLock(path, shared)
+
+    def write(self, path, raw):
+        """Replace contents of file `path` with `raw`"""
+        raise _error(IOError, path, errno.EROFS)
+
+    @contextlib.contextmanager
+    def atomic(self, path):
+        """Replace file `path` with what is written to the file-object
+        yielded, once done, see util.atomic()
+
+        """
+
+        import io
+        f = io.BytesIO()
+        yield f
+        self.write(path, f.getvalue())
+
+    def append(self, path, raw):
+        """Append `raw` to file `path`, creating it if missing"""
+        raise _error(IOError, path, errno.EROFS)
+
+    def link(self, src, dst):
+        """Make `dst` a hardlink of file `src`"""
+        raise _error(OSError, dst, errno.EXDEV)
+
+    def makedirs(self, path):
+        """Create directory `path` and any of its parents"""
+        raise _error(OSError, path, errno.EROFS)
+
+    def rename(self, src, dst):
+        raise _error(OSError, src, errno.EROFS)
+
+    def delete(self, path, max_retries=10):
+        """Permanently remove file or directory `path`"""
+        raise _error(OSError, path, errno.EROFS)
+
+
+class FileSystem(Backend):
+    """The local file-system"""
+
+    local = True
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def isdir(self, path):
+        return os.path.isdir(path)
+
+    def listdir(self, path):
+        return os.listdir(path)
+
+    def stat(self, path):
+        stat = os.stat(path)
+        return Stat(stat.st_mtime, stat.st_size)
+
+    def signature(self, path):
+        from openmetadata import cache
+        return cache.signature(path)
+
+    def read(self, path):
+        with open(path, 'r') as f:
+            return f.read()
+
+    def open(self, path):
+        return open(path, 'rb')
+
+    def walk(self, path):
+        return os.walk(path)
+
+    def lock(self, path, shared=False, create=True):
+        from openmetadata import lock
+        return lock.FileLock(path, shared, create)
+
+    def write(self, path, raw):
+        """Replace `path` atomically, see util.atomic()
+
+        Files are replaced rather than modified in place, such
+        that hardlinked copies of `path` are left untouched.
+
+        """
+
+        from openmetadata import util
+        util.atomicwrite(path, raw, mode='w')
+
+    def atomic(self, path):
+        from openmetadata import util
+        return util.atomic(path)
+
+    def append(self, path, raw):
+        with open(path, 'ab') as f:
+            f.write(raw)
+
+    def link(self, src, dst):
+        os.link(src, dst)
+
+    def makedirs(self, path):
+        from openmetadata import util
+        util.makedirs(path)
+
+    def rename(self, src, dst):
+        os.rename(src, dst)
+
+    def delete(self, path, max_retries=10):
+        """Remove `path`, retrying up to `max_retries` times
+
+        Sometimes, Dropbox can bother this operation; creating files
+        in the midst of deleting a folder. If this happens, try
+        again in a short while.
+
+        """
+
+        import shutil
+
+        retries = 0
+        while True:
+            try:
+                if os.path.isdir(path) and not os.path.islink(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+                return
+
+            except OSError:
+                if not os.path.lexists(path):
+                    # Removed by someone else
+                    return
+
+                retries += 1
+                if retries > max_retries:
+                    raise
+
+                time.sleep(0.1)
+                log.info("Retried %i time(s) for %s" % (retries, path))
+
+
+class Memory(Backend):
+    """Metadata held in memory only, safe for use across threads"""
+
+    # Unique per write across all instances,
+    # such that signatures are never reused.
+    _generation = itertools.count(1)
+
+    def __init__(self):
+        self._lock = threading.RLock()
+
+        # {directory: set(basename)}, {file: contents} and
+        # {path: (mtime, generation)}
+        self._dirs = {}
+        self._files = {}
+        self._times = {}
+
+    def _touch(self, path):
+        self._times[path] = (time.time(), next(self._generation))
+
+    def _add(self, path):
+        """Add `path` to its parent directory, creating it if need be"""
+        dirname, basename = os.path.split(path)
+        if dirname == path:
+            return
+
+        if dirname not in self._dirs:
+            self._dirs[dirname] = set()
+            self._add(dirname)
+
+        self._dirs[dirname].add(basename)
+        self._touch(dirname)
+
+    def _remove(self, path):
+        dirname, basename = os.path.split(path)
+        self._dirs[dirname].discard(basename)
+        self._touch(dirname)
+
+    def _walk(self, path):
+        """Return `path` and all paths beneath it"""
+        paths = [path]
+        for basename in self._dirs.get(path, ()):
+            paths.extend(self._walk(os.path.join(path, basename)))
+        return paths
+
+    def exists(self, path):
+        return path in self._dirs or path in self._files
+
+    def isdir(self, path):
+        return path in self._dirs
+
+    def listdir(self, path):
+        with self._lock:
+            try:
+                return list(self._dirs[path])
+            except KeyError:
+                raise _error(OSError, path)
+
+    def stat(self, path):
+        with self._lock:
+            if not self.exists(path):
+                raise _error(OSError, path)
+
+            mtime, _ = self._times[path]
+            return Stat(mtime, len(self._files.get(path, '')))
+
+    def signature(self, path):
+        with self._lock:
+            if path not in self._files:
+                raise _error(OSError, path)
+
+            _, generation = self._times[path]
+            return (path, generation, len(self._files[path]))
+
+    def read(self, path):
+        with self._lock:
+            try:
+                return self._files[path]
+            except KeyError:
+                raise _error(IOError, path)
+
+    def write(self, path, raw):
+        with self._lock:
+            dirname = os.path.dirname(path)
+            if dirname not in self._dirs:
+                raise _error(IOError, path)
+            if path in self._dirs:
+                raise _error(IOError, path, errno.EISDIR)
+
+            self._files[path] = str(raw)
+            self._touch(path)
+            self._add(path)
+
+    def append(self, path, raw):
+        with self._lock:
+            self.write(path, self._files.get(path, '') + str(raw))
+
+    def makedirs(self, path):
+        with self._lock:
+            if path in self._files:
+                raise _error(OSError, path, errno.EEXIST)
+
+            if path not in self._dirs:
+                self._dirs[path] = set()
+                self._touch(path)
+                self._add(path)
+
+    def rename(self, src, dst):
+        with self._lock:
+            if not self.exists(src):
+                raise _error(OSError, src)
+            if self.exists(dst):
+                raise _error(OSError, dst, errno.EEXIST)
+
+            for path in self._walk(src):
+                moved = dst + path[len(src):]
+                if path in self._dirs:
+                    self._dirs[moved] = self._dirs.pop(path)
+                else:
+                    self._files[moved] = self._files.pop(path)
+                self._times[moved] = self._times.pop(path)
+
+            self._remove(src)
+            self._add(dst)
+
+    def delete(self, path, max_retries=10):
+        with self._lock:
+            if not self.exists(path):
+                raise _error(OSError, path)
+
+            for _path in self._walk(path):
+                self._dirs.pop(_path, None)
+                self._files.pop(_path, None)
+                self._times.pop(_path, None)
+
+            self._remove(path)
+
+
+class Latency(Backend):
+    """Delay each call to another backend, simulating network storage
+
+    Every call costs at least one round-trip on NFS and SMB, which a
+    local disk hides. Mounting a Latency over a local directory makes
+    round-trips measurable, see benchmark.py
+
+    E.g.
+    >>> slow = backend.Latency(backend.filesystem, latency=0.005,
+    ...                        jitter={'read': 0.002})
+    >>> backend.mount('/projects/hulk', slow)
+    >>> om.read('/projects/hulk/shots/1000')
+    >>> slow.calls  # Round-trips per operation
+
+    The delayed backend is local whenever the backend it wraps is, such
+    that features behave as they would without delay. Every call is
+    delayed, including locks, the journal, revisions and atomic writes,
+    with one delay per directory walked and per lock taken.
+
+    Parameters
+        backend     (Backend)       : Backend to delay
+        latency     (float, dict)   : Seconds per call, either for every
+                                      operation or per operation,
+                                      E.g. {'read': 0.002}
+        jitter      (float, dict)   : Up to this many seconds at random
+                                      added to `latency`
+        seed        (int)           : Seed of jitter, for repeatable runs
+
+    """
+
+    Operations = ('exists', 'isdir', 'listdir', 'stat', 'signature',
+                  'read', 'open', 'walk', 'lock', 'write', 'atomic',
+                  'append', 'link', 'makedirs', 'rename', 'delete')
+
+    def __init__(self, backend, latency=0.0, jitter=0.0, seed=None):
+        import random
+
+        self.backend = backend
+        self.local = backend.local
+        self.latency = self._peroperation(latency)
+        self.jitter = self._peroperation(jitter)
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.calls = {}
+        self.delayed = 0.0
+
+    def __repr__(self):
+        return "%s.Latency(%r)" % (__name__, self.backend)
+
+    def _peroperation(self, seconds):
+        if isinstance(seconds, dict):
+            return dict((op, seconds.get(op, 0.0)) for op in self.Operations)
+        return dict((op, seconds) for op in self.Operations)
+
+    def _delay(self, operation):
+        seconds = self.latency[operation]
+        jitter = self.jitter[operation]
+
+        with self._lock:
+            if jitter:
+                seconds += self._random.uniform(0, jitter)
+
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            self.delayed += seconds
+
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def reset(self):
+        """Reset counts of calls and delay"""
+        with self._lock:
+            self.calls = {}
+            self.delayed = 0.0
+
+    def exists(self, path):
+        self._delay('exists')
+        return self.backend.exists(path)
+
+    def isdir(self, path):
+        self._delay('isdir')
+        return self.backend.isdir(path)
+
+    def listdir(self, path):
+        self._delay('listdir')
+        return self.backend.listdir(path)
+
+    def stat(self, path):
+        self._delay('stat')
+        return self.backend.stat(path)
+
+    def signature(self, path):
+        self._delay('signature')
+        return self.backend.signature(path)
+
+    def read(self, path):
+        self._delay('read')
+        return self.backend.read(path)
+
+    def open(self, path):
+        self._delay('open')
+        return self.backend.open(path)
+
+    def walk(self, path):
+        for entry in self.backend.walk(path):
+            self._delay('walk')
+            yield entry
+
+    def lock(self, path, shared=False, create=True):
+        self._delay('lock')
+        return self.backend.lock(path, shared, create)
+
+    def write(self, path, raw):
+        self._delay('write')
+        return self.backend.write(path, raw)
+
+    def atomic(self, path):
+        self._delay('atomic')
+        return self.backend.atomic(path)
+
+    def append(self, path, raw):
+        self._delay('append')
+        return self.backend.append(path, raw)
+
+    def link(self, src, dst):
+        self._delay('link')
+        return self.backend.link(src, dst)
+
+    def makedirs(self, path):
+        self._delay('makedirs')
+        return self.backend.makedirs(path)
+
+    def rename(self, src, dst):
+        self._delay('rename')
+        return self.backend.rename(src, dst)
+
+    def delete(self, path, max_retries=10):
+        self._delay('delete')
+        return self.backend.delete(path, max_retries)
+
+
+filesystem = FileSystem()
+
+# {prefix: Backend}
+_mounts = {}
+
+
+def mount(prefix, backend):
+    """Serve `prefix` and every path beneath it from `backend`"""
+    _mounts[os.path.abspath(prefix)] = backend
+    log.info("mount(): Mounted %r at %s" % (backend, prefix))
+
+
+def unmount(prefix):
+    """Stop serving `prefix` from its backend and return it, if any"""
+    return _mounts.pop(os.path.abspath(prefix), None)
+
+
+def mounts():
+    """Return mounted backends as {prefix: Backend}"""
+    return dict(_mounts)
+
+
+def get(path):
+    """Return Backend serving `path`"""
+    if not _mounts:
+        return filesystem
+
+    match = None
+    for prefix in _mounts:
+        if path == prefix or path.startswith(prefix + os.sep):
+            if match is None or len(prefix) > len(match):
+                match = prefix
+
+    if match is None:
+        return filesystem
+
+    return _mounts[match]
@@ -0,0 +1,255 @@
+#!/usr/bin python
+"""Benchmarks of Open Metadata
+
+Run from the root of the package, similar to test.py
+
+$ python openmetadata/benchmark.py
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import sys
+import time
+import subprocess
+
+# Seconds allowed for a cold `import openmetadata`,
+# excluding start-up of the interpreter itself.
+ImportBudget = 0.01
+
+# Round-trip times, in seconds, of simulated network storage
+RoundTrips = [0.0, 0.001, 0.005, 0.02]
+
+# Modules that must not be imported by `import openmetadata`
+DeferredModules = ['openmetadata.transaction',
+                   'openmetadata.domain',
+                   'openmetadata.process',
+                   'json',
+                   'shutil',
+                   'ConfigParser']
+
+
+def _python(source):
+    """Run `source` in a fresh interpreter and return its output"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(p for p in sys.path if p)
+
+    popen = subprocess.Popen([sys.executable, '-c', source],
+                             stdout=subprocess.PIPE, env=env)
+    output, _ = popen.communicate()
+    assert popen.returncode == 0, "Failed to run %r" % source
+
+    return output
+
+
+def import_time(repeat=5):
+    """Return fastest of `repeat` cold imports, in seconds"""
+    source = ("import time\n"
+              "started = time.time()\n"
+              "import openmetadata\n"
+              "print time.time() - started\n")
+
+    return min(float(_python(source)) for _ in range(repeat))
+
+
+def import_modules():
+    """Return modules imported by a cold `import openmetadata`"""
+    source = ("import sys\n"
+              "before = set(sys.modules)\n"
+              "import openmetadata\n"
+              "print '\\n'.join(m for m in set(sys.modules) - before\n"
+              "                if sys.modules[m] is not None)\n")
+
+    return _python(source).split()
+
+
+def _hierarchy(root, depth=3, keys=10):
+    """Create `depth` levels of folders with `keys` properties each
+
+    Returns
+        Path of the deepest folder
+
+    """
+
+    import openmetadata as om
+
+    path = root
+    for level in range(depth):
+        data = dict(('key%i' % index, {'level': level, 'index': index})
+                    for index in range(keys))
+        om.update_many(path, 'properties', data)
+        path = os.path.join(path, 'level%i' % level)
+
+    return os.path.dirname(path)
+
+
+def latency(roundtrips=None, depth=3, keys=10):
+    """Time write, read and cascade per simulated round-trip time
+
+    Each operation is run against a hierarchy on local disk mounted
+    behind a backend.Latency. The cache of parsed keys is cleared
+    before each operation, such that every key is read.
+
+    Returns
+        list of dict, per round-trip time,
+        {'roundtrip': seconds, 'read': (seconds, calls), ...}
+
+    """
+
+    import shutil
+    import tempfile
+    import openmetadata as om
+
+    if roundtrips is None:
+        roundtrips = RoundTrips
+
+    data = dict(('note%i' % index, {'text': 'note'}) for index in range(keys))
+
+    def read(leaf):
+        om.read(leaf)
+
+    def write(leaf):
+        channel = om.Channel('notes.kvs', om.Folder(leaf))
+        channel.data = data
+        channel.write(defer=False)
+
+    def cascade(leaf):
+        om.cascade(leaf, 'properties')
+
+    operations = [('write', write), ('read', read), ('cascade', cascade)]
+
+    results = []
+    tempdir = tempfile.mkdtemp()
+    try:
+        leaf = _hierarchy(tempdir, depth, keys)
+
+        for roundtrip in roundtrips:
+            slow = om.backend.Latency(om.backend.filesystem, roundtrip)
+            om.backend.mount(tempdir, slow)
+
+            result = {'roundtrip': roundtrip}
+            try:
+                for name, operation in operations:
+                    om.cache.clear()
+                    slow.reset()
+
+                    started = time.time()
+                    operation(leaf)
+                    seconds = time.time() - started
+
+                    result[name] = (seconds, sum(slow.calls.values()))
+            finally:
+                om.backend.unmount(tempdir)
+
+            results.append(result)
+
+    finally:
+        shutil.rmtree(tempdir)
+
+    return results
+
+
+def pointer(records=100000):
+    """Time reading one value of a large key, by pointer and as a whole
+
+    The key is an array of `records` objects, of about 150 bytes each.
+    Pointers are timed on first read, which indexes the key, once its
+    index is read from disk, and once its index is in memory.
+
+    Returns
+        dict()  : {'size': bytes of key, 'index': bytes of its index,
+                   'loads': seconds, 'first': seconds, ...}
+
+    """
+
+    import json
+    import shutil
+    import tempfile
+    import openmetadata as om
+    from openmetadata import constant
+
+    data = {'assets': [{'name': 'asset%i' % index,
+                        'tags': ['character', 'hero', 'green'],
+                        'frames': [1001, 1100],
+                        'index': index}
+                       for index in range(records)]}
+
+    tempdir = tempfile.mkdtemp()
+    try:
+        om.update(tempdir, 'breakdown.kvs', 'assets', data)
+        path = os.path.join(tempdir, constant.Meta,
+                            'breakdown.kvs', 'assets.json')
+
+        # Keys changed within the same tick are not indexed
+        time.sleep(om.pointer.Resolution + 0.1)
+
+        result = {'size': os.path.getsize(path)}
+
+        started = time.time()
+        with open(path) as f:
+            json.loads(f.read())
+        result['loads'] = time.time() - started
+
+        for name in ('first', 'cold', 'warm'):
+            if name == 'cold':
+                om.pointer._indexes.clear()
+
+            started = time.time()
+            om.Key(path).get('/assets/%i/name' % (records // 2))
+            result[name] = time.time() - started
+
+        result['index'] = os.path.getsize(om.pointer.indexpath(path))
+
+    finally:
+        shutil.rmtree(tempdir)
+
+    return result
+
+
+def report():
+    """Print each benchmark
+
+    Returns
+        bool    : Whether `import openmetadata` is within ImportBudget,
+                  and defers each of DeferredModules
+
+    """
+
+    seconds = import_time()
+    within = seconds <= ImportBudget
+    print "import openmetadata: %.2f ms (budget %.2f ms)%s" % (
+        seconds * 1000, ImportBudget * 1000,
+        "" if within else " OVER BUDGET")
+
+    imported = import_modules()
+    for module in DeferredModules:
+        if module in imported:
+            print "  %s imported eagerly" % module
+            within = False
+
+    print
+    print "%-10s %18s %18s %18s" % ('rtt', 'write', 'read', 'cascade')
+    for result in latency():
+        columns = ["%8.1f ms %4i rt" % (result[name][0] * 1000,
+                                        result[name][1])
+                   for name in ('write', 'read', 'cascade')]
+        print "%-10s %s" % ("%.1f ms" % (result['roundtrip'] * 1000),
+                            " ".join(columns))
+
+    result = pointer()
+    print
+    print "pointer into %.1f MB key (index %.1f MB):" % (
+        result['size'] / 1e6, result['index'] / 1e6)
+    for name in ('loads', 'first', 'cold', 'warm'):
+        print "  %-6s %8.1f ms" % (name, result[name] * 1000)
+
+    return within
+
+
+if __name__ == '__main__':
+    import logging
+    import openmetadata as om
+    om.log.setLevel(logging.ERROR)
+
+    sys.exit(0 if report() else 1)
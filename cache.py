@@ -0,0 +1,165 @@
+"""Process-wide cache of parsed key contents
+
+# Overview
+    Keys are cached by the signature of their file on disk,
+    (realpath, mtime_ns, size, inode, ctime_ns), such that an unchanged file is
+    never parsed twice, regardless of how many Key objects read it.
+    Changing a file changes its signature, leaving the stale entry
+    to be evicted.
+
+    Contents are stored marshalled rather than as live objects. Each
+    hit thus returns a fresh copy, which callers are free to modify,
+    and the memory held by the cache is known exactly. Unmarshalling
+    is several times faster than parsing JSON.
+
+    Entries are evicted least-recently-used first once the cache
+    holds more than `maxbytes`.
+
+    E.g.
+    >>> cache.configure(maxbytes=256 * 1024 * 1024)
+    >>> cache.stats()
+    {'hits': 0, 'misses': 0, 'evictions': 0, 'entries': 0, 'bytes': 0}
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import marshal
+import logging
+import threading
+import collections
+
+log = logging.getLogger('openmetadata.cache')
+
+MaxBytes = 64 * 1024 * 1024
+
+
+def signature(path):
+    """Return signature of file at `path`, raises OSError if missing"""
+    stat = os.stat(path)
+    mtime_ns = getattr(stat, 'st_mtime_ns', None)
+    if mtime_ns is None:
+        mtime_ns = int(stat.st_mtime * 1e9)
+    ctime_ns = getattr(stat, 'st_ctime_ns', None)
+    if ctime_ns is None:
+        ctime_ns = int(stat.st_ctime * 1e9)
+    return (os.path.realpath(path), mtime_ns, stat.st_size,
+            stat.st_ino, ctime_ns)
+
+
+class Cache(object):
+    """Memory-bounded LRU cache of marshalled contents
+
+    Parameters
+        maxbytes    (int)   : Upper bound of memory held, 0 disables caching
+
+    """
+
+    def __init__(self, maxbytes=MaxBytes):
+        self.maxbytes = maxbytes
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, signature):
+        return signature in self._entries
+
+    def get(self, signature, default=None):
+        """Return copy of contents of `signature`, or `default`"""
+        with self._lock:
+            marshalled = self._entries.pop(signature, None)
+            if marshalled is None:
+                self.misses += 1
+                return default
+
+            # Most recently used last
+            self._entries[signature] = marshalled
+            self.hits += 1
+
+        return marshal.loads(marshalled)
+
+    def put(self, signature, value):
+        """Store `value` under `signature`
+
+        Values that can't be marshalled, or exceed the
+        size of the cache, are not stored.
+
+        """
+
+        if not self.maxbytes:
+            return
+
+        try:
+            marshalled = marshal.dumps(value)
+        except ValueError:
+            return
+
+        if len(marshalled) > self.maxbytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(signature, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+
+            self._entries[signature] = marshalled
+            self._bytes += len(marshalled)
+
+            self._evict()
+
+    def _evict(self):
+        """Evict least-recently-used entries down to `self.maxbytes`"""
+        while self._bytes > self.maxbytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def resize(self, maxbytes):
+        with self._lock:
+            self.maxbytes = maxbytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes}
+
+
+_cache = Cache()
+
+
+def configure(maxbytes=MaxBytes):
+    """Bound the process-wide cache to `maxbytes`, 0 disables caching"""
+    _cache.resize(maxbytes)
+
+
+def get(signature, default=None):
+    return _cache.get(signature, default)
+
+
+def put(signature, value):
+    _cache.put(signature, value)
+
+
+def clear():
+    _cache.clear()
+
+
+def stats():
+    """Return hits, misses, evictions, entries and bytes of the cache"""
+    return _cache.stats()
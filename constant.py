@@ -5,7 +5,27 @@ Kvs = '.kvs'
 Img = '.img'
 Vid = '.vid'
 Mdw = '.mdw'
+Arr = '.arr'
+
+# Cached listing of a .meta folder, see manifest.py
+Manifest = '__manifest__'
+
+# Schema of a channel, kept alongside its keys, see schema.py
+Schema = '__schema__.json'
 
 # In addition to files and folders prefixed with ".",
 # also keep these basenames hidden.
-HiddenKeys = ['Thumbs.db', '.ds_store']
\ No newline at end of file
+HiddenKeys = ['Thumbs.db', '.ds_store', Manifest]
+
+# Prefix of items removed via clear(), E.g. ".deleted.20131115103402.chan.txt"
+Deleted = '.deleted'
+
+# Lock files of items within a .meta folder, see lock.py
+Lock = '.lock'
+
+# Indexes of keys within a .meta folder, see pointer.py
+Pointer = '.pointer'
+
+# Hidden folders created along with each .meta folder,
+# such that creating them leaves its mtime untouched.
+MetaFolders = [Lock, Pointer]
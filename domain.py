@@ -26,11 +26,15 @@ Notes
 from __future__ import absolute_import
 
 import os
-import logging
-import shutil
+import sys
 import time
+import logging
+import weakref
+import threading
+import contextlib
 from abc import ABCMeta, abstractmethod
 
+from openmetadata import backend
 from openmetadata import constant
 from openmetadata import process
 
@@ -42,6 +46,290 @@ def hidden(name):
     return (name.startswith(prefix) and name.endswith(prefix))
 
 
+class ScanCache(object):
+    """Directory listings shared across many reads
+
+    Listings are memoised per path, such that directories
+    shared between reads are only ever listed once. Safe
+    for use across threads.
+
+    See scanning()
+
+    Parameters
+        validate    (bool)  : List a directory anew once its mtime
+                              changes, for use by long-running
+                              processes, see server.py
+
+    """
+
+    def __init__(self, validate=False):
+        self.validate = validate
+        self._listings = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def listdir(self, path):
+        store = backend.get(path)
+        mtime = store.stat(path).mtime if self.validate else None
+
+        with self._lock:
+            cached = self._listings.get(path)
+            if cached is not None and cached[0] == mtime:
+                self.hits += 1
+                return list(cached[1])
+
+        listed_time = time.time()
+        listing = store.listdir(path)
+
+        with self._lock:
+            self.misses += 1
+
+            # Listings taken within a second of the directory
+            # changing are not trusted, see AbstractParent._scan()
+            if mtime is None or listed_time - mtime > 1.0:
+                self._listings[path] = (mtime, listing)
+
+        return list(listing)
+
+    def clear(self):
+        with self._lock:
+            self._listings.clear()
+
+
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def scanning(scancache):
+    """List directories of the current thread via ScanCache `scancache`
+
+    E.g.
+    >>> scancache = ScanCache()
+    >>> with scanning(scancache):
+    ...     Folder(path).read()
+
+    """
+
+    previous = getattr(_local, 'scancache', None)
+    _local.scancache = scancache
+    try:
+        yield scancache
+    finally:
+        _local.scancache = previous
+
+
+class IdentityMap(object):
+    """Canonical node per absolute path
+
+    Factory.create() and parent resolution return the same node for
+    the same path, such that its children and their data are shared
+    rather than re-created and re-read. Nodes are held weakly and
+    are collected once no longer in use. Safe for use across threads.
+
+    See identity()
+
+    Parameters
+        root    (str)   : (optional) Only map paths within `root`
+
+    """
+
+    def __init__(self, root=None):
+        self.root = os.path.abspath(root) if root else None
+        self._nodes = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, path):
+        return os.path.abspath(path) in self._nodes
+
+    def get(self, path, create):
+        """Return node of `path`, via `create(path)` if not yet mapped"""
+        key = os.path.abspath(path)
+
+        if self.root and not (key == self.root or
+                              key.startswith(self.root + os.sep)):
+            return create(path)
+
+        with self._lock:
+            node = self._nodes.get(key)
+            if node is not None:
+                self.hits += 1
+                return node
+
+        node = create(path)
+        if node is None:
+            return None
+
+        with self._lock:
+            # Another thread may have created it meanwhile
+            node = self._nodes.setdefault(key, node)
+            self.misses += 1
+
+        return node
+
+    def discard(self, path):
+        """Forget node of `path`, such as once removed from disk"""
+        with self._lock:
+            self._nodes.pop(os.path.abspath(path), None)
+
+    def clear(self):
+        with self._lock:
+            self._nodes.clear()
+
+
+@contextlib.contextmanager
+def identity(identitymap):
+    """Resolve nodes of the current thread via IdentityMap `identitymap`
+
+    E.g.
+    >>> with identity(IdentityMap()):
+    ...     assert Factory.create(path) is Factory.create(path)
+
+    """
+
+    previous = getattr(_local, 'identitymap', None)
+    _local.identitymap = identitymap
+    try:
+        yield identitymap
+    finally:
+        _local.identitymap = previous
+
+
+def _forget(path):
+    """Forget node of `path` within the current identity, if any"""
+    identitymap = currentidentity()
+    if identitymap is not None:
+        identitymap.discard(path)
+
+
+def currentidentity():
+    """Return IdentityMap of the current thread, if any"""
+    return getattr(_local, 'identitymap', None)
+
+
+def exists(path):
+    """Return os.path.exists(path), as per the backend of `path`"""
+    return backend.get(path).exists(path)
+
+
+def isdir(path):
+    """Return os.path.isdir(path), as per the backend of `path`"""
+    return backend.get(path).isdir(path)
+
+
+def listdir(path):
+    """Return os.listdir(path), via the current ScanCache if any"""
+    scancache = getattr(_local, 'scancache', None)
+    if scancache is not None:
+        return scancache.listdir(path)
+    return backend.get(path).listdir(path)
+
+
+def makedirs(path):
+    """Create directory `path` and any of its parents, via its backend
+
+    A .meta folder created is given its hidden folders at once, see
+    constant.MetaFolders, such that creating them when first needed
+    leaves its mtime untouched.
+
+    """
+
+    store = backend.get(path)
+
+    metapath = path
+    while os.path.basename(metapath) != constant.Meta:
+        parent = os.path.dirname(metapath)
+        if parent == metapath:
+            metapath = None
+            break
+        metapath = parent
+
+    if metapath is not None and not store.isdir(metapath):
+        for name in constant.MetaFolders:
+            store.makedirs(os.path.join(metapath, name))
+
+    store.makedirs(path)
+
+
+def _channellock(path, shared=False):
+    """Return lock of channel `path`, via its backend
+
+    Each channel has a lock file of its own, such that channels are
+    locked independently of each other, see lock.lockpath(). Only
+    exclusive locks create it, see readlock().
+
+    """
+
+    return backend.get(path).lock(path, shared, create=not shared)
+
+
+@contextlib.contextmanager
+def readlock(path):
+    """Hold a shared lock of channel `path` whilst reading it
+
+    Lock files are only created by writers, such that reading writes
+    nothing and works on read-only locations. Channels never written
+    whilst locked, or not on disk, are read unlocked.
+
+    """
+
+    guard = _channellock(path, shared=True)
+    try:
+        guard.acquire()
+    except (IOError, OSError) as e:
+        log.debug("Reading %s unlocked: %s" % (path, e))
+        guard = None
+
+    try:
+        yield
+    finally:
+        if guard is not None:
+            guard.release()
+
+
+def _manifest():
+    """Return manifest.py if enabled, without importing it otherwise"""
+    manifest = sys.modules.get('openmetadata.manifest')
+    if manifest is not None and manifest.enabled():
+        return manifest
+    return None
+
+
+@contextlib.contextmanager
+def _recording(channelpath, keys, replace=False):
+    """Record `keys` of channel `channelpath` in its manifest once written
+
+    See manifest.record()
+
+    """
+
+    manifest = _manifest()
+    if manifest is None:
+        yield
+        return
+
+    metapath, channel = os.path.split(channelpath)
+    before = manifest.state(metapath, channel)
+
+    yield
+
+    try:
+        manifest.record(metapath, channel, keys, before, replace)
+    except (IOError, OSError) as e:
+        # E.g. read-only location
+        log.debug("Could not update manifest of %s: %s" % (metapath, e))
+
+
+def _changes():
+    """Return empty summary of refresh()"""
+    return {'added': [], 'changed': [], 'removed': []}
+
+
 class AbstractPath(object):
     """Lowest level Open Metadata entity
 
@@ -205,7 +493,7 @@ class AbstractPath(object):
 
         """
         
-        return os.path.exists(self.path)
+        return exists(self.path)
 
     def dir(self, tablevel=-1):
         """Depth-first directory listing
@@ -306,7 +594,7 @@ class AbstractPath(object):
     @property
     def parent(self):
         if not self._parent:
-            if os.path.exists(self.path):
+            if exists(self.path):
                 parent_path = os.path.dirname(self.path)
 
                 # When dirname reaches the highest parent in a hierarchy,
@@ -322,7 +610,7 @@ class AbstractPath(object):
 
     @parent.setter
     def parent(self, parent):
-        if os.path.exists(self.path):
+        if exists(self.path):
             raise ValueError("Can't change the parent of an existing object")
 
         parent._children.append(self)
@@ -400,25 +688,33 @@ class AbstractPath(object):
 
     @property
     def trash(self):
-        """Return list of deleted items of `self`"""
-        return []
+        """Return list of deleted items of `self`, newest first"""
+        from openmetadata import trash
+
+        dirname, basename = os.path.split(self.path)
+        return trash.tombstones(dirname, name=basename)
 
     @property
     def revisions(self):
-        """Return list of history of `self`"""
-        # 1. Find root .meta folder
-        # 2. Find .rev folder
-        # 3. Return contents
+        """Return list of history of `self`, newest first
 
-        return []
+        See revision.py for details
+
+        """
+
+        from openmetadata import revision
+        return revision.revisions(self)
 
     def store(self):
-        """Copy `self` into revision-history"""
-        # 1. Find root .meta folder
-        # 2. Find or create .rev folder
-        # 3. Duplicate `self` into .rev folder, under the current date and time
+        """Copy current on-disk state of `self` into revision-history
 
-        pass
+        Returns
+            revision.Revision of the stored state
+
+        """
+
+        from openmetadata import revision
+        return revision.store(self)
 
     @property
     def dirty(self):
@@ -431,7 +727,9 @@ class AbstractPath(object):
     def clear(self, max_retries=10):
         """Physically remove `self` and any of its children
 
-        Todo: Store in .trash
+        `self` is stored as a .deleted tombstone alongside its
+        original location. Tombstones expired as per the inline
+        policy, if any, are purged. See trash.setpolicy()
 
         If removing ALL metadata, warn user and recommend
         removing ALL channels rather then the .meta folder
@@ -439,51 +737,36 @@ class AbstractPath(object):
 
         """
 
+        from openmetadata import trash
+
         if self.exists:
             path = self.path
-            retries = 0
-            while True:
-                dirname = os.path.dirname(path)
-                basename = os.path.basename(path)
-
-                deleted_time = time.strftime("%Y%m%d%H%M%S", time.gmtime())
-                deleted_basename = ".deleted.%s.%s" % (deleted_time, basename)
-                deleted_path = os.path.join(dirname, deleted_basename)
-                
-                if os.path.exists(deleted_path):
-                    try:
-                        # If `self` has previously been deleted and stored
-                        # as a .deleted copy, remove this old copy permanently.
-                        #
-                        # Note: .deleted path is unique per-second, so odds of
-                        # any entry being removed permanently at all is very small.
-                        if os.path.isdir(deleted_path):
-                            shutil.rmtree(deleted_path)
-                        else:
-                            os.remove(deleted_path)
-
-                    except WindowsError as e:
-                        # Sometimes, Dropbox can bother this operation;
-                        # creating files in the midst of deleting a folder.
-                        #
-                        # If this happens, try again in a short while.
-                        
-                        retries += 1
-                        if retries > max_retries:
-                            log.error("%r.clear() failed with msg: %s" % (self, e))
-                            break
-
-                        time.sleep(0.1)
-                        log.info("Retired %i time(s) for %s" % (retries, path))
+            store = backend.get(path)
+            deleted_path = trash.tombstone(path)
 
-                try:
-                    # Store `path` as deleted copy.
-                    os.rename(path, deleted_path)
-                    break
+            if store.exists(deleted_path):
+                # If `self` has previously been deleted and stored
+                # as a .deleted copy, remove this old copy permanently.
+                #
+                # Note: .deleted path is unique per-second, so odds of
+                # any entry being removed permanently at all is very small.
+                store.delete(deleted_path, max_retries)
 
-                except WindowsError as e:
-                    raise e
+            # Store `path` as deleted copy.
+            store.rename(path, deleted_path)
 
+            policy = trash.getpolicy()
+            if policy:
+                trash.collect(os.path.dirname(path), policy,
+                              recursive=False,
+                              name=os.path.basename(path),
+                              max_retries=max_retries)
+
+            from openmetadata import pointer
+            pointer.discard(path)
+
+            from openmetadata import journal
+            journal.record('clear', path)
 
             self.log.info("clear(): Removed %s" % path)
         else:
@@ -499,12 +782,16 @@ class AbstractParent(AbstractPath):
         super(AbstractParent, self).__init__(path, parent)
         self._children = set()
 
+        # Physical children as of the last listing,
+        # (mtime of directory, time of listing, [fullpath])
+        self._listing = None
+
     def __iter__(self):
         for child in self.children:
             yield child
 
-    def clear(self):
-        super(AbstractParent, self).clear()
+    def clear(self, max_retries=10):
+        super(AbstractParent, self).clear(max_retries)
         self._children = set()
 
     def child(self, name):
@@ -535,15 +822,17 @@ class AbstractParent(AbstractPath):
 
         path = self.internalpath
 
-        if os.path.exists(path):
-            if os.path.isdir(path):
-                for child_path in os.listdir(path):
+        if exists(path):
+            if isdir(path):
+                listed = []
+                for child_path in listdir(path):
                     if child_path.startswith(".") or child_path in constant.HiddenKeys:
                         # self.log.debug("Skipping hidden folder: '%s'" % os.path.join(path, child_path))
                         continue
 
                     fullpath = os.path.join(path, child_path)
-                    
+                    listed.append(fullpath)
+
                     # If the physical child_path on disk already existed
                     # as a logical child of this instance, don't add
                     # it again.
@@ -553,10 +842,134 @@ class AbstractParent(AbstractPath):
 
                     obj = Factory.determine(fullpath)
                     if obj:
-                        obj(child_path, self)
+                        self._adopt(obj, child_path)
+
+                self._listed(listed)
 
         return list(self._children)
 
+    def _adopt(self, cls, basename):
+        """Return new child `basename` of `self`, of class `cls`
+
+        Within an identity, see identity(), the node of its
+        path is adopted if there is one, and mapped otherwise.
+
+        """
+
+        identitymap = currentidentity()
+        if identitymap is None:
+            return cls(basename, self)
+
+        child = identitymap.get(os.path.join(self.internalpath, basename),
+                                lambda path: cls(basename, self))
+        if child not in self._children:
+            self.addchild(child)
+
+        return child
+
+    def _listed(self, fullpaths):
+        """Remember `fullpaths` as physical children, see refresh()
+
+        Children listed before but no longer are dropped. The mtime
+        of this listing is unknown, such that the next _scan()
+        lists `self` anew.
+
+        """
+
+        if self._listing:
+            vanished = set(self._listing[2]) - set(fullpaths)
+            for child in list(self._children):
+                if child.path in vanished:
+                    self._children.discard(child)
+                    _forget(child.path)
+
+        self._listing = (None, None, fullpaths)
+
+    def _scan(self):
+        """Return full paths of physical children, via the last listing
+
+        A directory is only listed again once its mtime changes. Listings
+        taken within a second of the directory changing are not trusted,
+        as further changes within the same tick would go unnoticed.
+
+        """
+
+        path = self.internalpath
+
+        try:
+            mtime = backend.get(path).stat(path).mtime
+        except OSError:
+            return []
+
+        if self._listing:
+            listed_mtime, listed_time, fullpaths = self._listing
+            if listed_mtime == mtime and listed_time - mtime > 1.0:
+                return fullpaths
+
+        listed_time = time.time()
+
+        fullpaths = []
+        for child_path in listdir(path):
+            if child_path.startswith(".") or child_path in constant.HiddenKeys:
+                continue
+            fullpaths.append(os.path.join(path, child_path))
+
+        self._listing = (mtime, listed_time, fullpaths)
+        return fullpaths
+
+    def refresh(self, changes=None):
+        """Re-read only what changed on disk since the last read
+
+        New children are added and read, children no longer on disk
+        are dropped and keys are only re-read if their file changed.
+        In-memory children that were never on disk are left alone.
+
+        Returns
+            dict()  : Paths of what changed,
+                      {'added': [], 'changed': [], 'removed': []}
+
+        """
+
+        if changes is None:
+            changes = _changes()
+
+        previous = set(self._listing[2]) if self._listing else set()
+        current = self._scan()
+
+        existing = dict((child.path, child) for child in self._children)
+
+        for fullpath, child in existing.iteritems():
+            if fullpath in previous and fullpath not in current:
+                self._children.discard(child)
+                _forget(fullpath)
+                changes['removed'].append(fullpath)
+
+        for fullpath in current:
+            child = existing.get(fullpath)
+
+            if child is None:
+                try:
+                    obj = Factory.determine(fullpath)
+                except OSError:
+                    # Removed since listed
+                    continue
+
+                if not obj:
+                    continue
+
+                child = self._adopt(obj, os.path.basename(fullpath))
+                changes['added'].append(fullpath)
+
+                if isinstance(child, Key):
+                    child.read()
+                    continue
+
+            child.refresh(changes)
+
+        self.dirty = None
+
+        return changes
+
     def addchild(self, child):
         # If we're adding a child with identical `path`,
         # assume the new child contains newer data than 
@@ -579,13 +992,13 @@ class AbstractParent(AbstractPath):
 
         path = self.path
 
-        if not os.path.exists(path):
+        if not exists(path):
             return
-        if not os.path.isdir(path):
+        if not isdir(path):
             return
 
         children = []
-        for child_path in os.listdir(path):
+        for child_path in listdir(path):
             child_name, child_ext = os.path.splitext(child_path)
             if hidden(child_name):
                 fullpath = os.path.join(path, child_path)
@@ -609,6 +1022,62 @@ class Folder(AbstractParent):
         # TODO
         self._localchildren = set()
 
+    @property
+    def children(self):
+        """Return children, via the manifest of `self` if enabled
+
+        Channels are given the keys listed in the manifest, sparing
+        a listing of each. A manifest no longer current is written
+        anew, and its listing used in place of listing as usual, see
+        manifest.py
+
+        """
+
+        manifest = _manifest()
+        if manifest is None:
+            return super(Folder, self).children
+
+        path = self.internalpath
+        listing = manifest.load(path)
+
+        if listing is None:
+            if not exists(path):
+                return super(Folder, self).children
+
+            try:
+                listing = manifest.update(path)
+            except OSError:
+                # Removed meanwhile
+                return super(Folder, self).children
+
+        existing = dict((child.path, child) for child in self._children)
+        for basename, keys in listing.iteritems():
+            channel = existing.get(os.path.join(path, basename))
+            if channel is None:
+                channel = self._adopt(Channel, basename)
+
+            if isinstance(channel, Channel):
+                channel._manifested = keys
+
+        self._listed([os.path.join(path, basename) for basename in listing])
+
+        return list(self._children)
+
+    @property
+    def revisions(self):
+        """Return history of each channel as {name: revisions}"""
+        return dict((channel.name, channel.revisions) for channel in self)
+
+    def store(self):
+        """Copy each channel into revision-history
+
+        Returns
+            list of revision.Revision, one per channel
+
+        """
+
+        return [channel.store() for channel in self]
+
 
 class Channel(AbstractParent):
     """Channels store content, a Folder may have one or more channels.
@@ -646,6 +1115,44 @@ class Channel(AbstractParent):
         # to the channel via data.setter
         self._localchildren = set()
 
+        # Basenames of keys as per the manifest of
+        # the parent Folder, used by the next listing
+        self._manifested = None
+
+    @property
+    def children(self):
+        """Return children, other than the schema of `self`"""
+        keys, self._manifested = self._manifested, None
+        if keys is None:
+            children = super(Channel, self).children
+        else:
+            existing = set(child.path for child in self._children)
+            for key in keys:
+                if os.path.join(self.path, key) not in existing:
+                    self._adopt(Key, key)
+
+            self._listed([os.path.join(self.path, key) for key in keys])
+            children = list(self._children)
+
+        return [child for child in children
+                if child.basename != constant.Schema]
+
+    @property
+    def schema(self):
+        """Return schema.Schema of `self`, or None
+
+        Schemas are found via the last listing of `self`, such
+        that channels without a schema cost nothing extra.
+
+        """
+
+        for child in self._children:
+            if child.basename == constant.Schema:
+                from openmetadata import schema
+                return schema.load(self.path)
+
+        return None
+
     @property
     def data(self):
         # To maintain correlation between setting data
@@ -701,12 +1208,20 @@ class Channel(AbstractParent):
 
         for key, value in data.iteritems():
             assert isinstance(key, basestring)
-            new_file = Key(key + file_extension, self)
+
+            basename = key + file_extension
+            if process.isbinary(file_extension):
+                # Binary keys may carry their own extension,
+                # E.g. {'thumbnail.png': open(path, 'rb')}
+                if process.isbinary(os.path.splitext(key)[1]):
+                    basename = key
+
+            new_file = Key(basename, self)
             new_file.data = value
             self._localchildren.add(new_file)
 
 
-    def write(self):
+    def write(self, defer=None):
         """Output locally stored files onto disk.
 
         Writing effectively parents each written file to `self`
@@ -718,16 +1233,86 @@ class Channel(AbstractParent):
 
         Note: Writing effectively removes all prior content
 
+        Parameters
+            defer   (bool)  : Leave writing to a background thread,
+                              defaults to True when write-behind is
+                              enabled. See writebehind.py
+
         """
 
-        if self.exists:
-            self.clear()
+        if defer is None:
+            writebehind = sys.modules.get('openmetadata.writebehind')
+            defer = writebehind is not None and writebehind.enabled()
 
-        for file in self._localchildren:
-            file.write()
+        if defer:
+            from openmetadata import writebehind
+            return writebehind.schedule(self)
 
-        self.dirty = False
-        self._localchildren = set()
+        # Data may be set again whilst writing, in which
+        # case `self` remains dirty with the newer data.
+        localchildren = self._localchildren
+
+        # Writers of the same channel, in this or other
+        # processes, would otherwise interleave.
+        guard = _channellock(self.path)
+        guard.acquire()
+
+        keys = [file.basename for file in localchildren]
+
+        try:
+            with _recording(self.path, keys, replace=True):
+                # The schema of `self` outlives its content
+                kept = None
+                if self.exists:
+                    from openmetadata import schema
+                    kept = schema.raw(self.path)
+                    self.clear()
+
+                for file in localchildren:
+                    file._write()
+
+                if kept is not None:
+                    schema.restore(self.path, kept)
+                    keys.append(constant.Schema)
+        finally:
+            guard.release()
+
+        if self._localchildren is localchildren:
+            self.dirty = False
+            self._localchildren = set()
+
+    def read(self):
+        """Read each Key, whilst holding a shared lock of `self`
+
+        Channels being written are read once written. Keys are
+        decoded as per the schema of `self`, if any, see schema.py
+
+        Raises exception.SchemaError of content not matching the
+        schema, or of keys required by it missing.
+
+        """
+
+        with readlock(self.path):
+            children = self.children
+
+            # Compiled once for every key
+            schema = self.schema
+            for child in children:
+                if isinstance(child, Key):
+                    child._read(schema)
+                else:
+                    child.read()
+
+            if schema is not None:
+                missing = schema.missing([child.name for child in children])
+                if missing:
+                    from openmetadata import exception
+                    raise exception.SchemaError(
+                        "%s: Missing %s" % (self.path, ", ".join(missing)))
+
+            self.dirty = None
+
+            return self
 
 
 class Key(AbstractPath):
@@ -737,6 +1322,9 @@ class Key(AbstractPath):
         super(Key, self).__init__(path, parent)
         self._data = None
 
+        # Backend.signature() of the file last read
+        self._signature = None
+
     @property
     def data(self):
         return self._data
@@ -754,23 +1342,45 @@ class Key(AbstractPath):
         Store contents of `self.path` in `self.data`
 
         Post-requirements
-            1. method must not fail.
+            1. method must not fail, other than of content not
+               matching the schema of its channel, see schema.py
 
         """
 
-        if not os.path.exists(self.path):
-            return self
+        parent = self._parent
+        return self._read(parent.schema if isinstance(parent, Channel)
+                          else None)
+
+    def _read(self, schema=None):
+        """Read `self`, decoding content as per schema.Schema `schema`"""
+        store = backend.get(self.path)
 
         try:
-            with open(self.path, 'r') as f:
-                raw = f.read()
+            signature = store.signature(self.path)
+        except OSError:
+            if self._signature is not None:
+                # Removed since last read
+                self._signature = None
+                self._data = None
+                _forget(self.path)
+            return self
 
-        except OSError as e:
-            self.log.error(e)
+        self._signature = signature
+
+        if process.isbinary(self.extension):
+            # Binary formats are read lazily, see process.load()
+            try:
+                self._data = process.load(self.path, self.extension)
+            except (IOError, OSError, ValueError) as e:
+                self.log.error("Could not read %s: %s" % (self.path, e))
             return self
-        
+
         try:
-            processed = process.processincoming(raw, self.extension)
+            processed = process.processfile(self.path, self.extension,
+                                            signature)
+        except (IOError, OSError) as e:
+            self.log.error(e)
+            return self
         except ValueError as e:
             self.log.error("Key empty: %s" % self.path)
             processed = {}
@@ -778,10 +1388,73 @@ class Key(AbstractPath):
             self.log.error(e)
             processed = {}
 
+        if schema is not None:
+            try:
+                processed = schema.decode(self.name, processed)
+            except (TypeError, ValueError) as e:
+                from openmetadata import exception
+                raise exception.SchemaError("%s: %s" % (self.path, e))
+
         self._data = processed
 
         return self
 
+    def get(self, pointer, default=None):
+        """Return content at JSON `pointer` within `self`, or `default`
+
+        E.g.
+        >>> key.get('/assets/0/name')
+
+        Content already read is looked up as-is. Otherwise, JSON keys
+        of channels without a schema are read only in part, see pointer.py
+
+        """
+
+        from openmetadata import pointer as pointers
+
+        tokens = pointers.parse(pointer)
+
+        if self._data is None and self.extension == '.json':
+            parent = self._parent
+            if not isinstance(parent, Channel) or parent.schema is None:
+                try:
+                    return pointers.read(self.path, pointer)
+                except (KeyError, IOError, OSError):
+                    return default
+                except ValueError as e:
+                    self.log.error("Could not read %s: %s" % (self.path, e))
+                    return default
+
+        if self._data is None:
+            self.read()
+
+        try:
+            return pointers.resolve(self._data, tokens)
+        except KeyError:
+            return default
+
+    def refresh(self, changes=None):
+        """Re-read `self` only if its file changed since the last read
+
+        Returns
+            dict()  : See AbstractParent.refresh()
+
+        """
+
+        if changes is None:
+            changes = _changes()
+
+        try:
+            signature = backend.get(self.path).signature(self.path)
+        except OSError:
+            return changes
+
+        if signature != self._signature:
+            self.read()
+            changes['changed'].append(self.path)
+
+        return changes
+
     def write(self):
         """`self.data` ==> `self.path`
 
@@ -789,6 +1462,11 @@ class Key(AbstractPath):
 
         """
 
+        with _recording(os.path.dirname(self.path), [self.basename]):
+            self._write()
+
+    def _write(self):
+        """Write `self`, leaving the manifest to the caller"""
         if not self.parent:
             raise TypeError("No parent set")
 
@@ -799,20 +1477,33 @@ class Key(AbstractPath):
             self.log.error('Extension "%s" not recognised' % ext)
             return None
 
-        processed = process.processoutgoing(raw, ext)
-        
-        if not processed:
-            self.log.error('Could not process "%s"' % self.path)
-            return None
+        binary = process.isbinary(ext)
+
+        if not binary:
+            processed = process.processoutgoing(raw, ext)
+            
+            if not processed:
+                self.log.error('Could not process "%s"' % self.path)
+                return None
+
+        store = backend.get(self.path)
 
         # Ensure preceeding hierarchy exists,
         # otherwise writing will fail.
         parent = self.parent
-        if not os.path.exists(parent.path):
-            os.makedirs(parent.path)
+        if not store.exists(parent.path):
+            makedirs(parent.path)
+
+        if binary:
+            # Binary formats are streamed, see process.dump()
+            digest = process.dump(self.path, raw, ext)
+            processed = None
+        else:
+            store.write(self.path, processed)
+            digest = None
 
-        with open(self.path, 'w') as f:
-            f.write(processed)
+        from openmetadata import journal
+        journal.record('write', self.path, processed, digest)
 
         # Hide .meta folder
         if os.name == 'nt':
@@ -830,7 +1521,7 @@ class Factory:
     @classmethod
     def determine(cls, path):
         """Return appropriate class based on `path`"""
-        if not os.path.exists(path):
+        if not exists(path):
             raise OSError('"%s" not found' % path)
 
         parent = os.path.dirname(path)
@@ -838,9 +1529,9 @@ class Factory:
 
         # if path is symlink
 
-        if os.path.isdir(path):
+        if isdir(path):
             # Inspect it's children
-            children = os.listdir(path)
+            children = listdir(path)
 
             if constant.Meta in children:
                 # Presence of Folder folder within `path`
@@ -905,7 +1596,19 @@ class Factory:
         # If path is a .meta directory
         if os.path.basename(path) == constant.Meta:
             path = os.path.dirname(path)
-        
+
+        identitymap = currentidentity()
+        if identitymap is not None:
+            obj = identitymap.get(path, lambda path: cls._create(path, parent))
+            if parent is not None and obj is not None and \
+                    obj not in parent._children:
+                parent.addchild(obj)
+            return obj
+
+        return cls._create(path, parent)
+
+    @classmethod
+    def _create(cls, path, parent=None):
         obj = cls.determine(path)
         return obj(path, parent) if obj else None
 
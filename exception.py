@@ -10,4 +10,8 @@ class PlaceHolder(object):
 		May also be a logical place for common errors or
 		wrong ways of using a function.
 
-		"""
\ No newline at end of file
+		"""
+
+
+class SchemaError(ValueError):
+	"""Content of a channel not matching its schema, see schema.py"""
@@ -0,0 +1,223 @@
+"""Append-only journal of changes per root
+
+# Overview
+    Rather than rescanning a whole hierarchy for what changed,
+    indexers and caches may follow the journal of its root.
+
+    Once enabled for a root, each Key.write(), update(), clear(),
+    delete() and Revision.restore() beneath that root appends one
+    record to its journal, regardless of the process making the change.
+
+    E.g.
+    >>> journal.enable('/projects/hulk')
+    >>> om.update('/projects/hulk/shots/1000', 'properties', 'fps', 24)
+    >>> for record, offset in journal.tail('/projects/hulk'):
+    ...     print record.op, record.path
+    update /projects/hulk/shots/1000/.meta/properties.kvs/fps.json
+
+    Consumers keep the offset of the last record processed and
+    resume from there, E.g. journal.tail(root, offset)
+
+# Layout
+    Records are appended to segments within the root .meta,
+    one JSON list per line; [time, op, relative path, sha1].
+    The sha1 is that of the bytes written, and null for changes
+    writing no content, such as clear() and delete().
+
+    \root\.meta\.journal\00000000.jsonl
+    \root\.meta\.journal\00000001.jsonl
+
+    A segment is rotated once it exceeds MaxSegment bytes.
+
+    Segments are appended to, and read, via the backend of their root.
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import time
+import logging
+import hashlib
+import threading
+import collections
+
+from openmetadata import backend
+from openmetadata import constant
+
+log = logging.getLogger('openmetadata.journal')
+
+Journal = '.journal'
+Extension = '.jsonl'
+
+MaxSegment = 4 * 1024 * 1024
+
+# Seconds for which the discovery of journaled roots
+# is trusted, before looking on disk again.
+DiscoveryTimeout = 10.0
+
+Record = collections.namedtuple('Record', ['time', 'op', 'path', 'hash'])
+
+# Position following a record, (segment index, byte offset)
+Offset = collections.namedtuple('Offset', ['segment', 'position'])
+
+# {directory: (journal directory or None, time of discovery)}
+_roots = {}
+_rootslock = threading.Lock()
+
+
+def journalpath(root):
+    """Return path of journal directory of `root`"""
+    return os.path.join(root, constant.Meta, Journal)
+
+
+def enable(root):
+    """Journal each change beneath `root`"""
+    from openmetadata import domain
+
+    root = os.path.abspath(root)
+    domain.makedirs(journalpath(root))
+
+    with _rootslock:
+        _roots.clear()
+
+
+def enabled(root):
+    path = journalpath(os.path.abspath(root))
+    return backend.get(path).isdir(path)
+
+
+def _discover(dirname, now):
+    """Return journal directory of nearest journaled root of `dirname`"""
+    with _rootslock:
+        cached = _roots.get(dirname)
+    if cached is not None and now - cached[1] < DiscoveryTimeout:
+        return cached[0]
+
+    path = journalpath(dirname)
+    if backend.get(path).isdir(path):
+        found = path
+    else:
+        parent = os.path.dirname(dirname)
+        found = _discover(parent, now) if parent != dirname else None
+
+    with _rootslock:
+        _roots[dirname] = (found, now)
+
+    return found
+
+
+def _segments(path):
+    """Return indexes of segments within journal directory `path`"""
+    try:
+        basenames = backend.get(path).listdir(path)
+    except OSError:
+        return []
+
+    indexes = []
+    for basename in basenames:
+        name, ext = os.path.splitext(basename)
+        if ext == Extension and name.isdigit():
+            indexes.append(int(name))
+
+    return sorted(indexes)
+
+
+def _segmentpath(path, index):
+    return os.path.join(path, "%08d%s" % (index, Extension))
+
+
+def record(op, path, raw=None, digest=None):
+    """Append change `op` of `path` to the journal of its root, if any
+
+    Parameters
+        op      (str)   : Kind of change, E.g. 'write', 'update',
+                          'clear' or 'delete'
+        path    (str)   : Absolute path of changed item
+        raw     (str)   : (optional) Content written, hashed into record;
+                          unicode is hashed as UTF-8
+        digest  (str)   : (optional) SHA-1 hexdigest of content written,
+                          in place of `raw`, E.g. from process.dump()
+
+    """
+
+    import json
+    from openmetadata import lock
+
+    path = os.path.abspath(path)
+    journal = _discover(os.path.dirname(path), time.time())
+    if journal is None:
+        return
+
+    root = os.path.dirname(os.path.dirname(journal))
+    if isinstance(raw, unicode):
+        raw = raw.encode('utf-8')
+
+    if digest is None and isinstance(raw, str):
+        digest = hashlib.sha1(raw).hexdigest()
+
+    line = json.dumps([time.time(), op,
+                       os.path.relpath(path, root), digest]) + "\n"
+
+    try:
+        with lock.exclusive(os.path.join(journal, Journal)):
+            indexes = _segments(journal)
+            index = indexes[-1] if indexes else 0
+
+            store = backend.get(journal)
+            segment = _segmentpath(journal, index)
+            if store.exists(segment) and \
+                    store.stat(segment).size >= MaxSegment:
+                segment = _segmentpath(journal, index + 1)
+
+            store.append(segment, line)
+
+    except (IOError, OSError) as e:
+        # Changes are never refused for lack of a journal
+        log.error("record(): Could not journal %s of %s: %s"
+                  % (op, path, e))
+
+
+def tail(root, offset=None):
+    """Yield (Record, Offset) of each record from `offset` onwards
+
+    Records still being appended are not yielded. Offsets
+    are plain tuples and may be stored as such.
+
+    Parameters
+        root    (str)       : Journaled root
+        offset  (Offset)    : (optional) Offset of last record processed
+
+    """
+
+    import json
+
+    root = os.path.abspath(root)
+    journal = journalpath(root)
+
+    segment, position = offset or (0, 0)
+
+    for index in _segments(journal):
+        if index < segment:
+            continue
+
+        if index > segment:
+            position = 0
+
+        path = _segmentpath(journal, index)
+        with backend.get(path).open(path) as f:
+            f.seek(position)
+
+            while True:
+                line = f.readline()
+                if not line.endswith("\n"):
+                    # End of segment, or incomplete record
+                    break
+
+                position += len(line)
+
+                stamp, op, relpath, digest = json.loads(line)
+                yield (Record(stamp, op, os.path.join(root, relpath), digest),
+                       Offset(index, position))
+
+        segment = index
@@ -0,0 +1,297 @@
+"""Advisory locking of metadata across processes
+
+Locks are taken on a lock file within the hidden .lock folder of
+the .meta folder of the locked item, mirroring its path within. Lock
+files thus never end up in channels or their tombstones, and taking
+a lock leaves the mtime of the .meta folder and its channels untouched.
+
+E.g. \folder\.meta\.lock\chan.kvs\file1.json.lock
+
+Items outside of any .meta folder are locked via a hidden lock file
+alongside, E.g. \folder\.file1.json.lock
+
+Lock files are never removed; removing a lock file whilst
+another process waits on it would let two processes in at once.
+Readers may leave creating lock files to writers, see FileLock.
+
+Locks are either exclusive, for writers, or shared, for readers.
+Any number of readers may hold a shared lock at once, but no reader
+alongside a writer. On Windows, shared locks are exclusive.
+
+Locks are taken via the backend of the locked item. Backends other
+than the file-system lock within the current process, see ThreadLock.
+
+Time spent waiting on locks held by others is kept, see stats()
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import time
+import logging
+import threading
+
+from openmetadata import constant
+
+log = logging.getLogger('openmetadata.lock')
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+
+Extension = '.lock'
+
+
+def lockpath(path):
+    """Return path of lock file of `path`, see above"""
+    head, relpath = path, []
+    while True:
+        head, basename = os.path.split(head)
+        if not basename:
+            break
+
+        if basename == constant.Meta and relpath:
+            relpath.reverse()
+            return os.path.join(head, basename, constant.Lock,
+                                *relpath) + Extension
+
+        relpath.append(basename)
+
+    dirname, basename = os.path.split(path)
+    return os.path.join(dirname, ".%s%s" % (basename, Extension))
+
+
+_stats = {'acquired': 0, 'contended': 0, 'waited': 0.0, 'maxwait': 0.0}
+_statslock = threading.Lock()
+
+
+def _record(waited, contended):
+    with _statslock:
+        _stats['acquired'] += 1
+        if contended:
+            _stats['contended'] += 1
+            _stats['waited'] += waited
+            _stats['maxwait'] = max(_stats['maxwait'], waited)
+
+
+def stats():
+    """Return locks acquired, how many were contended and seconds waited"""
+    with _statslock:
+        return dict(_stats)
+
+
+def resetstats():
+    with _statslock:
+        _stats.update(acquired=0, contended=0, waited=0.0, maxwait=0.0)
+
+
+class FileLock(object):
+    """Lock of `path`, held across processes and threads
+
+    E.g.
+    >>> with FileLock(path):
+    ...     modify(path)
+
+    Parameters
+        path    (str)   : Path of locked item
+        shared  (bool)  : Take a shared, rather than exclusive, lock
+        create  (bool)  : Create the lock file if missing, otherwise
+                          acquire() raises IOError
+
+    """
+
+    def __init__(self, path, shared=False, create=True):
+        self.path = path
+        self.shared = shared
+        self.create = create
+        self._file = None
+
+    def __repr__(self):
+        return "%s.FileLock(%r, shared=%r)" % (__name__, self.path,
+                                               self.shared)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+    @property
+    def locked(self):
+        return self._file is not None
+
+    def acquire(self):
+        if self.locked:
+            raise RuntimeError("%r already acquired" % self)
+
+        path = lockpath(self.path)
+
+        if self.create:
+            # Along with the hidden folders of a .meta folder created
+            from openmetadata import domain
+            domain.makedirs(os.path.dirname(path))
+            f = open(path, 'a+')
+        else:
+            f = open(path, 'r')
+        try:
+            if fcntl:
+                contended, waited = self._flock(f)
+            else:
+                contended, waited = self._locking(f)
+        except:
+            f.close()
+            raise
+
+        _record(waited, contended)
+
+        self._file = f
+
+    def _flock(self, f):
+        """Lock `f`, return whether it was contended and seconds waited"""
+        operation = fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+
+        try:
+            fcntl.flock(f.fileno(), operation | fcntl.LOCK_NB)
+            return False, 0.0
+        except IOError:
+            pass
+
+        started = time.time()
+        fcntl.flock(f.fileno(), operation)
+        return True, time.time() - started
+
+    def _locking(self, f):
+        started = time.time()
+        contended = False
+
+        # msvcrt.LK_LOCK only retries for 10 seconds
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except IOError:
+                contended = True
+                time.sleep(0.05)
+
+        return contended, time.time() - started if contended else 0.0
+
+    def release(self):
+        if not self.locked:
+            return
+
+        f, self._file = self._file, None
+        try:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            f.close()
+
+
+# {path: _State} of each ThreadLock acquired or waited on
+_threadlocks = {}
+_threadlockslock = threading.Lock()
+
+
+class _State(object):
+    def __init__(self):
+        self.condition = threading.Condition(threading.Lock())
+        self.readers = 0
+        self.writer = False
+        self.users = 0
+
+
+class ThreadLock(object):
+    """Lock of `path`, held across threads of the current process only
+
+    As FileLock, for paths not on the local file-system.
+
+    Parameters
+        path    (str)   : Path of locked item
+        shared  (bool)  : Take a shared, rather than exclusive, lock
+
+    """
+
+    def __init__(self, path, shared=False):
+        self.path = path
+        self.shared = shared
+        self._state = None
+
+    def __repr__(self):
+        return "%s.ThreadLock(%r, shared=%r)" % (__name__, self.path,
+                                                 self.shared)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+    @property
+    def locked(self):
+        return self._state is not None
+
+    def acquire(self):
+        if self.locked:
+            raise RuntimeError("%r already acquired" % self)
+
+        with _threadlockslock:
+            state = _threadlocks.get(self.path)
+            if state is None:
+                state = _threadlocks[self.path] = _State()
+            state.users += 1
+
+        started = time.time()
+        contended = False
+
+        with state.condition:
+            while state.writer or (not self.shared and state.readers):
+                contended = True
+                state.condition.wait()
+
+            if self.shared:
+                state.readers += 1
+            else:
+                state.writer = True
+
+        _record(time.time() - started if contended else 0.0, contended)
+
+        self._state = state
+
+    def release(self):
+        if not self.locked:
+            return
+
+        state, self._state = self._state, None
+        with state.condition:
+            if self.shared:
+                state.readers -= 1
+            else:
+                state.writer = False
+            state.condition.notify_all()
+
+        with _threadlockslock:
+            state.users -= 1
+            if not state.users:
+                del _threadlocks[self.path]
+
+
+def exclusive(path):
+    """Return exclusive lock of `path`, for use with `with`"""
+    from openmetadata import backend
+    return backend.get(path).lock(path)
+
+
+def shared(path):
+    """Return shared lock of `path`, for use with `with`"""
+    from openmetadata import backend
+    return backend.get(path).lock(path, shared=True)
@@ -0,0 +1,359 @@
+"""Cached listing of each .meta folder
+
+# Overview
+    Reading a Folder lists its .meta folder and each of its channels,
+    and Factory.determine() lists every child once more. On network
+    storage each listing costs a round-trip. Instead, a manifest of a
+    .meta folder lists its channels and their keys in one file.
+
+    E.g.
+    >>> manifest.enable()
+    >>> om.update('/projects/hulk/shots/1000', 'properties', 'fps', 24)
+    >>> om.read('/projects/hulk/shots/1000')  # Reads one manifest
+    {'properties': {'fps': 24}}
+
+    Once enabled, Channel.write() and Key.write() record what they
+    wrote in the manifest of their .meta folder, and reading a Folder
+    enumerates its channels and keys from its manifest. Channels are
+    directories and keys are files, as per Factory.determine().
+
+    A manifest is only used whilst the mtime of its .meta folder, and
+    of each of its channels, is what it was when the manifest was
+    written. Otherwise, the manifest is written anew from a listing
+    which is then used in place of listing as usual, such as when
+    keys were written via update(), or by a process not having
+    manifests enabled.
+
+    Directories listed, or written, within Resolution seconds of
+    their mtime are listed once more when next loaded after that, as
+    changes within the same tick of their mtime would go unnoticed.
+    Until then, channels are listed as usual.
+
+# Layout
+    The manifest lives in a hidden folder of its own, such that
+    writing it leaves the mtime of its .meta folder untouched.
+
+    \folder\.meta\__manifest__\manifest.json
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import time
+import logging
+
+from openmetadata import backend
+from openmetadata import constant
+
+log = logging.getLogger('openmetadata.manifest')
+
+Filename = 'manifest.json'
+
+# Directories changed within this many seconds of being
+# listed are not trusted, as further changes within the
+# same tick of their mtime would go unnoticed.
+Resolution = 1.0
+
+_enabled = False
+
+# Default of an entry whose time of listing is missing
+_Unsettled = 0.0
+
+
+def enable():
+    """Keep and use a manifest per .meta folder"""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def enabled():
+    return _enabled
+
+
+def manifestpath(metapath):
+    """Return path of manifest of .meta folder `metapath`"""
+    return os.path.join(metapath, constant.Manifest, Filename)
+
+
+def _included(basename):
+    return not (basename.startswith(".") or
+                basename in constant.HiddenKeys)
+
+
+def _listed(basenames):
+    """Return channels or keys among `basenames`, by name alone"""
+    return set(basename for basename in basenames
+               if _included(basename) and os.path.splitext(basename)[1])
+
+
+def _channel(store, path):
+    """Return entry of channel `path`, {'mtime', 'time', 'keys'}"""
+    entry = {'mtime': store.stat(path).mtime,
+             'time': time.time(),
+             'keys': []}
+
+    for key in store.listdir(path):
+        key_path = os.path.join(path, key)
+        if not _included(key) or not os.path.splitext(key)[1]:
+            continue
+
+        if store.isdir(key_path):
+            entry['keys'] = None
+            break
+
+        entry['keys'].append(key)
+
+    return entry
+
+
+def build(metapath):
+    """Return manifest of .meta folder `metapath` as listed now
+
+    Returns
+        dict()  : {'time': time of listing,
+                   'mtime': mtime of `metapath`,
+                   'channels': {channel: {'time': time of listing,
+                                          'mtime': mtime of channel,
+                                          'keys': [key]}}}
+
+        Channels containing anything but keys are listed
+        with keys None, and are listed as usual when read.
+
+    """
+
+    store = backend.get(metapath)
+
+    manifest = {'mtime': store.stat(metapath).mtime,
+                'time': time.time(),
+                'channels': {}}
+
+    for channel in store.listdir(metapath):
+        channel_path = os.path.join(metapath, channel)
+        if not _included(channel) or not store.isdir(channel_path):
+            continue
+
+        if not os.path.splitext(channel)[1]:
+            # Invalid channel, see Factory.determine()
+            continue
+
+        manifest['channels'][channel] = _channel(store, channel_path)
+
+    return manifest
+
+
+def _read(store, path):
+    """Return (raw, manifest) at `path`, or (None, None)"""
+    import json
+
+    try:
+        raw = store.read(path)
+        return raw, json.loads(raw)
+    except (IOError, OSError, ValueError):
+        return None, None
+
+
+def _write(store, path, manifest):
+    import json
+    store.write(path, json.dumps(manifest))
+    log.debug("Updated %s" % path)
+
+
+def _channels(manifest):
+    return dict((channel, list(entry['keys'])
+                 if entry['keys'] is not None else None)
+                for channel, entry in manifest['channels'].iteritems())
+
+
+def update(metapath):
+    """Write manifest of .meta folder `metapath` anew
+
+    Returns
+        dict()  : Channels as listed, see load()
+
+    Raises OSError if `metapath` can't be listed.
+
+    """
+
+    store = backend.get(metapath)
+    path = manifestpath(metapath)
+
+    try:
+        # Created prior to listing, as creating it
+        # changes the mtime of `metapath`
+        store.makedirs(os.path.dirname(path))
+    except (IOError, OSError) as e:
+        # E.g. read-only location
+        log.debug("Could not update %s: %s" % (path, e))
+        path = None
+
+    manifest = build(metapath)
+
+    if path is not None:
+        try:
+            with store.lock(path):
+                _write(store, path, manifest)
+        except (IOError, OSError) as e:
+            log.debug("Could not update %s: %s" % (path, e))
+
+    return _channels(manifest)
+
+
+def state(metapath, channel):
+    """Return mtimes of `metapath` and its `channel`, or None if missing
+
+    Taken prior to writing to `channel`, see record()
+
+    """
+
+    store = backend.get(metapath)
+
+    mtimes = []
+    for path in (metapath, os.path.join(metapath, channel)):
+        try:
+            mtimes.append(store.stat(path).mtime)
+        except OSError:
+            mtimes.append(None)
+
+    return tuple(mtimes)
+
+
+def record(metapath, channel, keys, before, replace=False):
+    """Record `keys` of `channel` as written to the manifest of `metapath`
+
+    Only the entry of `channel` is updated, and only if the manifest
+    was current prior to writing, as per `before`. Otherwise, it is
+    left to be written anew once read.
+
+    Parameters
+        metapath    (str)   : Path of .meta folder
+        channel     (str)   : Basename of channel written to
+        keys        (list)  : Basenames of keys written
+        before      (tuple) : Returned by state() prior to writing
+        replace     (bool)  : Whether `keys` replace every key of `channel`
+
+    """
+
+    store = backend.get(metapath)
+    path = manifestpath(metapath)
+    channel_path = os.path.join(metapath, channel)
+
+    with store.lock(path):
+        _, manifest = _read(store, path)
+        if manifest is None:
+            return
+
+        meta_mtime, channel_mtime = before
+        if manifest['mtime'] != meta_mtime:
+            return
+
+        entry = manifest['channels'].get(channel)
+        if entry is None:
+            if channel_mtime is not None:
+                # Channel not listed, yet there was one
+                return
+            entry = {'mtime': None, 'time': _Unsettled, 'keys': []}
+
+        elif not replace and entry['mtime'] != channel_mtime:
+            return
+
+        if replace:
+            entry['keys'] = []
+
+        if entry['keys'] is not None:
+            entry['keys'] = sorted(set(entry['keys']) | set(keys))
+
+        mtime = store.stat(channel_path).mtime
+        if mtime != entry['mtime']:
+            entry['mtime'], entry['time'] = mtime, time.time()
+
+        mtime = store.stat(metapath).mtime
+        if mtime != manifest['mtime']:
+            manifest['mtime'], manifest['time'] = mtime, time.time()
+
+        manifest['channels'][channel] = entry
+        _write(store, path, manifest)
+
+
+def load(metapath):
+    """Return channels of .meta folder `metapath` as per its manifest
+
+    Directories recorded within Resolution seconds of their mtime
+    are listed once to confirm the manifest, which is then written
+    back, see above.
+
+    Returns
+        dict()  : Basenames of keys per channel, {channel: [key]},
+                  or None if there is no current manifest. Keys are
+                  None for channels to be listed as usual.
+
+    """
+
+    store = backend.get(metapath)
+    path = manifestpath(metapath)
+
+    raw, manifest = _read(store, path)
+    if manifest is None:
+        return None
+
+    now = time.time()
+    settled = []
+
+    def _current(path, entry, names):
+        """Return whether `entry` of `path` is current, or None if unknown"""
+        try:
+            mtime = store.stat(path).mtime
+        except OSError:
+            return False
+
+        if mtime != entry['mtime']:
+            return False
+
+        if names is None or entry.get('time', _Unsettled) - mtime > Resolution:
+            return True
+
+        if now - mtime <= Resolution:
+            # Changes may yet follow within the same tick
+            return None
+
+        try:
+            listed = _listed(store.listdir(path))
+        except OSError:
+            return False
+
+        if listed != set(names):
+            return False
+
+        entry['time'] = now
+        settled.append(path)
+        return True
+
+    if not _current(metapath, manifest, manifest['channels']):
+        return None
+
+    channels = {}
+    for channel, entry in manifest['channels'].iteritems():
+        keys = entry['keys']
+        current = _current(os.path.join(metapath, channel), entry, keys)
+
+        if current is False:
+            return None
+
+        channels[channel] = list(keys) if current and keys is not None \
+            else None
+
+    if settled:
+        try:
+            with store.lock(path):
+                # Unless written anew meanwhile
+                if _read(store, path)[0] == raw:
+                    _write(store, path, manifest)
+        except (IOError, OSError) as e:
+            log.debug("Could not update %s: %s" % (path, e))
+
+    return channels
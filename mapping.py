@@ -5,6 +5,7 @@ channel_to_file =   {
                         '.kvs': '.json',
                         '.txt': '.txt',
                         '.mdw': '.txt',
+                        '.arr': '.arr',
                     }
 
 
@@ -28,7 +29,8 @@ key_to_channel = {
 mapping =   {
                 '.txt': process.DotTxt,
                 '.mdw': process.DotMdw,
-                '.json': process.DotJson
+                '.json': process.DotJson,
+                '.arr': process.DotArr
             }
 
 
@@ -0,0 +1,295 @@
+"""Mirror metadata between roots, transferring only what changed
+
+# Overview
+    Generic copy tools stat and compare every file of a hierarchy.
+    Instead, a Manifest of each root lists the keys and channels of
+    every .meta folder, built in parallel, and only keys that differ
+    between manifests are transferred.
+
+    E.g.
+    >>> om.diff('/studio/hulk', '/cache/hulk')
+    Diff(added=['shots/1000/.meta/properties.kvs/fps.json'],
+         changed=[], removed=[])
+    >>> om.sync('/studio/hulk', '/cache/hulk')
+
+    Manifests may be saved and reused, such that the source of
+    many mirrors is only ever scanned once.
+
+    >>> manifest = Manifest.build('/studio/hulk')
+    >>> for cache in caches:
+    ...     om.sync(manifest, cache)
+
+    Keys are compared by size and mtime, or by content given hash=True.
+    Transferred keys are written atomically and carry the mtime of
+    their source. Keys and channels no longer in the source are
+    removed from the destination as .deleted tombstones.
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import logging
+import hashlib
+import collections
+
+from openmetadata import constant
+
+log = logging.getLogger('openmetadata.mirror')
+
+# Differences in mtime below this many seconds are
+# ignored, as file-systems store times at differing
+# resolutions.
+MtimeResolution = 0.001
+
+Entry = collections.namedtuple('Entry', ['size', 'mtime', 'hash'])
+Diff = collections.namedtuple('Diff', ['added', 'changed', 'removed'])
+
+
+def _included(name):
+    return not (name.startswith(".") or name in constant.HiddenKeys)
+
+
+def _metafolders(root):
+    """Return relative paths of each .meta folder beneath `root`"""
+    metafolders = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        if constant.Meta in dirnames:
+            relpath = os.path.relpath(os.path.join(dirpath, constant.Meta),
+                                      root)
+            metafolders.append(relpath)
+
+        # Nested .meta folders are listed along with their
+        # parent .meta folder, see _scan()
+        dirnames[:] = [d for d in dirnames if _included(d)]
+
+    return metafolders
+
+
+def _hash(path):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), ''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def _scan(root, metafolder, hash):
+    """Return (channels, entries) within `metafolder` of `root`"""
+    channels = []
+    entries = {}
+
+    for dirpath, dirnames, filenames in os.walk(os.path.join(root,
+                                                             metafolder)):
+        dirnames[:] = [d for d in dirnames
+                       if d == constant.Meta or _included(d)]
+
+        relpath = os.path.relpath(dirpath, root)
+        if os.path.basename(relpath) != constant.Meta:
+            channels.append(relpath)
+
+        for filename in filenames:
+            if not _included(filename):
+                continue
+
+            path = os.path.join(dirpath, filename)
+            try:
+                stat = os.stat(path)
+                digest = _hash(path) if hash else None
+            except (IOError, OSError):
+                # Removed since listed
+                continue
+
+            entries[os.path.join(relpath, filename)] = Entry(
+                stat.st_size, stat.st_mtime, digest)
+
+    return channels, entries
+
+
+class Manifest(object):
+    """Keys and channels of every .meta folder beneath `root`
+
+    Parameters
+        root        (str)   : Absolute path of root
+        channels    (set)   : Relative paths of channels
+        entries     (dict)  : Entry per relative path of key
+        hash        (bool)  : Whether entries include hashes of content
+
+    """
+
+    def __init__(self, root, channels=None, entries=None, hash=False):
+        self.root = root
+        self.channels = set(channels or ())
+        self.entries = entries or {}
+        self.hash = hash
+
+    def __repr__(self):
+        return "%s.Manifest(%r, %i keys)" % (__name__, self.root,
+                                             len(self.entries))
+
+    @classmethod
+    def build(cls, root, hash=False, processes=8):
+        """Scan `root`, each .meta folder in parallel
+
+        Parameters
+            root        (str)   : Path of root
+            hash        (bool)  : Include sha1 of each key
+            processes   (int)   : Maximum number of concurrent scans
+
+        """
+
+        from openmetadata import util
+
+        root = os.path.abspath(root)
+        manifest = cls(root, hash=hash)
+
+        results = util.parallel(lambda metafolder: _scan(root, metafolder,
+                                                         hash),
+                                _metafolders(root), processes)
+
+        for channels, entries in results:
+            manifest.channels.update(channels)
+            manifest.entries.update(entries)
+
+        return manifest
+
+    def save(self, path):
+        """Write manifest to `path` as JSON"""
+        import json
+        from openmetadata import util
+
+        util.atomicwrite(path, json.dumps({
+            'root': self.root,
+            'hash': self.hash,
+            'channels': sorted(self.channels),
+            'entries': self.entries}), mode='w')
+
+    @classmethod
+    def load(cls, path):
+        import json
+
+        with open(path, 'r') as f:
+            data = json.load(f)
+
+        entries = dict((relpath, Entry(*entry))
+                       for relpath, entry in data['entries'].iteritems())
+        return cls(data['root'], data['channels'], entries, data['hash'])
+
+
+def _manifest(root, hash, processes):
+    if isinstance(root, Manifest):
+        return root
+    return Manifest.build(root, hash, processes)
+
+
+def _changed(src, dst):
+    if src.size != dst.size:
+        return True
+    if src.hash and dst.hash:
+        return src.hash != dst.hash
+    return abs(src.mtime - dst.mtime) >= MtimeResolution
+
+
+def diff(src, dst, hash=False, processes=8):
+    """Return Diff of keys and channels from `src` to `dst`
+
+    Parameters
+        src         (str, Manifest) : Source root or its manifest
+        dst         (str, Manifest) : Destination root or its manifest
+        hash        (bool)          : Compare content rather than mtime
+        processes   (int)           : Maximum number of concurrent scans
+
+    Returns
+        Diff of relative paths; keys added and changed, and keys
+        and channels removed. Keys of removed channels are omitted.
+
+    """
+
+    src = _manifest(src, hash, processes)
+    dst = _manifest(dst, hash, processes)
+
+    added = []
+    changed = []
+    for relpath, entry in src.entries.iteritems():
+        existing = dst.entries.get(relpath)
+        if existing is None:
+            added.append(relpath)
+        elif _changed(entry, existing):
+            changed.append(relpath)
+
+    removed_channels = dst.channels - src.channels
+
+    def _within_removed(relpath):
+        dirname = os.path.dirname(relpath)
+        while dirname:
+            if dirname in removed_channels:
+                return True
+            dirname = os.path.dirname(dirname)
+        return False
+
+    removed = [relpath for relpath in removed_channels
+               if not _within_removed(relpath)]
+    removed.extend(relpath for relpath in dst.entries
+                   if relpath not in src.entries and
+                   not _within_removed(relpath))
+
+    return Diff(sorted(added), sorted(changed), sorted(removed))
+
+
+def _transfer(src, dst):
+    """Copy key `src` onto `dst` atomically, along with its mtime"""
+    from openmetadata import journal, util
+
+    with open(src, 'rb') as f:
+        raw = f.read()
+
+    stat = os.stat(src)
+    util.atomicwrite(dst, raw)
+    os.utime(dst, (stat.st_atime, stat.st_mtime))
+
+    journal.record('write', dst, raw)
+
+
+def sync(src, dst, hash=False, processes=8):
+    """Make metadata of `dst` identical to that of `src`
+
+    Parameters
+        src         (str, Manifest) : Source root or its manifest
+        dst         (str)           : Destination root
+        hash        (bool)          : Compare content rather than mtime
+        processes   (int)           : Maximum number of concurrent
+                                      scans and transfers
+
+    Returns
+        Diff applied
+
+    """
+
+    from openmetadata import domain, util
+
+    src = _manifest(src, hash, processes)
+    dst = os.path.abspath(dst)
+
+    difference = diff(src, dst, hash, processes)
+
+    for relpath in difference.removed:
+        path = os.path.join(dst, relpath)
+        if os.path.isdir(path):
+            domain.Channel(path).clear()
+        else:
+            domain.Key(path).clear()
+
+    for relpath in src.channels:
+        util.makedirs(os.path.join(dst, relpath))
+
+    def _sync(relpath):
+        _transfer(os.path.join(src.root, relpath),
+                  os.path.join(dst, relpath))
+
+    util.parallel(_sync, difference.added + difference.changed, processes)
+
+    log.info("sync(): %i added, %i changed and %i removed from %s to %s"
+             % (len(difference.added), len(difference.changed),
+                len(difference.removed), src.root, dst))
+
+    return difference
@@ -0,0 +1,260 @@
+"""Lazy views of metadata cascading up-wards through a hierarchy
+
+# Overview
+    A cascade is a stack of channels of the same name, one per level
+    of a hierarchy, where channels closer to the leaf override those
+    closer to the root. This is an implementation of the Property-Pattern
+    as discussed here:
+
+    http://steve-yegge.blogspot.co.uk/2008/10/universal-design-pattern.html
+
+    Rather than reading and merging every channel up-front, Cascade
+    resolves each key by probing the stack from the leaf outwards and
+    stops at the first hit. Dictionaries become Overlay views, merged
+    only once materialized.
+
+    E.g.
+    >>> view = Cascade.find(path, 'properties')
+    >>> view['resolution']['width']  # Reads at most one key per level
+    1920
+    >>> view.materialize()           # Reads everything
+    {'resolution': {'width': 1920, 'height': 1080}}
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import logging
+import collections
+
+from openmetadata import constant
+from openmetadata import domain
+from openmetadata import process
+
+log = logging.getLogger('openmetadata.overlay')
+
+
+def materialize(value):
+    """Return `value` with any Overlay merged into a plain dict"""
+    if isinstance(value, Overlay):
+        return value.materialize()
+    return value
+
+
+def _stack(values):
+    """Return first of `values`, stacking consecutive dictionaries"""
+    layers = []
+    for value in values:
+        if not isinstance(value, collections.Mapping):
+            if not layers:
+                return value
+
+            # Overridden by the dictionaries above
+            break
+
+        layers.append(value)
+
+    return Overlay(layers)
+
+
+class Overlay(collections.Mapping):
+    """Read-only view of dictionaries stacked on top of each other
+
+    Parameters
+        layers  (list)  : Dictionaries, top-most first
+
+    """
+
+    def __init__(self, layers):
+        self._layers = layers
+
+    def __repr__(self):
+        return "%s.Overlay(%r)" % (__name__, self.materialize())
+
+    def __getitem__(self, key):
+        values = [layer[key] for layer in self._layers if key in layer]
+        if not values:
+            raise KeyError(key)
+
+        return _stack(values)
+
+    def __iter__(self):
+        seen = set()
+        for layer in self._layers:
+            for key in layer:
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self):
+        return len(set(key for layer in self._layers for key in layer))
+
+    def materialize(self):
+        """Return deep-merged copy as a plain dict"""
+        return dict((key, materialize(self[key])) for key in self)
+
+
+class Cascade(Overlay):
+    """Lazy view of a channel stacked up-wards through a hierarchy
+
+    Each layer is the path of a channel, leaf-most first, and each
+    item a key within that channel. Keys are read upon access.
+
+    Parameters
+        channels    (list)  : Absolute paths of channels, leaf-most first
+
+    """
+
+    def __init__(self, channels, probed=None):
+        super(Cascade, self).__init__(channels)
+        self._cache = {}
+
+        # Paths, other than channels and keys, found by find()
+        self._probed = probed or []
+
+    def __repr__(self):
+        return "%s.Cascade(%r)" % (__name__, self._layers)
+
+    @classmethod
+    def find(cls, path, channel):
+        """Return Cascade of `channel` from `path` up-wards
+
+        Costs two stats per level, one per visible and hidden name
+        of `channel`, plus one read of the isRoot key of each channel
+        found. A channel with an isRoot key of True terminates the search.
+
+        """
+
+        basenames = (channel + constant.Kvs,
+                     "__%s__%s" % (channel, constant.Kvs))
+        isroot = 'isRoot' + process.channel_to_file[constant.Kvs]
+
+        channels = []
+        probed = []
+        while path:
+            root = False
+            probed.append(os.path.join(path, constant.Meta))
+            for basename in basenames:
+                channel_path = os.path.join(path, constant.Meta, basename)
+                if domain.isdir(channel_path):
+                    channels.append(channel_path)
+                    probed.append(os.path.join(channel_path, isroot))
+
+                    with domain.readlock(channel_path):
+                        value = _read(os.path.join(channel_path, isroot))
+
+                    if value is True:
+                        root = True
+
+            if root:
+                break
+
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+
+        return cls(channels, probed)
+
+    @property
+    def channels(self):
+        return list(self._layers)
+
+    def dependencies(self):
+        """Return paths whose change would change what was resolved
+
+        That is, the .meta folder of each level searched, the isRoot
+        key of each channel and every channel and key read so far.
+
+        """
+
+        ext = process.channel_to_file[constant.Kvs]
+        return (self._probed + list(self._layers) +
+                sorted(os.path.join(channel, key + ext)
+                       for channel, key in self._cache))
+
+    def _key(self, channel, key):
+        """Return content of `key` within `channel`, or KeyError"""
+        cached = self._cache.get((channel, key), self._cache)
+        if cached is not self._cache:
+            if cached is KeyError:
+                raise KeyError(key)
+            return cached
+
+        ext = process.channel_to_file[constant.Kvs]
+        with domain.readlock(channel):
+            value = _read(os.path.join(channel, key + ext), KeyError)
+
+        self._cache[(channel, key)] = value
+        if value is KeyError:
+            raise KeyError(key)
+
+        return value
+
+    def _values(self, key):
+        for channel in self._layers:
+            try:
+                yield self._key(channel, key)
+            except KeyError:
+                continue
+
+    def __getitem__(self, key):
+        values = self._values(key)
+
+        try:
+            first = next(values)
+        except StopIteration:
+            raise KeyError(key)
+
+        if not isinstance(first, collections.Mapping):
+            return first
+
+        # Stack dictionaries of subsequent channels,
+        # up to the first overriding non-dictionary.
+        return _stack(_chain(first, values))
+
+    def __contains__(self, key):
+        return any(True for _ in self._values(key))
+
+    def __iter__(self):
+        seen = set()
+        for channel in self._layers:
+            try:
+                basenames = sorted(domain.listdir(channel))
+            except OSError:
+                continue
+
+            for basename in basenames:
+                if basename.startswith(".") or basename in constant.HiddenKeys:
+                    continue
+
+                name, ext = os.path.splitext(basename)
+                if ext != process.channel_to_file[constant.Kvs]:
+                    continue
+
+                if name in seen:
+                    continue
+
+                seen.add(name)
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def _chain(first, rest):
+    yield first
+    for value in rest:
+        yield value
+
+
+def _read(path, default=None):
+    """Return processed content of key at `path`, or `default`"""
+    try:
+        return process.processfile(path, os.path.splitext(path)[1])
+    except (IOError, OSError):
+        return default
+    except ValueError:
+        log.error("Key empty: %s" % path)
+        return {}
@@ -0,0 +1,419 @@
+"""Partial reads of JSON keys by pointer
+
+# Overview
+    Keys of tens of megabytes are read and parsed as a whole, even when
+    only a single value is of interest. Instead, Key.get() reads only
+    the value at a JSON pointer, as per RFC 6901.
+
+    E.g.
+    >>> key = om.Key('/projects/hulk/.meta/breakdown.kvs/assets.json')
+    >>> key.get('/characters/0/name')
+    u'hulk'
+
+    The first pointer into a key parses it as a whole and stores the
+    byte offsets of its values in an index. Later pointers look up the
+    deepest indexed value along their path and parse only that.
+
+    Members of objects are indexed down to MaxDepth levels, whereas
+    items of arrays are indexed by offset alone and parsed as a whole,
+    such that an index remains small relative to its key.
+
+# Layout
+    Indexes live in a hidden folder of their .meta folder, such that
+    writing them leaves the mtime of their channel untouched. The
+    hidden folder is created along with its .meta folder, such that
+    indexing leaves the mtime of the .meta folder untouched too, see
+    domain.makedirs(). Keys of .meta folders lacking one are indexed
+    in memory only.
+
+    \folder\.meta\.pointer\breakdown.kvs\assets.json.idx
+
+    Each index is a header, listing the members of each indexed object
+    and the whereabouts of the items of each indexed array, followed
+    by the offsets of the items of every array. Items are looked up by
+    seeking, such that only the header is parsed.
+
+    Indexes are kept per signature of their key, see Backend.signature(),
+    such that a changed key is indexed anew. Keys
+    changed within Resolution seconds of being indexed are not indexed,
+    as further changes within the same tick would go unnoticed. Values
+    not parsing as per their index are read from the key as a whole.
+
+    Indexes are stored, and values read, via the backend of their key.
+    Keys of backends other than the file-system are thus held in memory
+    as a whole, but still parsed only in part.
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import json
+import time
+import struct
+import logging
+import threading
+
+from openmetadata import constant
+
+log = logging.getLogger('openmetadata.pointer')
+
+# Levels of nested objects indexed, deeper values
+# are parsed from within their indexed ancestor.
+MaxDepth = 3
+
+Directory = constant.Pointer
+Extension = '.idx'
+
+# Keys changed within this many seconds are not indexed
+Resolution = 1.0
+
+# Length of header, and offsets of an item of an array
+Header = struct.Struct('<I')
+Span = struct.Struct('<QQ')
+
+# {path of key: (signature, Index)}
+_indexes = {}
+_lock = threading.Lock()
+
+
+def indexpath(path):
+    """Return path of index of key `path`"""
+    channel, key = os.path.split(path)
+    metapath, channel = os.path.split(channel)
+    return os.path.join(metapath, Directory, channel, key + Extension)
+
+
+def parse(pointer):
+    """Return tokens of `pointer`, E.g. '/a/0' --> ['a', '0']"""
+    if not pointer:
+        return []
+
+    if not pointer.startswith("/"):
+        raise ValueError("Invalid pointer: %r" % pointer)
+
+    if isinstance(pointer, str):
+        # Names are unicode once parsed
+        pointer = pointer.decode('utf-8')
+
+    return [token.replace("~1", "/").replace("~0", "~")
+            for token in pointer.split("/")[1:]]
+
+
+def _escape(token):
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def _item(token, count):
+    """Return `token` as index of an array of `count` items, or KeyError"""
+    if not token.isdigit() or (token.startswith("0") and token != "0"):
+        raise KeyError(token)
+
+    index = int(token)
+    if index >= count:
+        raise KeyError(token)
+
+    return index
+
+
+def resolve(data, tokens):
+    """Return value of `tokens` within `data`, raises KeyError"""
+    for token in tokens:
+        if isinstance(data, dict):
+            data = data[token]
+
+        elif isinstance(data, list):
+            data = data[_item(token, len(data))]
+
+        else:
+            raise KeyError(token)
+
+    return data
+
+
+def build(raw, depth=MaxDepth):
+    """Return offsets of the values of JSON `raw`
+
+    Raises ValueError if `raw` is not JSON.
+
+    Returns
+        tuple   : (span, containers, spans), where `span` is the
+                  (start, end) of the value of `raw`, `containers`
+                  the members of each indexed object, {pointer: {name:
+                  span}}, and where the items of each indexed array
+                  are among `spans`, {pointer: (offset, count)}, and
+                  `spans` the flattened spans of every item.
+
+    """
+
+    from json.decoder import JSONDecoder, WHITESPACE, scanstring
+
+    decoder = JSONDecoder()
+    skip = WHITESPACE.match
+
+    containers = {}
+    spans = []
+
+    def _scan(position, level, pointer):
+        """Index value at `position`, returning its span"""
+        position = skip(raw, position).end()
+        start = position
+        char = raw[position:position + 1]
+
+        if level < depth and char == "{":
+            members = {}
+            position = skip(raw, position + 1).end()
+            if raw[position:position + 1] == "}":
+                position += 1
+            else:
+                while True:
+                    if raw[position:position + 1] != '"':
+                        raise ValueError("Expected name at %i" % position)
+
+                    name, position = scanstring(raw, position + 1)
+                    position = skip(raw, position).end()
+                    if raw[position:position + 1] != ":":
+                        raise ValueError("Expected ':' at %i" % position)
+
+                    span = _scan(position + 1, level + 1,
+                                 pointer + "/" + _escape(name))
+                    members[name] = span
+                    position = skip(raw, span[1]).end()
+
+                    char = raw[position:position + 1]
+                    position += 1
+                    if char == "}":
+                        break
+                    if char != ",":
+                        raise ValueError("Expected ',' at %i" % position)
+                    position = skip(raw, position).end()
+
+            containers[pointer] = members
+
+        elif level < depth and char == "[":
+            offset = len(spans) // 2
+            position = skip(raw, position + 1).end()
+            if raw[position:position + 1] == "]":
+                position += 1
+            else:
+                while True:
+                    item = skip(raw, position).end()
+                    _, position = decoder.raw_decode(raw, item)
+                    spans.extend((item, position))
+
+                    position = skip(raw, position).end()
+                    char = raw[position:position + 1]
+                    position += 1
+                    if char == "]":
+                        break
+                    if char != ",":
+                        raise ValueError("Expected ',' at %i" % position)
+
+            containers[pointer] = (offset, len(spans) // 2 - offset)
+
+        else:
+            _, position = decoder.raw_decode(raw, position)
+
+        return start, position
+
+    span = _scan(0, 0, "")
+
+    if raw[skip(raw, span[1]).end():]:
+        raise ValueError("Extra data at %i" % span[1])
+
+    return span, containers, spans
+
+
+class Index(object):
+    """Offsets of the values of a key, see build()
+
+    Parameters
+        span        (tuple)     : Offsets of the value of the key
+        containers  (dict)      : Indexed objects and arrays, see build()
+        item        (callable)  : Return span of item `index` of `spans`
+
+    """
+
+    def __init__(self, span, containers, item):
+        self.span = tuple(span)
+        self.containers = containers
+        self._item = item
+
+    def locate(self, tokens):
+        """Return span of deepest indexed value along `tokens`
+
+        Returns
+            tuple   : (span, tokens remaining within its value)
+
+        Raises KeyError if there is no such value.
+
+        """
+
+        pointer = ""
+        span = self.span
+
+        for level, token in enumerate(tokens):
+            container = self.containers.get(pointer)
+            if container is None:
+                return span, tokens[level:]
+
+            if isinstance(container, dict):
+                span = container.get(token)
+                if span is None:
+                    raise KeyError(token)
+            else:
+                offset, count = container
+                span = self._item(offset + _item(token, count))
+
+            pointer += "/" + _escape(token)
+
+        return tuple(span), []
+
+
+def _state(store, path):
+    """Return (signature, time of last change) of key `path`"""
+    return store.signature(path), store.stat(path).mtime
+
+
+def _load(store, path, signature):
+    """Return Index of key `path` from disk, or None if missing or stale"""
+    index = indexpath(path)
+
+    try:
+        with store.open(index) as f:
+            size, = Header.unpack(f.read(Header.size))
+            header = f.read(size)
+
+        stored = json.loads(header)
+    except (IOError, OSError, ValueError, struct.error):
+        return None
+
+    if stored.get('signature') != list(signature):
+        return None
+
+    base = Header.size + size
+
+    def item(index_):
+        with store.open(index) as f:
+            f.seek(base + index_ * Span.size)
+            return Span.unpack(f.read(Span.size))
+
+    containers = dict((pointer, container if isinstance(container, dict)
+                       else tuple(container))
+                      for pointer, container
+                      in stored['containers'].iteritems())
+
+    return Index(stored['span'], containers, item)
+
+
+def _save(store, path, signature, span, containers, spans):
+    header = json.dumps({'signature': list(signature),
+                         'span': span,
+                         'containers': containers})
+
+    raw = "".join((Header.pack(len(header)), header,
+                   struct.pack('<%iQ' % len(spans), *spans)))
+
+    index = indexpath(path)
+    directory = os.path.dirname(os.path.dirname(index))
+
+    try:
+        if not store.isdir(directory):
+            # Creating it would change the mtime of its .meta folder
+            return
+
+        store.makedirs(os.path.dirname(index))
+        with store.atomic(index) as f:
+            f.write(raw)
+    except (IOError, OSError) as e:
+        # E.g. read-only location
+        log.debug("Could not store index of %s: %s" % (path, e))
+
+
+def discard(path):
+    """Forget index of key `path`, or of each key of channel `path`"""
+    from openmetadata import backend
+
+    with _lock:
+        for indexed in list(_indexes):
+            if indexed == path or indexed.startswith(path + os.sep):
+                del _indexes[indexed]
+
+    dirname, basename = os.path.split(path)
+    if os.path.basename(dirname) == constant.Meta:
+        index = os.path.join(dirname, Directory, basename)
+    elif os.path.basename(os.path.dirname(dirname)) == constant.Meta:
+        index = indexpath(path)
+    else:
+        # Folders take their indexes along
+        return
+
+    store = backend.get(index)
+    try:
+        if store.exists(index):
+            store.delete(index)
+    except (IOError, OSError) as e:
+        log.debug("Could not remove index of %s: %s" % (path, e))
+
+
+def _fragment(store, path, span, raw=None):
+    start, end = span
+    if raw is not None:
+        return raw[start:end]
+
+    with store.open(path) as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+def read(path, pointer):
+    """Return value at `pointer` within JSON key `path`
+
+    Raises KeyError if there is no such value, ValueError if `path`
+    is not JSON, and IOError or OSError if `path` can't be read.
+
+    """
+
+    from openmetadata import backend
+
+    tokens = parse(pointer)
+
+    store = backend.get(path)
+    signature, changed = _state(store, path)
+
+    with _lock:
+        cached = _indexes.get(path)
+
+    raw = None
+    if cached is not None and cached[0] == signature:
+        index = cached[1]
+    else:
+        index = _load(store, path, signature)
+        settled = True
+
+        if index is None:
+            raw = store.read(path)
+            span, containers, spans = build(raw)
+            index = Index(span, containers,
+                          lambda item: spans[item * 2:item * 2 + 2])
+
+            # Changes may yet follow within the same tick
+            settled = time.time() - changed > Resolution
+            if settled:
+                _save(store, path, signature, span, containers, spans)
+
+        if settled:
+            with _lock:
+                _indexes[path] = (signature, index)
+
+    span, rest = index.locate(tokens)
+
+    try:
+        value = json.loads(_fragment(store, path, span, raw))
+    except ValueError as e:
+        # Index no longer matching its key
+        log.warning("Reading %s as a whole: %s" % (path, e))
+        discard(path)
+        return resolve(json.loads(store.read(path)), tokens)
+
+    return resolve(value, rest)
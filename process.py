@@ -43,8 +43,13 @@
 """
 
 from abc import ABCMeta, abstractmethod
-import logging
+import os
+import sys
 import json
+import mmap
+import array
+import struct
+import logging
 # from numbers import Number  # Used to map dt to key ext.
 # import ConfigParser
 
@@ -60,13 +65,71 @@ def processoutgoing(raw, format):
     return process.outgoing(raw)
 
 
-def processincoming(raw, format):
-    """Process incoming data"""
+def processincoming(raw, format, signature=None):
+    """Process incoming data
+
+    Parameters
+        raw         (str)   : Contents as read from disk
+        format      (str)   : Extension of contents, E.g. ".json"
+        signature   (tuple) : (optional) cache.signature() of the file
+                              `raw` was read from. Files of the same
+                              signature are only ever processed once.
+
+    """
+
+    process = mapping.get(format)
+    if not process:
+        return None
+
+    if signature is None:
+        return process.incoming(raw)
+
+    from openmetadata import cache
+
+    processed = cache.get(signature, cache)
+    if processed is cache:
+        processed = process.incoming(raw)
+        cache.put(signature, processed)
+
+    return processed
+
+
+def processfile(path, format, signature=None):
+    """Read and process file at `path`
+
+    Unchanged files are only ever processed once
+    per process, see cache.py. `path` is read via
+    its backend, see backend.py
+
+    Parameters
+        path        (str)   : Absolute path to file
+        format      (str)   : Extension of file, E.g. ".json"
+        signature   (tuple) : (optional) Backend.signature() of `path`,
+                              if already known
+
+    Raises IOError or OSError if `path` can't be read.
+
+    """
+
     process = mapping.get(format)
     if not process:
         return None
 
-    return process.incoming(raw)
+    from openmetadata import cache
+    from openmetadata import backend
+
+    store = backend.get(path)
+
+    if signature is None:
+        signature = store.signature(path)
+
+    processed = cache.get(signature, cache)
+    if processed is cache:
+        raw = store.read(path)
+        processed = process.incoming(raw)
+        cache.put(signature, processed)
+
+    return processed
 
 
 def cast(raw, format):
@@ -78,11 +141,46 @@ def cast(raw, format):
     return process.cast(raw)
 
 
+def isbinary(format):
+    """Is `format` read and written directly from and to disk?"""
+    process = mapping.get(format)
+    return process is not None and process.binary
+
+
+def load(path, format):
+    """Read `path` of binary `format`, via its backend"""
+    return mapping[format].load(path)
+
+
+def dump(path, raw, format):
+    """Write `raw` to `path` of binary `format`, via its backend
+
+    Returns
+        str : SHA-1 hexdigest of the bytes written, see journal.record()
+
+    """
+
+    return mapping[format].dump(path, raw)
+
+
+def _fileno(f):
+    """Return file descriptor of file-object `f`, or None if not on disk"""
+    try:
+        return f.fileno()
+    except (AttributeError, IOError, ValueError):
+        # E.g. contents of backend.Memory
+        return None
+
+
 class AbstractFormat(object):
     """Required interface to each format"""
 
     __metaclass__ = ABCMeta
 
+    # Binary formats are read and written via load() and
+    # dump() rather than as plain-text, see AbstractBinaryFormat
+    binary = False
+
     @abstractmethod
     def outgoing(cls, raw):
         """Process --> Written
@@ -145,7 +243,398 @@ class DotJson(AbstractFormat):
 
     @classmethod
     def cast(self, raw):
-        return 
+        """Return `raw` as it would be read back once written
+
+        E.g. tuples become lists and keys of dicts become strings.
+
+        """
+
+        return json.loads(json.dumps(raw))
+
+
+class AbstractBinaryFormat(AbstractFormat):
+    """Formats read and written directly from and to disk
+
+    As opposed to plain-text formats, the contents of binary
+    formats are never read as a whole into a string.
+
+    """
+
+    binary = True
+
+    @abstractmethod
+    def load(cls, path):
+        """Return contents of `path`"""
+        pass
+
+    @abstractmethod
+    def dump(cls, path, raw):
+        """Write `raw` to `path`, return SHA-1 hexdigest of bytes written"""
+        pass
+
+
+class ArrayView(object):
+    """Read-only view of a numeric array on disk
+
+    The file is memory-mapped and elements are only decoded once
+    accessed. Slicing returns another view of the same mapping.
+
+    E.g.
+    >>> view = ArrayView(path)
+    >>> view[1000:1010].tolist()
+    [1.0, 1.1, 1.2, 1.3, 1.4, 1.5, 1.6, 1.7, 1.8, 1.9]
+
+    """
+
+    def __init__(self, mapped, typecode, start, stop, swapped=False):
+        self._mmap = mapped
+        self.typecode = typecode
+        self.itemsize = array.array(typecode).itemsize
+        self._start = start
+        self._stop = stop
+        self._swapped = swapped
+
+    def __repr__(self):
+        return "%s.ArrayView(%r, %i)" % (__name__, self.typecode, len(self))
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __iter__(self):
+        chunk = max(1, DotArr.ChunkSize // self.itemsize)
+        for start in xrange(0, len(self), chunk):
+            for value in self[start:start + chunk].toarray():
+                yield value
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                stop = max(start, stop)
+                return ArrayView(self._mmap, self.typecode,
+                                 self._start + start,
+                                 self._start + stop,
+                                 self._swapped)
+
+            return self.toarray(start, stop)[::step]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("array index out of range")
+
+        return self.toarray(index, index + 1)[0]
+
+    def __eq__(self, other):
+        try:
+            return self.tolist() == list(other)
+        except TypeError:
+            return False
+
+    def __ne__(self, other):
+        return not self == other
+
+    def _offset(self, index):
+        return DotArr.Header.size + (self._start + index) * self.itemsize
+
+    def toarray(self, start=0, stop=None):
+        """Return copy of elements `start` to `stop` as array.array"""
+        stop = len(self) if stop is None else stop
+        result = array.array(self.typecode,
+                             self._mmap[self._offset(start):self._offset(stop)])
+        if self._swapped:
+            result.byteswap()
+        return result
+
+    def tolist(self):
+        return self.toarray().tolist()
+
+    def memoryview(self):
+        """Return zero-copy view of the underlying bytes
+
+        Python 2 can't make a memoryview of an mmap; a
+        read-only buffer of the same memory is returned instead.
+
+        """
+
+        start, stop = self._offset(0), self._offset(len(self))
+
+        if sys.version_info[0] < 3:
+            return buffer(self._mmap, start, stop - start)
+
+        return memoryview(self._mmap)[start:stop].cast(self.typecode)
+
+    def numpy(self):
+        """Return zero-copy NumPy view, requires NumPy"""
+        import numpy
+
+        dtype = numpy.dtype(self.typecode)
+        if self._swapped:
+            dtype = dtype.newbyteorder()
+
+        return numpy.frombuffer(self._mmap, dtype=dtype,
+                                count=len(self), offset=self._offset(0))
+
+    def close(self):
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+
+
+class DotArr(AbstractBinaryFormat):
+    """Numeric arrays
+
+    Layout
+        [header][elements]
+
+    Where the header is 16 bytes
+
+        magic       (4s)    : "OMAR"
+        version     (B)     : 1
+        typecode    (c)     : Typecode of array.array, E.g. "d"
+        byteorder   (c)     : "<" or ">"
+        padding     (x)
+        count       (Q)     : Number of elements
+
+    And elements are written via array.tofile()
+
+    """
+
+    Magic = 'OMAR'
+    Version = 1
+    Header = struct.Struct('<4sBccxQ')
+    ChunkSize = 1 << 16
+
+    @classmethod
+    def _toarray(cls, raw):
+        if isinstance(raw, array.array):
+            return raw
+
+        if isinstance(raw, ArrayView):
+            return raw.toarray()
+
+        # NumPy arrays
+        dtype = getattr(raw, 'dtype', None)
+        if dtype is not None:
+            return array.array(dtype.char, raw.tostring())
+
+        return array.array('d', raw or [])
+
+    @classmethod
+    def _header(cls, data):
+        byteorder = '<' if sys.byteorder == 'little' else '>'
+        return cls.Header.pack(cls.Magic, cls.Version,
+                               data.typecode, byteorder, len(data))
+
+    @classmethod
+    def _parse(cls, header):
+        magic, version, typecode, byteorder, count = cls.Header.unpack(header)
+        if magic != cls.Magic or version != cls.Version:
+            raise ValueError("Not an array")
+
+        swapped = byteorder != ('<' if sys.byteorder == 'little' else '>')
+        return typecode, count, swapped
+
+    @classmethod
+    def outgoing(cls, raw):
+        data = cls._toarray(raw)
+        return cls._header(data) + data.tostring()
+
+    @classmethod
+    def incoming(cls, raw):
+        typecode, count, swapped = cls._parse(raw[:cls.Header.size])
+        data = array.array(typecode, raw[cls.Header.size:])
+        if swapped:
+            data.byteswap()
+        return data
+
+    @classmethod
+    def cast(cls, raw):
+        return cls._toarray(raw)
+
+    @classmethod
+    def load(cls, path):
+        """Return ArrayView of `path`
+
+        Files not on disk are viewed from memory rather than mapped.
+
+        """
+
+        from openmetadata import backend
+
+        with backend.get(path).open(path) as f:
+            header = f.read(cls.Header.size)
+            typecode, count, swapped = cls._parse(header)
+
+            if not count:
+                return ArrayView('', typecode, 0, 0)
+
+            fileno = _fileno(f)
+            if fileno is None:
+                f.seek(0)
+                return ArrayView(f.read(), typecode, 0, count, swapped)
+
+            mapped = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+
+        return ArrayView(mapped, typecode, 0, count, swapped)
+
+    @classmethod
+    def dump(cls, path, raw):
+        import hashlib
+        from openmetadata import backend
+
+        data = cls._toarray(raw)
+        header = cls._header(data)
+
+        # Arrays hash as their bytes, without a copy
+        digest = hashlib.sha1(header)
+        digest.update(data)
+
+        with backend.get(path).atomic(path) as f:
+            f.write(header)
+
+            if _fileno(f) is not None:
+                data.tofile(f)
+            else:
+                chunk = max(1, cls.ChunkSize // data.itemsize)
+                for start in xrange(0, len(data), chunk):
+                    f.write(data[start:start + chunk].tostring())
+
+        return digest.hexdigest()
+
+
+class Blob(object):
+    """Lazy handle to binary contents on disk
+
+    Nothing is read until asked for, either as a whole,
+    in chunks or via a memory-map.
+
+    E.g.
+    >>> blob = Blob(path)
+    >>> for chunk in blob:
+    ...     stream.write(chunk)
+    >>> header = blob.mmap()[:8]
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def __repr__(self):
+        return "%s.Blob(%r)" % (__name__, self.path)
+
+    def __eq__(self, other):
+        return isinstance(other, Blob) and other.path == self.path
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return self.iterchunks()
+
+    @property
+    def size(self):
+        from openmetadata import backend
+        return backend.get(self.path).stat(self.path).size
+
+    def open(self):
+        """Return file-object of contents, the caller closes it"""
+        from openmetadata import backend
+        return backend.get(self.path).open(self.path)
+
+    def read(self):
+        """Return contents as a whole"""
+        with self.open() as f:
+            return f.read()
+
+    def iterchunks(self, size=None):
+        """Yield contents in chunks of `size` bytes"""
+        size = size or DotBinary.ChunkSize
+        with self.open() as f:
+            while True:
+                chunk = f.read(size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def mmap(self):
+        """Return read-only memory-map of contents, the caller closes it
+
+        Contents not on disk are returned as a string instead.
+
+        """
+
+        with self.open() as f:
+            fileno = _fileno(f)
+            if fileno is None:
+                return f.read()
+
+            if not os.fstat(fileno).st_size:
+                # Empty files can't be mapped
+                return ''
+            return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+
+
+class DotBinary(AbstractBinaryFormat):
+    """Opaque binary contents, such as images and video
+
+    Reading returns a Blob. Writing accepts a string, a file-like
+    object, a Blob or an iterator of strings; the latter three are
+    copied in chunks and never held in memory as a whole.
+
+    """
+
+    ChunkSize = 1 << 20
+
+    @classmethod
+    def _chunks(cls, raw):
+        if raw is None:
+            return
+
+        if isinstance(raw, basestring):
+            yield raw
+            return
+
+        if isinstance(raw, Blob):
+            raw = raw.iterchunks(cls.ChunkSize)
+
+        elif hasattr(raw, 'read'):
+            stream = raw
+            raw = iter(lambda: stream.read(cls.ChunkSize), '')
+
+        for chunk in raw:
+            yield chunk
+
+    @classmethod
+    def outgoing(cls, raw):
+        return ''.join(cls._chunks(raw))
+
+    @classmethod
+    def incoming(cls, raw):
+        return raw
+
+    @classmethod
+    def cast(cls, raw):
+        return str(raw)
+
+    @classmethod
+    def load(cls, path):
+        return Blob(path)
+
+    @classmethod
+    def dump(cls, path, raw):
+        import hashlib
+        from openmetadata import backend
+
+        digest = hashlib.sha1()
+        with backend.get(path).atomic(path) as f:
+            for chunk in cls._chunks(raw):
+                f.write(chunk)
+                digest.update(chunk)
+
+        return digest.hexdigest()
 
 
 # class DotIni(AbstractFormat):
@@ -207,13 +696,26 @@ channel_to_file =   {
                         '.kvs': '.json',
                         '.txt': '.txt',
                         '.mdw': '.txt',
+                        '.arr': '.arr',
+                        '.img': '.bin',
+                        '.vid': '.bin',
                     }
 
 
 mapping =   {
                 '.txt': DotTxt,
                 '.mdw': DotMdw,
-                '.json': DotJson
+                '.json': DotJson,
+                '.arr': DotArr,
+                '.bin': DotBinary,
+                '.png': DotBinary,
+                '.jpg': DotBinary,
+                '.jpeg': DotBinary,
+                '.tif': DotBinary,
+                '.tiff': DotBinary,
+                '.exr': DotBinary,
+                '.mov': DotBinary,
+                '.mp4': DotBinary,
                 # '.ini': DotIni,
                 # '.gdoc': DotGdoc
             }
@@ -0,0 +1,297 @@
+"""Content-addressed revision history
+
+# Overview
+    Revisions are stored within the .meta folder of the Folder
+    owning an item, under a hidden .rev folder.
+
+    \folder\.meta\.rev\objects\3f\786850e387550fdab836ed7e6dc881de23001b
+    \folder\.meta\.rev\chan.kvs\20131115103402.000000.json
+
+    Objects are the raw contents of each Key, named by their SHA-1.
+    Identical Keys across revisions are thus only ever stored once.
+
+    Each revision is a manifest, mapping the basename of each Key to
+    its object. Reading a past state of a channel costs one manifest
+    read plus one read per requested Key.
+
+    Only the Keys of a channel are stored; folders nested within a
+    channel are left out of its revisions.
+
+    Objects and manifests are stored via the backend of their item.
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import json
+import time
+import hashlib
+import logging
+
+from openmetadata import backend
+from openmetadata import constant
+from openmetadata import process
+
+log = logging.getLogger('openmetadata.revision')
+
+Rev = '.rev'
+Objects = 'objects'
+TimeFormat = "%Y%m%d%H%M%S"
+
+
+def root(obj):
+    """Return revision-root of `obj`"""
+    return os.path.join(obj.folder.internalpath, Rev)
+
+
+def relativepath(obj):
+    """Return path of `obj` relative its metadata folder"""
+    return os.path.relpath(obj.path, obj.folder.internalpath)
+
+
+def parse(basename):
+    """Return (stamp, count) of revision `basename`, or None
+
+    Revisions order by these alone, without reading their manifest.
+
+    E.g.
+    >>> parse('20131115103402.000000.1.json')
+    ('20131115103402.000000', 1)
+
+    """
+
+    name, ext = os.path.splitext(basename)
+    parts = name.split(".")
+    if ext != '.json' or len(parts) not in (2, 3):
+        return None
+
+    try:
+        time.strptime(parts[0], TimeFormat)
+        count = int(parts[2]) if len(parts) == 3 else 0
+        int(parts[1])
+    except ValueError:
+        return None
+
+    return "%s.%s" % (parts[0], parts[1]), count
+
+
+def objectpath(rev, digest):
+    return os.path.join(rev, Objects, digest[:2], digest[2:])
+
+
+def putobject(rev, raw):
+    """Store `raw` and return its digest, unless already stored"""
+    digest = hashlib.sha1(raw).hexdigest()
+    path = objectpath(rev, digest)
+
+    store = backend.get(path)
+    if not store.exists(path):
+        store.makedirs(os.path.dirname(path))
+        store.write(path, raw)
+
+    return digest
+
+
+def getobject(rev, digest):
+    path = objectpath(rev, digest)
+    return backend.get(path).read(path)
+
+
+def _keys(obj):
+    """Return physical keys of `obj` as {basename: path}"""
+    from openmetadata import domain
+
+    if isinstance(obj, domain.Key):
+        return {obj.basename: obj.path}
+
+    keys = {}
+    path = obj.path
+    store = backend.get(path)
+    for basename in store.listdir(path):
+        if basename.startswith(".") or basename in constant.HiddenKeys:
+            continue
+
+        fullpath = os.path.join(path, basename)
+        if not store.isdir(fullpath):
+            keys[basename] = fullpath
+        else:
+            log.warning("store(): Leaving out nested %s" % fullpath)
+
+    return keys
+
+
+def store(obj):
+    """Store current on-disk state of Channel or Key `obj`
+
+    Folders nested within a channel are not stored.
+
+    Returns
+        Revision of stored state or None if `obj` does not exist
+
+    """
+
+    if not obj.exists:
+        log.warning("store(): %r did not exist" % obj)
+        return None
+
+    rev = root(obj)
+    relpath = relativepath(obj)
+
+    keys = {}
+    for basename, path in _keys(obj).iteritems():
+        keys[basename] = putobject(rev, backend.get(path).read(path))
+
+    stored_time = time.time()
+    manifest = {'path': relpath.replace(os.sep, '/'),
+                'time': stored_time,
+                'keys': keys}
+
+    stamp = "%s.%06i" % (time.strftime(TimeFormat, time.gmtime(stored_time)),
+                         int(stored_time % 1 * 1000000))
+
+    dirname = os.path.join(rev, relpath)
+    manifest_path = os.path.join(dirname, stamp + '.json')
+
+    manifests = backend.get(dirname)
+
+    # Revisions are unique per-microsecond, unless stored
+    # concurrently by two processes.
+    count = 0
+    while manifests.exists(manifest_path):
+        count += 1
+        manifest_path = os.path.join(dirname, "%s.%i.json" % (stamp, count))
+
+    manifests.makedirs(dirname)
+    manifests.write(manifest_path, json.dumps(manifest, indent=4))
+    log.info("store(): Stored %s as %s" % (obj.path, manifest_path))
+
+    return Revision(manifest_path, rev)
+
+
+def revisions(obj):
+    """Return revisions of `obj`, newest first"""
+    rev = root(obj)
+    dirname = os.path.join(rev, relativepath(obj))
+
+    store = backend.get(dirname)
+    if not store.isdir(dirname):
+        return []
+
+    parsed = []
+    for basename in store.listdir(dirname):
+        order = parse(basename)
+        if order is not None:
+            parsed.append((order, basename))
+
+    # By time of storing, then by order of revisions
+    # stored within the same microsecond, see store()
+    parsed.sort(reverse=True)
+    return [Revision(os.path.join(dirname, basename), rev)
+            for _, basename in parsed]
+
+
+class Revision(object):
+    """Stored state of a Channel or Key
+
+    Parameters
+        path    (str)   : Absolute path to manifest
+        rev     (str)   : Absolute path to revision-root
+
+    """
+
+    def __init__(self, path, rev):
+        self.path = path
+        self.rev = rev
+        self._manifest = None
+
+    def __repr__(self):
+        return "%s.Revision(%r)" % (__name__, self.basename)
+
+    @property
+    def basename(self):
+        return os.path.basename(self.path)
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            raw = backend.get(self.path).read(self.path)
+            self._manifest = json.loads(raw)
+        return self._manifest
+
+    @property
+    def time(self):
+        return self.manifest['time']
+
+    @property
+    def count(self):
+        """Return order within revisions of the same time, see store()"""
+        parsed = parse(self.basename)
+        return parsed[1] if parsed else 0
+
+    @property
+    def keys(self):
+        """Return basenames of stored keys"""
+        return sorted(self.manifest['keys'])
+
+    def raw(self, basename):
+        """Return stored contents of key `basename`"""
+        return getobject(self.rev, self.manifest['keys'][basename])
+
+    def read(self, key=None):
+        """Return stored data as {name: data}, as per Channel.data
+
+        Parameters
+            key     (str)   : (optional) Only read key of this name
+
+        """
+
+        data = {}
+        for basename in self.manifest['keys']:
+            name, ext = os.path.splitext(basename)
+            if key is not None and key not in (name, basename):
+                continue
+
+            try:
+                data[name] = process.processincoming(self.raw(basename), ext)
+            except ValueError:
+                log.error("Key empty: %s in %s" % (basename, self.path))
+                data[name] = {}
+
+        return data
+
+    def restore(self, obj):
+        """Replace physical contents of Channel or Key `obj` with `self`
+
+        Each key written is journaled, see journal.record(). `obj`
+        is locked throughout, as per Channel.write() and update().
+
+        """
+
+        from openmetadata import domain, journal, lock
+
+        store = backend.get(obj.path)
+
+        if isinstance(obj, domain.Key):
+            raw = self.raw(obj.basename)
+            domain.makedirs(os.path.dirname(obj.path))
+            with lock.shared(os.path.dirname(obj.path)):
+                with lock.exclusive(obj.path):
+                    store.write(obj.path, raw)
+                    journal.record('write', obj.path, raw)
+            return
+
+        # Read ahead of clearing, such that a missing
+        # object leaves `obj` untouched.
+        keys = dict((basename, self.raw(basename))
+                    for basename in self.manifest['keys'])
+
+        with lock.exclusive(obj.path):
+            if obj.exists:
+                obj.clear()
+
+            domain.makedirs(obj.path)
+            for basename, raw in keys.iteritems():
+                path = os.path.join(obj.path, basename)
+                store.write(path, raw)
+                journal.record('write', path, raw)
@@ -0,0 +1,361 @@
+"""Typed decoding of channels, as per a schema per channel
+
+# Overview
+    Rather than each tool validating and converting content by hand
+    once read, a channel may carry a schema of its keys. Keys are then
+    decoded whilst being read, and content not matching the schema
+    raises exception.SchemaError at read time.
+
+    E.g.
+    >>> schema.define('/projects/hulk/.meta/properties.kvs', {
+    ...     'properties': {
+    ...         'fps': {'type': 'number'},
+    ...         'status': {'enum': ['waiting', 'final']},
+    ...         'camera': {'type': 'object',
+    ...                    'properties': {'lens': {'type': 'integer'}},
+    ...                    'required': ['lens']}}})
+    >>> om.read('/projects/hulk', 'properties', 'fps')
+    24.0
+
+    A schema is stored as hidden key __schema__.json of its channel,
+    and is kept by Channel.write(). Channels without a schema are read
+    as usual, at no cost.
+
+# Schemas
+    Schemas are a subset of JSON Schema; the schema of a channel
+    describes its content, {key: content}, as an object.
+
+        type                    : 'integer', 'number', 'string',
+                                  'boolean', 'null', 'array' or 'object',
+                                  or a list of any of these
+        enum                    : Allowed values
+        items                   : Schema of each item of an array
+        properties              : Schema per name of an object
+        required                : Names an object must have
+        additionalProperties    : Whether names not in `properties`
+                                  are allowed, defaults to True
+        default                 : Content of a missing property
+
+    Integers are decoded as integers, and integral floats are decoded
+    as integers too. Numbers are decoded as floats. Defaults apply to
+    content of keys; missing keys raise SchemaError rather than being
+    defaulted.
+
+    Each schema is compiled once into nested decoding functions,
+    shared by every channel of the same schema.
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import copy
+import logging
+import hashlib
+import threading
+
+from openmetadata import backend
+from openmetadata import constant
+
+log = logging.getLogger('openmetadata.schema')
+
+# {sha1 of schema: Schema} and {Backend.signature(): sha1 of schema}
+_compiled = {}
+_signatures = {}
+_lock = threading.Lock()
+
+
+def schemapath(path):
+    """Return path of schema of channel `path`"""
+    return os.path.join(path, constant.Schema)
+
+
+def _integer(value, where):
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if not isinstance(value, (int, long)) or isinstance(value, bool):
+        raise TypeError("%s: Expected integer, got %r" % (where, value))
+    return value
+
+
+def _number(value, where):
+    if not isinstance(value, (int, long, float)) or isinstance(value, bool):
+        raise TypeError("%s: Expected number, got %r" % (where, value))
+    return float(value)
+
+
+def _string(value, where):
+    if not isinstance(value, basestring):
+        raise TypeError("%s: Expected string, got %r" % (where, value))
+    return value
+
+
+def _boolean(value, where):
+    if not isinstance(value, bool):
+        raise TypeError("%s: Expected boolean, got %r" % (where, value))
+    return value
+
+
+def _null(value, where):
+    if value is not None:
+        raise TypeError("%s: Expected null, got %r" % (where, value))
+    return value
+
+
+def _array(items):
+    def _decode(value, where):
+        if not isinstance(value, list):
+            raise TypeError("%s: Expected array, got %r" % (where, value))
+        if items is None:
+            return value
+        return [items(item, "%s[%i]" % (where, index))
+                for index, item in enumerate(value)]
+    return _decode
+
+
+def _object(properties, required, additional, defaults):
+    def _decode(value, where):
+        if not isinstance(value, dict):
+            raise TypeError("%s: Expected object, got %r" % (where, value))
+
+        for name in required:
+            if name not in value:
+                raise ValueError("%s: Missing %r" % (where, name))
+
+        # Defaults are copied, as decoded content is the caller's
+        decoded = copy.deepcopy(defaults) if defaults else {}
+        for name, content in value.iteritems():
+            decode = properties.get(name)
+            if decode is not None:
+                content = decode(content, "%s.%s" % (where, name))
+            elif not additional:
+                raise ValueError("%s: Unexpected %r" % (where, name))
+            decoded[name] = content
+
+        return decoded
+    return _decode
+
+
+def _enum(decode, values):
+    def _decode(value, where):
+        if value not in values:
+            raise ValueError("%s: %r not one of %r" % (where, value, values))
+        return decode(value, where) if decode else value
+    return _decode
+
+
+def _anyof(decoders):
+    def _decode(value, where):
+        errors = []
+        for decode in decoders:
+            try:
+                return decode(value, where)
+            except (TypeError, ValueError) as e:
+                errors.append(str(e))
+        raise TypeError(" or ".join(errors))
+    return _decode
+
+
+def _compile(spec):
+    """Return decoding function of `spec`, or None if any content goes
+
+    Decoding functions take (value, where) and return the decoded
+    value, raising TypeError or ValueError of content not matching.
+
+    """
+
+    if not isinstance(spec, dict):
+        raise ValueError("Invalid schema: %r" % (spec,))
+
+    types = spec.get('type')
+    if isinstance(types, basestring):
+        types = [types]
+
+    decoders = []
+    for type in types or ():
+        if type == 'integer':
+            decoders.append(_integer)
+        elif type == 'number':
+            decoders.append(_number)
+        elif type == 'string':
+            decoders.append(_string)
+        elif type == 'boolean':
+            decoders.append(_boolean)
+        elif type == 'null':
+            decoders.append(_null)
+        elif type == 'array':
+            items = spec.get('items')
+            decoders.append(_array(_compile(items) if items else None))
+        elif type == 'object':
+            decoders.append(_objectof(spec))
+        else:
+            raise ValueError("Invalid type: %r" % (type,))
+
+    if not decoders and 'properties' in spec:
+        decoders.append(_objectof(spec))
+
+    decode = None
+    if len(decoders) == 1:
+        decode = decoders[0]
+    elif decoders:
+        decode = _anyof(decoders)
+
+    if 'enum' in spec:
+        decode = _enum(decode, list(spec['enum']))
+
+    return decode
+
+
+def _objectof(spec):
+    properties = {}
+    defaults = {}
+    for name, _spec in spec.get('properties', {}).iteritems():
+        decode = _compile(_spec)
+        if decode is not None:
+            properties[name] = decode
+        if 'default' in _spec:
+            defaults[name] = _spec['default']
+
+    return _object(properties, list(spec.get('required', [])),
+                   spec.get('additionalProperties', True), defaults)
+
+
+class Schema(object):
+    """Compiled schema of a channel
+
+    Parameters
+        spec    (dict)  : Schema of content of channel, see above
+
+    """
+
+    def __init__(self, spec):
+        if not isinstance(spec, dict):
+            raise ValueError("Invalid schema: %r" % (spec,))
+
+        self.spec = spec
+        self.required = list(spec.get('required', []))
+        self.additional = spec.get('additionalProperties', True)
+
+        self._keys = {}
+        for name, _spec in spec.get('properties', {}).iteritems():
+            decode = _compile(_spec)
+            if decode is not None:
+                self._keys[name] = decode
+
+    def __repr__(self):
+        return "%s.Schema(%r)" % (__name__, sorted(self._keys))
+
+    def decode(self, name, content):
+        """Return `content` of key `name` decoded
+
+        Raises TypeError or ValueError of content not matching.
+
+        """
+
+        decode = self._keys.get(name)
+        if decode is not None:
+            return decode(content, name)
+
+        if not self.additional:
+            raise ValueError("%s: Unexpected key" % name)
+
+        return content
+
+    def missing(self, names):
+        """Return required keys not among `names`"""
+        return [name for name in self.required if name not in names]
+
+
+def _digest(spec):
+    import json
+    return hashlib.sha1(json.dumps(spec, sort_keys=True)).hexdigest()
+
+
+def _compiledof(digest, spec):
+    with _lock:
+        compiled = _compiled.get(digest)
+
+    if compiled is None:
+        compiled = Schema(spec)
+        with _lock:
+            compiled = _compiled.setdefault(digest, compiled)
+
+    return compiled
+
+
+def compile(spec):
+    """Return Schema of `spec`, compiled once per distinct schema"""
+    return _compiledof(_digest(spec), spec)
+
+
+def load(path):
+    """Return Schema of channel `path`, or None if it has none
+
+    Schema files are only read and hashed once per signature.
+
+    """
+
+    import json
+
+    path = schemapath(path)
+    store = backend.get(path)
+
+    try:
+        signature = store.signature(path)
+    except OSError:
+        return None
+
+    with _lock:
+        compiled = _compiled.get(_signatures.get(signature))
+
+    if compiled is not None:
+        return compiled
+
+    try:
+        spec = json.loads(store.read(path))
+        digest = _digest(spec)
+        compiled = _compiledof(digest, spec)
+    except (IOError, OSError, ValueError, TypeError) as e:
+        log.error("Could not load schema %s: %s" % (path, e))
+        return None
+
+    with _lock:
+        _signatures[signature] = digest
+
+    return compiled
+
+
+def raw(path):
+    """Return schema of channel `path` as stored, or None"""
+    path = schemapath(path)
+    try:
+        return backend.get(path).read(path)
+    except (IOError, OSError):
+        return None
+
+
+def restore(path, raw):
+    """Store `raw`, as returned by raw(), as schema of channel `path`"""
+    from openmetadata import domain
+    domain.makedirs(path)
+    backend.get(path).write(schemapath(path), raw)
+
+
+def define(path, spec):
+    """Store `spec` as the schema of channel `path`
+
+    Raises ValueError if `spec` is not a valid schema.
+
+    """
+
+    from openmetadata import process
+
+    compile(spec)
+    restore(path, process.processoutgoing(spec, '.json'))
+
+
+def remove(path):
+    """Remove the schema of channel `path`, if any"""
+    store = backend.get(path)
+    if store.exists(schemapath(path)):
+        store.delete(schemapath(path))
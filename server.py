@@ -0,0 +1,584 @@
+"""Serve metadata from one long-running process over a Unix socket
+
+# Overview
+    Short-lived processes, such as tasks on a render farm, each pay
+    for importing Open Metadata and for reading the same metadata
+    with a cold cache. Instead, one server per machine keeps its
+    caches warm and serves each of its clients.
+
+    E.g.
+    $ python -m openmetadata.server &
+
+    >>> client = server.client()
+    >>> client.read('/projects/hulk/shots/1000', 'properties')
+    {'camera': {'fps': 24}}
+
+    Should no server be running, server.client() returns a client
+    operating in-process instead, such that callers work regardless.
+
+    The socket lives in $XDG_RUNTIME_DIR, or otherwise in a directory
+    of the temporary directory private to the current user, see
+    address(). Clients only connect to sockets of the current user.
+
+    Parsed keys are cached by signature, see cache.py, directory
+    listings by mtime, see domain.ScanCache, and results of cascade()
+    by the state of each path they depend on, see Results. Changed
+    files and directories are always read anew; results are never stale.
+
+# Protocol
+    Each request and response is a dictionary, marshalled and prefixed
+    by its length as a 4-byte big-endian unsigned integer. Many requests
+    may be sent over one connection. Being marshalled, results are of
+    the same types as when run in-process, E.g. str rather than unicode.
+
+    Binary values, which marshal can't represent, are sent tagged and
+    flagged as such in the response, see encode(). Arrays arrive as
+    array.array rather than ArrayView, and Blobs as Blobs of the same
+    path, or as str if not on the local file-system.
+
+    --> {'op': 'read', 'args': ('/path',), 'kwargs': {'channel': 'properties'}}
+    <-- {'ok': True, 'result': {...}}
+    <-- {'ok': False, 'error': 'ValueError', 'message': '...'}
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import time
+import array
+import socket
+import struct
+import marshal
+import logging
+import threading
+import collections
+import SocketServer
+
+log = logging.getLogger('openmetadata.server')
+
+Header = struct.Struct('>I')
+
+# Operations served, and their implementation in transaction.py
+Operations = ('read', 'read_many', 'cascade', 'exists',
+              'update', 'update_many')
+
+# Errors re-raised as-is by clients, others as RuntimeError
+Errors = dict((cls.__name__, cls) for cls in (
+    ValueError, TypeError, KeyError, IOError, OSError))
+
+# Paths changed within this many seconds of a result
+# being computed leave the result uncached, see Results.
+Resolution = 1.0
+
+# Results of cascade() kept at most
+MaxResults = 1024
+
+# First item of a tagged binary value, see encode()
+Binary = '__openmetadata.binary__'
+
+
+def _uid():
+    return os.getuid() if hasattr(os, 'getuid') else None
+
+
+def address():
+    """Return default address of server, private to the current user
+
+    Unless overridden via $OPENMETADATA_SOCKET, the socket lives in
+    $XDG_RUNTIME_DIR, or otherwise in a directory of the temporary
+    directory, created by the server accessible to the user alone.
+
+    """
+
+    override = os.environ.get('OPENMETADATA_SOCKET')
+    if override:
+        return override
+
+    runtime = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime:
+        return os.path.join(runtime, 'openmetadata.sock')
+
+    import tempfile
+    dirname = 'openmetadata-%s' % (_uid() if _uid() is not None
+                                   else 'default')
+    return os.path.join(tempfile.gettempdir(), dirname, 'server.sock')
+
+
+def _private(dirname):
+    """Create directory `dirname` accessible to the current user alone
+
+    Raises IOError if it exists but belongs to another user.
+
+    """
+
+    try:
+        os.makedirs(dirname, 0700)
+    except OSError:
+        if not os.path.isdir(dirname):
+            raise
+
+    if _uid() is not None and os.stat(dirname).st_uid != _uid():
+        raise IOError("%s belongs to another user" % dirname)
+
+
+def _recvall(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise EOFError("Connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return ''.join(chunks)
+
+
+def send(sock, message):
+    """Send `message` marshalled and length-prefixed
+
+    Raises ValueError if `message` can't be marshalled.
+
+    """
+
+    raw = marshal.dumps(message)
+    sock.sendall(Header.pack(len(raw)) + raw)
+
+
+def recv(sock):
+    """Receive marshalled message, raises EOFError if closed
+
+    Raises ValueError of a message that can't be unmarshalled.
+
+    """
+
+    size, = Header.unpack(_recvall(sock, Header.size))
+    raw = _recvall(sock, size)
+
+    try:
+        return marshal.loads(raw)
+    except (EOFError, TypeError) as e:
+        # Truncated or otherwise malformed
+        raise ValueError("Malformed message: %s" % e)
+
+
+def _failure(error, message):
+    return {'ok': False, 'error': error, 'message': message}
+
+
+def encode(value):
+    """Return (value, whether any) with binary values of `value` tagged
+
+    ArrayViews are tagged with their typecode and bytes, and Blobs with
+    their path if local, otherwise with their contents. Binary
+    values are only ever values of dicts, such that lists are left as-is
+    and `value` itself is never modified.
+
+    """
+
+    from openmetadata import backend, process
+
+    if isinstance(value, process.ArrayView):
+        return (Binary, 'array', value.typecode,
+                value.toarray().tostring()), True
+
+    if isinstance(value, process.Blob):
+        if backend.get(value.path).local:
+            return (Binary, 'blob', value.path), True
+        return (Binary, 'str', value.read()), True
+
+    if isinstance(value, dict):
+        # Copied once tagged, as results may be kept, see Results
+        encoded = None
+        for key, item in value.iteritems():
+            item, binary = encode(item)
+            if binary:
+                if encoded is None:
+                    encoded = dict(value)
+                encoded[key] = item
+
+        if encoded is not None:
+            return encoded, True
+
+    return value, False
+
+
+def decode(value):
+    """Return `value` with binary values tagged by encode() restored"""
+    from openmetadata import process
+
+    if isinstance(value, tuple) and value[:1] == (Binary,):
+        if value[1] == 'array':
+            data = array.array(value[2])
+            data.fromstring(value[3])
+            return data
+        if value[1] == 'blob':
+            return process.Blob(value[2])
+        return value[2]
+
+    if isinstance(value, dict):
+        for key, item in value.iteritems():
+            value[key] = decode(item)
+
+    return value
+
+
+class Handler(SocketServer.BaseRequestHandler):
+    """Serve requests of one connection until closed"""
+
+    def handle(self):
+        while True:
+            try:
+                request = recv(self.request)
+            except EOFError:
+                return
+            except ValueError as e:
+                send(self.request, _failure('ValueError', str(e)))
+                continue
+
+            try:
+                response = self.server.respond(request)
+            except Exception as e:
+                log.exception("Could not respond to %r" % (request,))
+                response = _failure(type(e).__name__, str(e))
+
+            try:
+                send(self.request, response)
+            except ValueError as e:
+                # Content not representable, E.g. file-objects
+                send(self.request, _failure('TypeError', str(e)))
+
+
+def _state(paths):
+    """Return (mtime, size) of each of `paths`, or None if missing"""
+    from openmetadata import backend
+
+    state = []
+    for path in paths:
+        try:
+            stat = backend.get(path).stat(path)
+        except OSError:
+            state.append(None)
+        else:
+            state.append((stat.mtime, stat.size))
+
+    return state
+
+
+class Results(object):
+    """Results of requests, reused whilst what they read is unchanged
+
+    Each result is kept along with the paths it depends on, and is
+    reused for as long as the mtime and size of each are unchanged.
+    Results depending on paths changed whilst being computed are
+    not kept. Safe for use across threads.
+
+    Parameters
+        maxsize (int)   : Results kept at most, least recently used
+                          results are discarded first
+
+    """
+
+    def __init__(self, maxsize=MaxResults):
+        self.maxsize = maxsize
+        self._results = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._results)
+
+    def get(self, key, compute):
+        """Return result of `key`, via compute() --> (result, paths)"""
+        with self._lock:
+            cached = self._results.get(key)
+
+        if cached is not None:
+            paths, state, result = cached
+            if _state(paths) == state:
+                with self._lock:
+                    self.hits += 1
+                return result
+
+        started = time.time()
+        result, paths = compute()
+        state = _state(paths)
+
+        settled = all(entry is None or entry[0] < started - Resolution
+                      for entry in state)
+
+        with self._lock:
+            self.misses += 1
+            self._results.pop(key, None)
+            if settled:
+                self._results[key] = (paths, state, result)
+                while len(self._results) > self.maxsize:
+                    self._results.popitem(last=False)
+
+        return result
+
+    def stats(self):
+        return {'entries': len(self), 'hits': self.hits,
+                'misses': self.misses}
+
+
+class Server(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+    """Serve transaction.py over the Unix socket at `path`
+
+    Parameters
+        path    (str)   : Path of socket, defaults to address()
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path=None):
+        path = path or address()
+        _private(os.path.dirname(path))
+
+        if os.path.exists(path):
+            sock = _connect(path)
+            if sock is not None:
+                sock.close()
+                raise IOError("Server already running at %s" % path)
+
+            # Left behind by a server no longer running
+            os.remove(path)
+
+        SocketServer.UnixStreamServer.__init__(self, path, Handler)
+
+        from openmetadata import domain
+
+        self.requests = 0
+        self.scans = domain.ScanCache(validate=True)
+        self.results = Results()
+        self._lock = threading.Lock()
+
+    def respond(self, request):
+        """Return response to `request`"""
+        from openmetadata import domain, transaction
+
+        if not isinstance(request, dict):
+            return _failure('ValueError', "Malformed request %r" % (request,))
+
+        op = request.get('op')
+
+        if op == 'stats':
+            return {'ok': True, 'result': self.stats()}
+
+        with self._lock:
+            self.requests += 1
+
+        if op not in Operations:
+            return _failure('ValueError', "Unsupported operation %r" % (op,))
+
+        args = request.get('args', ())
+        kwargs = request.get('kwargs', {})
+
+        if not isinstance(args, (list, tuple)) or \
+                not isinstance(kwargs, dict) or \
+                not all(isinstance(key, basestring) for key in kwargs):
+            return _failure('ValueError', "Malformed request %r" % (request,))
+
+        kwargs = dict((str(key), value) for key, value in kwargs.iteritems())
+
+        try:
+            with domain.scanning(self.scans):
+                if op == 'cascade':
+                    result = self.cascade(*args, **kwargs)
+                else:
+                    result = getattr(transaction, op)(*args, **kwargs)
+        except Exception as e:
+            log.warning("%s(): %s" % (op, e))
+            return _failure(type(e).__name__, str(e))
+
+        result, binary = encode(result)
+        return {'ok': True, 'result': result, 'binary': binary}
+
+    def cascade(self, path, channel, key=None, lazy=False):
+        """transaction.cascade(), via the results of prior requests"""
+        from openmetadata import overlay, transaction
+
+        if lazy:
+            return transaction.cascade(path, channel, key, lazy)
+
+        def compute():
+            view = overlay.Cascade.find(path, channel)
+            if key is not None:
+                result = overlay.materialize(view.get(key))
+            else:
+                result = view.materialize()
+            return result, view.dependencies()
+
+        return self.results.get((path, channel, key), compute)
+
+    def stats(self):
+        """Return operations served, stats of the caches and of locks"""
+        from openmetadata import cache, lock
+        return {'requests': self.requests,
+                'cache': cache.stats(),
+                'scans': {'hits': self.scans.hits,
+                          'misses': self.scans.misses},
+                'results': self.results.stats(),
+                'lock': lock.stats()}
+
+    def server_close(self):
+        SocketServer.UnixStreamServer.server_close(self)
+        try:
+            os.remove(self.server_address)
+        except OSError:
+            pass
+
+
+def _connect(path):
+    """Return socket connected to server at `path`, or None
+
+    Sockets of other users are never connected to, lest
+    they serve metadata other than what is on disk.
+
+    """
+
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+
+    try:
+        owner = os.stat(path).st_uid
+    except OSError:
+        return None
+
+    if _uid() is not None and owner != _uid():
+        log.warning("Not connecting to %s of another user" % path)
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except socket.error:
+        sock.close()
+        return None
+
+    return sock
+
+
+class Local(object):
+    """Client operating in-process, as though served"""
+
+    remote = False
+
+    def __getattr__(self, op):
+        if op not in Operations:
+            raise AttributeError(op)
+
+        from openmetadata import transaction
+        return getattr(transaction, op)
+
+    def stats(self):
+        """Return stats as per Server.stats(), of the current process"""
+        from openmetadata import cache, lock
+        return {'requests': 0,
+                'cache': cache.stats(),
+                'scans': {'hits': 0, 'misses': 0},
+                'results': Results().stats(),
+                'lock': lock.stats()}
+
+    def close(self):
+        pass
+
+
+class Client(object):
+    """Client of a running Server
+
+    Requests are sent over one connection, one at a time. Should
+    the server go away, requests are instead run in-process.
+
+    Parameters
+        sock    (socket)    : Connected socket
+
+    """
+
+    def __init__(self, sock):
+        self._sock = sock
+        self._lock = threading.Lock()
+
+    def __getattr__(self, op):
+        if op not in Operations:
+            raise AttributeError(op)
+
+        def request(*args, **kwargs):
+            return self.request(op, *args, **kwargs)
+
+        request.__name__ = op
+        return request
+
+    def request(self, op, *args, **kwargs):
+        with self._lock:
+            if self._sock is not None:
+                try:
+                    send(self._sock, {'op': op,
+                                      'args': args,
+                                      'kwargs': kwargs})
+                    response = recv(self._sock)
+                except (socket.error, EOFError) as e:
+                    log.warning("Lost server, continuing in-process: %s" % e)
+                    self._sock.close()
+                    self._sock = None
+
+        if self._sock is None:
+            return getattr(Local(), op)(*args, **kwargs)
+
+        if not response['ok']:
+            error = Errors.get(response['error'], RuntimeError)
+            raise error(response['message'])
+
+        if response.get('binary'):
+            return decode(response['result'])
+
+        return response['result']
+
+    def stats(self):
+        return self.request('stats')
+
+    @property
+    def remote(self):
+        """Are requests served by the server?"""
+        return self._sock is not None
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+
+def client(path=None):
+    """Return Client of server at `path`, or Local if not running"""
+    sock = _connect(path or address())
+    if sock is None:
+        return Local()
+    return Client(sock)
+
+
+def main(args=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='python -m openmetadata.server',
+        description='Serve metadata over a Unix socket')
+    parser.add_argument('--address', default=None,
+                        help="Path of socket, defaults to %s" % address())
+
+    options = parser.parse_args(args)
+
+    server = Server(options.address)
+    print "Serving on %s" % server.server_address
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
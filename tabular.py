@@ -0,0 +1,258 @@
+"""Columns of one channel across many folders
+
+# Overview
+    Dashboards compare the same channel of every shot of a show,
+    one column per key. Rather than reading each shot and flattening
+    the results by hand, table() walks a hierarchy and reads each
+    folder in parallel, returning one list per field.
+
+    E.g.
+    >>> om.table('/projects/hulk', 'properties', fields=['fps', 'status'])
+    {'path': ['/projects/hulk/shots/1000', '/projects/hulk/shots/2000'],
+     'fps': [24, 25],
+     'status': ['waiting', None]}
+
+    Nested content is addressed by dotted fields, E.g. 'camera.fps'.
+    Folders without the channel are left out; fields missing from a
+    folder are None.
+
+    Should NumPy be installed, columns are arrays of the type shared
+    by their values, see dtype(), and records() makes a record array
+    of them.
+
+    Very large hierarchies may be read in chunks, such that
+    only one chunk is ever held in memory at once.
+
+    >>> for columns in chunks('/projects/hulk', 'properties', size=1000):
+    ...     dashboard.append(columns)
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import logging
+
+from openmetadata import constant
+from openmetadata import domain
+
+log = logging.getLogger('openmetadata.tabular')
+
+Path = 'path'
+
+
+def _numpy(numpy):
+    """Return NumPy module if wanted and available, or None"""
+    if numpy is False:
+        return None
+
+    try:
+        import numpy as _numpy
+    except ImportError:
+        if numpy:
+            raise
+        return None
+
+    return _numpy
+
+
+def _list(dirpath):
+    """Return (subdirectories, has .meta) of `dirpath`"""
+    try:
+        basenames = sorted(domain.listdir(dirpath))
+    except OSError:
+        return [], False
+
+    subdirs = []
+    for basename in basenames:
+        if basename.startswith(".") or basename in constant.HiddenKeys:
+            continue
+
+        path = os.path.join(dirpath, basename)
+        if domain.isdir(path):
+            subdirs.append(path)
+
+    return subdirs, constant.Meta in basenames
+
+
+def folders(root, processes=8):
+    """Yield path of each folder with metadata beneath `root`
+
+    Directories are listed one level at a time, each
+    level in parallel, and yielded in that order.
+
+    """
+
+    from openmetadata import util
+
+    level = [os.path.abspath(root)]
+    while level:
+        listings = util.parallel(_list, level, processes)
+
+        subdirs = []
+        for dirpath, (_subdirs, meta) in zip(level, listings):
+            if meta:
+                yield dirpath
+            subdirs.extend(_subdirs)
+
+        level = subdirs
+
+
+def _field(data, field):
+    """Return content of dotted `field` within `data`, or None"""
+    for name in field.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(name)
+    return data
+
+
+def dtype(values):
+    """Return NumPy type shared by `values`, ignoring None
+
+    Booleans, integers and floats are stored as such; integers
+    alongside floats or None are stored as floats, with None as
+    NaN. Strings are stored as unicode, anything else as objects.
+
+    """
+
+    present = [value for value in values if value is not None]
+    missing = len(present) < len(values)
+
+    if not present:
+        return 'object'
+
+    if all(isinstance(value, bool) for value in present):
+        return 'object' if missing else 'bool'
+
+    if all(isinstance(value, (int, long)) and not isinstance(value, bool)
+           for value in present):
+        return 'float64' if missing else 'int64'
+
+    if all(isinstance(value, (int, long, float)) and
+           not isinstance(value, bool) for value in present):
+        return 'float64'
+
+    if all(isinstance(value, basestring) for value in present):
+        return 'object' if missing else 'unicode'
+
+    return 'object'
+
+
+def _columns(rows, fields, numpy):
+    """Return {field: column} of `rows`, [(path, data)]"""
+    if Path in fields:
+        raise ValueError("Field %r is reserved for the path of each "
+                         "folder, pass `fields` without it" % Path)
+
+    columns = {Path: [path for path, _ in rows]}
+    for field in fields:
+        columns[field] = [_field(data, field) for _, data in rows]
+
+    if numpy is None:
+        return columns
+
+    for field, values in columns.items():
+        _dtype = dtype(values)
+        if _dtype == 'float64':
+            values = [float('nan') if value is None else value
+                      for value in values]
+
+        if _dtype == 'object':
+            # Assigned one by one, as lists would
+            # otherwise make for further dimensions
+            column = numpy.empty(len(values), dtype=object)
+            for index, value in enumerate(values):
+                column[index] = value
+        else:
+            column = numpy.array(values, dtype=_dtype)
+
+        columns[field] = column
+
+    return columns
+
+
+def _fields(rows):
+    """Return top-level names of content of `rows`, sorted"""
+    fields = set()
+    for _, data in rows:
+        if isinstance(data, dict):
+            fields.update(data)
+    return sorted(fields)
+
+
+def _rows(paths, channel, processes):
+    """Return [(path, data)] of each of `paths` with `channel`"""
+    from openmetadata import transaction
+
+    metadata = transaction.read_many(paths, channel, processes=processes)
+    return [(path, metadata[path]) for path in paths if metadata.get(path)]
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def chunks(root, channel, fields=None, size=1000, processes=8, numpy=None):
+    """Yield columns of every `size` folders walked, see table()
+
+    Fields default to those of the first chunk.
+
+    """
+
+    numpy = _numpy(numpy)
+
+    for paths in _batches(folders(root, processes), size):
+        rows = _rows(paths, channel, processes)
+        if not rows:
+            continue
+
+        if fields is None:
+            fields = _fields(rows)
+
+        yield _columns(rows, fields, numpy)
+
+
+def table(root, channel, fields=None, processes=8, numpy=None):
+    """Return columns of `channel` of each folder beneath `root`
+
+    Parameters
+        root        (str)   : Path of hierarchy, itself included
+        channel     (str)   : Name of channel, E.g. 'properties'
+        fields      (list)  : (optional) Names of columns, defaults
+                              to every key of every folder. 'path'
+                              is reserved, and raises ValueError
+        processes   (int)   : Maximum number of concurrent listings
+                              and reads
+        numpy       (bool)  : Return arrays, defaults to whether
+                              NumPy is installed
+
+    Returns
+        dict()  : One column per field, and the path of each row,
+                  {'path': [path], field: [content]}
+
+    """
+
+    rows = _rows(list(folders(root, processes)), channel, processes)
+
+    if fields is None:
+        fields = _fields(rows)
+
+    return _columns(rows, fields, _numpy(numpy))
+
+
+def records(columns):
+    """Return NumPy record array of `columns`, as returned by table()"""
+    import numpy
+
+    names = [Path] + sorted(name for name in columns if name != Path)
+    return numpy.rec.fromarrays([columns[name] for name in names],
+                                names=[str(name) for name in names])
@@ -0,0 +1,212 @@
+"""Apply the same metadata onto many folders
+
+# Overview
+    A Template holds channels serialised once and materialises
+    them onto any number of folders in parallel. Each channel of
+    a target is replaced, as per Channel.write(), keeping its schema.
+
+    E.g.
+    >>> template = Template()
+    >>> template.add('properties.kvs', {'fps': 24, 'status': 'waiting'})
+    >>> template.add('reference.kvs', {'lut': lut}, immutable=True)
+    >>> reports = template.apply_many(shots, objects='/projects/hulk/.lut')
+    >>> reports[shots[0]]
+    Report(path='/projects/hulk/shots/1000', written=2, linked=1, error=None)
+
+    Keys added as immutable may be hardlinked from a single shared
+    copy within `objects`, rather than written per target. Targets
+    must then reside on the same file-system as `objects`; where
+    linking fails, keys are written instead. Writes always replace
+    files rather than modify them in place, such that a linked key
+    changed in one folder is never changed in another.
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import logging
+import hashlib
+import collections
+
+from openmetadata import backend
+from openmetadata import constant
+from openmetadata import domain
+from openmetadata import process
+
+log = logging.getLogger('openmetadata.template')
+
+Report = collections.namedtuple('Report', ['path', 'written',
+                                           'linked', 'error'])
+
+
+class Template(object):
+    """Channels serialised once, for materialising onto many folders"""
+
+    def __init__(self):
+        # {channel basename: {key basename: (raw, immutable)}}
+        self._channels = {}
+
+    def __repr__(self):
+        return "%s.Template(%r)" % (__name__, sorted(self._channels))
+
+    @classmethod
+    def fromfolder(cls, folder, immutable=()):
+        """Return Template of each channel of `folder`
+
+        `folder` may exist on disk, in memory or both,
+        as per test_full_template.
+
+        Parameters
+            folder      (Folder)    : Folder whose channels to template
+            immutable   (list)      : Names of channels to add as immutable
+
+        """
+
+        template = cls()
+        for channel in folder:
+            data = dict((key.basename, key.data) for key in channel
+                        if isinstance(key, domain.Key))
+            template.add(channel.basename, data,
+                         immutable=channel.name in immutable)
+
+        return template
+
+    @property
+    def channels(self):
+        return sorted(self._channels)
+
+    def add(self, channel, data, immutable=False):
+        """Serialise `data` as channel `channel`
+
+        Parameters
+            channel     (str)   : Basename of channel, E.g. 'properties.kvs'
+            data        (dict)  : Content per key, {key: content}
+            immutable   (bool)  : May keys be hardlinked, see apply()
+
+        """
+
+        channel_ext = os.path.splitext(channel)[1]
+        file_ext = process.channel_to_file.get(channel_ext)
+        if not file_ext:
+            raise ValueError('Could not determine file format '
+                             'for channel "%s"' % channel)
+
+        keys = {}
+        for key, value in data.iteritems():
+            ext = os.path.splitext(key)[1]
+            if ext not in process.mapping:
+                ext = file_ext
+                key += file_ext
+
+            if process.isbinary(ext):
+                raw = process.mapping[ext].outgoing(value)
+            else:
+                raw = process.processoutgoing(value, ext)
+
+            if raw is None:
+                raise ValueError('Could not process "%s"' % key)
+
+            keys[key] = (raw, immutable)
+
+        self._channels[channel] = keys
+
+    def _object(self, objects, raw, ext):
+        """Return path of shared copy of `raw` within `objects`"""
+        digest = hashlib.sha1(raw).hexdigest()
+        path = os.path.join(objects, digest + ext)
+
+        store = backend.get(path)
+        if not store.exists(path):
+            store.write(path, raw)
+        return path
+
+    def apply(self, path, objects=None):
+        """Materialise each channel onto folder `path`
+
+        Parameters
+            path    (str)   : Absolute path of target folder
+            objects (str)   : (optional) Directory of shared copies of
+                              immutable keys, hardlinked into `path`
+
+        Returns
+            Report
+
+        """
+
+        from openmetadata import journal, lock, schema
+
+        store = backend.get(path)
+        folder = domain.Folder(path)
+
+        written = linked = 0
+        for channel, keys in sorted(self._channels.iteritems()):
+            channel_path = os.path.join(path, constant.Meta, channel)
+
+            with lock.exclusive(channel_path):
+                kept = None
+                existing = domain.Channel(channel, folder)
+                if existing.exists:
+                    kept = schema.raw(channel_path)
+                    existing.clear()
+
+                domain.makedirs(channel_path)
+
+                for key, (raw, immutable) in keys.iteritems():
+                    key_path = os.path.join(channel_path, key)
+
+                    if immutable and objects:
+                        source = self._object(objects, raw,
+                                              os.path.splitext(key)[1])
+                        try:
+                            store.link(source, key_path)
+                            journal.record('write', key_path, raw)
+                            linked += 1
+                            continue
+                        except OSError as e:
+                            # E.g. across file-systems
+                            log.debug("Could not link %s: %s" % (key_path, e))
+
+                    store.write(key_path, raw)
+                    journal.record('write', key_path, raw)
+                    written += 1
+
+                if kept is not None:
+                    schema.restore(channel_path, kept)
+
+        return Report(path, written, linked, None)
+
+    def apply_many(self, paths, processes=8, objects=None):
+        """Materialise onto each of `paths` in parallel, see apply()
+
+        Failing targets do not stop the others.
+
+        Returns
+            dict()  : Report per path, {path: Report}
+
+        """
+
+        from openmetadata import util
+
+        unique = []
+        for path in paths:
+            if path not in unique:
+                unique.append(path)
+
+        if not unique:
+            return {}
+
+        if objects:
+            backend.get(objects).makedirs(objects)
+
+        def _apply(path):
+            try:
+                return self.apply(path, objects)
+            except Exception as e:
+                log.error("apply_many(): Could not apply %r to %s: %s"
+                          % (self, path, e))
+                return Report(path, 0, 0, e)
+
+        reports = util.parallel(_apply, unique, processes)
+
+        return dict((report.path, report) for report in reports)
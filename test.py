@@ -3,7 +3,14 @@
 from __future__ import absolute_import
 
 import os
+import time
+import array
+import shutil
+import hashlib
+import tempfile
+import threading
 from nose.tools import *
+from nose.plugins.skip import SkipTest
 
 import openmetadata as om
 
@@ -145,14 +152,56 @@ def test_iterator():
             assert_true(file in channel.children)
 
 
-def test_trash():
-    """Deleted items end up in trash"""
-    pass
-
-
 def test_revisions():
     """Edited items are backed up in revisions"""
-    pass
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        folder = om.Folder(tempdir)
+        channel = om.Channel('chan.kvs', folder)
+        channel.data = {'file1': {'value': 1}, 'file2': {'value': 2}}
+        channel.write()
+
+        first = channel.store()
+
+        channel.data = {'file1': {'value': 1}, 'file2': {'value': 3}}
+        channel.write()
+
+        second = channel.store()
+
+        assert_equals([r.path for r in channel.revisions],
+                      [second.path, first.path])
+
+        # Revisions stored within the same microsecond, ordered
+        # by their basename alone rather than by their manifest
+        third = second.path[:-len('.json')] + '.1.json'
+        with open(third, 'w') as f:
+            f.write('unreadable')
+        assert_equals([r.path for r in channel.revisions],
+                      [third, second.path, first.path])
+        os.remove(third)
+        assert_equals(first.read(), {'file1': {'value': 1},
+                                     'file2': {'value': 2}})
+        assert_equals(second.read('file2'), {'file2': {'value': 3}})
+
+        # Unchanged keys are only stored once
+        objects = []
+        for _, _, files in os.walk(os.path.join(first.rev, 'objects')):
+            objects.extend(files)
+        assert_equals(len(objects), 3)
+
+        # Restoring waits on writers of the channel
+        with om.lock.exclusive(channel.path):
+            restorer = threading.Thread(target=first.restore, args=(channel,))
+            restorer.start()
+            time.sleep(0.1)
+            assert_true(restorer.is_alive())
+
+        restorer.join()
+        assert_equals(channel.read().data['file2'], {'value': 2})
+
+    finally:
+        shutil.rmtree(tempdir)
 
 
 # def test_om_read():
@@ -203,12 +252,6 @@ def test_instancefactory(root=None):
 #     om.write(dynamic, 'some text')
 
 
-# def test_om_update():
-#     """`om.read()` convenience method"""
-#     existing_file = os.path.join(persist, r'.meta\chan.txt\document.txt')
-#     om.update(existing_file, 'updated data!')
-
-
 # def test_om_delete():
 #     """`om.delete()` convenience method"""
 #     meta = om.Folder(os.path.join(dynamic, om.constant.Meta))
@@ -408,6 +451,31 @@ def test_cascading_metadata():
     assert_equals(csmetadata['more'], {'key': 'value'})
 
 
+def test_cascading_lazy():
+    """Lazy cascade resolves keys upon access"""
+    path = os.path.join(persist, 'child')
+    view = om.transaction.cascade(path, 'cascading', lazy=True)
+
+    assert_is_instance(view, om.overlay.Cascade)
+    assert_equals(len(view.channels), 2)
+
+    root = view['root']
+    assert_is_instance(root, om.overlay.Overlay)
+    assert_equals(root['A'], 'Overidden')
+    assert_equals(root['B'], 'Original')
+    assert_true('more' in view)
+    assert_false('NON_EXISTANT' in view)
+
+    assert_equals(view.materialize(),
+                  om.transaction.cascade(path, 'cascading'))
+
+    # Individual key
+    assert_equals(om.transaction.cascade(path, 'cascading', 'root'),
+                  root.materialize())
+    assert_equals(om.transaction.cascade(path, 'cascading', 'NON_EXISTANT'),
+                  None)
+
+
 def test_channel_set_multiple_times():
     """Set channel data multiple times"""
     folder = om.Factory.create(root)
@@ -462,6 +530,1245 @@ def test_om_write():
     # om.write(path=persist, channel='testing', key='temp', data=key_data)
 
 
+def test_trash():
+    """Cleared items are listed as trash of their path"""
+    folder = om.Folder(dynamic)
+    channel = om.Channel('chan.txt', parent=folder)
+    file = om.Key('document.txt', parent=channel)
+    file.data = 'some text'
+    file.write()
+
+    channel.clear()
+
+    assert_equals(len(channel.trash), 1)
+    assert_equals(channel.trash[0].name, 'chan.txt')
+
+    om.delete(folder.path)
+
+
+def test_trash_policy():
+    """Tombstones are purged as per retention policy"""
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        now = time.time()
+        stamps = []
+        for age in (10, 20, 30, 4000):
+            stamp = time.strftime(om.trash.TimeFormat, time.gmtime(now - age))
+            os.makedirs(os.path.join(tempdir, '.meta',
+                                     '.deleted.%s.chan.txt' % stamp))
+            stamps.append(stamp)
+        os.makedirs(os.path.join(tempdir, '.meta', 'chan.txt'))
+
+        # Keep two most recent per item
+        purged = om.trash.collect(tempdir, om.trash.Policy(maxcount=2))
+        assert_equals(len(purged), 2)
+
+        # Nothing older than a minute
+        purged = om.trash.collect(tempdir, om.trash.Policy(maxage=60))
+        assert_equals(len(purged), 0)
+
+        purged = om.trash.collect(tempdir, om.trash.Policy(maxage=15))
+        assert_equals(len(purged), 1)
+
+        assert_equals(sorted(os.listdir(os.path.join(tempdir, '.meta'))),
+                      ['.deleted.%s.chan.txt' % stamps[0], 'chan.txt'])
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_trash_inline():
+    """clear() purges expired tombstones when given a policy"""
+    tempdir = tempfile.mkdtemp()
+    om.trash.setpolicy(om.trash.Policy(maxcount=1))
+
+    try:
+        stamp = time.strftime(om.trash.TimeFormat, time.gmtime(0))
+        os.makedirs(os.path.join(tempdir, '.meta',
+                                 '.deleted.%s.chan.txt' % stamp))
+
+        folder = om.Folder(tempdir)
+        channel = om.Channel('chan.txt', parent=folder)
+        file = om.Key('document.txt', parent=channel)
+        file.data = 'some text'
+        file.write()
+
+        channel.clear()
+
+        assert_equals(len(channel.trash), 1)
+        assert_true(channel.trash[0].time > 0)
+
+    finally:
+        om.trash.setpolicy(None)
+        shutil.rmtree(tempdir)
+
+
+def test_import_budget():
+    """Cold `import openmetadata` defers heavy modules
+
+    Its timing is left to benchmark.report().
+
+    """
+
+    from openmetadata import benchmark
+
+    imported = benchmark.import_modules()
+    for module in benchmark.DeferredModules:
+        assert_false(module in imported, "%s imported eagerly" % module)
+
+
+def test_array_channel():
+    """Numeric arrays are memory-mapped and sliced lazily"""
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        folder = om.Folder(tempdir)
+        channel = om.Channel('curves.arr', folder)
+        channel.data = {'focal': [float(frame) for frame in range(1000)],
+                        'timings': array.array('i', [1, 2, 3])}
+        channel.write()
+
+        channel = om.Factory.create(channel.path)
+        data = channel.read().data
+
+        focal = data['focal']
+        assert_is_instance(focal, om.process.ArrayView)
+        assert_equals(len(focal), 1000)
+        assert_equals(focal[-1], 999.0)
+        assert_equals(focal[10:13].tolist(), [10.0, 11.0, 12.0])
+        assert_equals(focal[10:20][::5].tolist(), [10.0, 15.0])
+        assert_equals(len(focal.memoryview()), 1000 * focal.itemsize)
+
+        assert_equals(data['timings'], [1, 2, 3])
+        assert_equals(data['timings'].typecode, 'i')
+
+        focal.close()
+        data['timings'].close()
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_binary_channel():
+    """Binary keys are written from streams and read lazily"""
+    tempdir = tempfile.mkdtemp()
+    image = os.path.join(root, 'image1.png')
+
+    try:
+        folder = om.Folder(tempdir)
+        channel = om.Channel('thumbnails.img', folder)
+        with open(image, 'rb') as f:
+            channel.data = {'image1.png': f,
+                            'chunks': iter(['first', 'second'])}
+            channel.write()
+
+        channel = om.Factory.create(channel.path)
+        data = channel.read().data
+
+        blob = data['image1']
+        assert_is_instance(blob, om.process.Blob)
+        assert_equals(os.path.splitext(blob.path)[1], '.png')
+
+        with open(image, 'rb') as f:
+            contents = f.read()
+
+        assert_equals(blob.read(), contents)
+        assert_equals(''.join(blob.iterchunks(100)), contents)
+
+        mapped = blob.mmap()
+        assert_equals(mapped[:8], contents[:8])
+        mapped.close()
+
+        assert_equals(data['chunks'].read(), 'firstsecond')
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_om_update():
+    """`om.update()` merges into a single key"""
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        folder = om.Folder(tempdir)
+        channel = om.Channel('properties.kvs', folder)
+        channel.data = {'camera': {'focal': 35, 'fps': 24},
+                        'status': {'approved': False}}
+        channel.write()
+
+        merged = om.update(tempdir, 'properties', 'camera', {'fps': 25})
+        assert_equals(merged, {'focal': 35, 'fps': 25})
+
+        om.update_many(tempdir, 'properties.kvs',
+                       {'status': {'approved': True},
+                        'new': {'created': True}})
+
+        data = om.read(tempdir, 'properties')
+        assert_equals(data['camera'], {'focal': 35, 'fps': 25})
+        assert_equals(data['status'], {'approved': True})
+        assert_equals(data['new'], {'created': True})
+
+        # Missing channels are created
+        om.update(tempdir, 'notes', 'document', 'some text')
+        assert_equals(om.read(tempdir, 'notes', 'document'), 'some text')
+
+        # New channels are text only if every key is text
+        om.update_many(tempdir, 'settings', {'path': '/x', 'fps': 24})
+        assert_equals(om.read(tempdir, 'settings'), {'path': '/x', 'fps': 24})
+        assert_raises(ValueError, om.update,
+                      tempdir, 'notes', 'count', 24)
+
+        # Dictionaries replace content other than dictionaries
+        om.update(tempdir, 'properties', 'lens', {'mm': 3})
+        merged = om.update(tempdir, 'properties', 'lens', {'mm': {'min': 1}})
+        assert_equals(merged, {'mm': {'min': 1}})
+
+        # Channels of unknown format are not updated
+        os.makedirs(os.path.join(tempdir, om.constant.Meta, 'strange.xyz'))
+        assert_raises(ValueError, om.update,
+                      tempdir, 'strange', 'key', {'a': 1})
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_om_update_concurrent():
+    """Concurrent updates to the same key are not lost"""
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        def worker(index):
+            om.update(tempdir, 'properties', 'shared', {str(index): index})
+
+        threads = [threading.Thread(target=worker, args=(index,))
+                   for index in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        data = om.read(tempdir, 'properties', 'shared')
+        assert_equals(len(data), 20)
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_om_exists():
+    """`om.exists()` convenience method"""
+    assert_true(om.exists(persist))
+    assert_true(om.exists(persist, 'testing'))
+    assert_true(om.exists(persist, 'testing.kvs'))
+    assert_true(om.exists(persist, 'testing', 'file1'))
+    assert_true(om.exists(persist, 'testing.kvs', 'file1.json'))
+    assert_true(om.exists(persist, 'special'))
+
+    assert_false(om.exists(dynamic))
+    assert_false(om.exists(persist, 'NON_EXISTANT'))
+    assert_false(om.exists(persist, 'testing.txt'))
+    assert_false(om.exists(persist, 'testing', 'NON_EXISTANT'))
+    assert_false(om.exists(persist, 'NON_EXISTANT', 'file1'))
+
+    assert_raises(ValueError, om.exists, persist, key='file1')
+
+
+def test_om_read_many():
+    """`om.read_many()` reads many folders at once"""
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        paths = []
+        for index in range(10):
+            path = os.path.join(tempdir, 'shot%i' % index)
+            om.update(path, 'properties', 'shot', {'index': index})
+            paths.append(path)
+
+        errors = {}
+        missing = os.path.join(tempdir, 'missing')
+        data = om.read_many(paths + paths[:2] + [missing, None],
+                            'properties', errors=errors)
+
+        assert_equals(len(data), 11)
+        assert_equals(data[paths[3]], {'shot': {'index': 3}})
+        assert_equals(data[missing], {})
+        assert_equals(errors.keys(), [None])
+
+        # Directories are listed once per scan
+        cache = om.domain.ScanCache()
+        with om.domain.scanning(cache):
+            om.read(paths[0])
+            misses = cache.misses
+            om.read(paths[0])
+
+        assert_equals(cache.misses, misses)
+        assert_true(cache.hits > 0)
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_writebehind():
+    """Deferred writes are coalesced and flushed"""
+    tempdir = tempfile.mkdtemp()
+    flusher = om.writebehind.enable(window=10)
+
+    try:
+        folder = om.Folder(tempdir)
+        channel = om.Channel('properties.kvs', folder)
+
+        for index in range(5):
+            channel.data = {'edit': {'index': index}}
+            channel.write()
+
+        # Not yet written, but readable from memory
+        assert_false(channel.exists)
+        assert_equals(channel.data, {'edit': {'index': 4}})
+        assert_equals(flusher.stats['coalesced'], 4)
+
+        om.writebehind.flush()
+
+        assert_equals(om.read(tempdir, 'properties'),
+                      {'edit': {'index': 4}})
+        assert_equals(flusher.pending, [])
+
+        # Written once idle
+        flusher.window = 0.01
+        channel.data = {'edit': {'index': 5}}
+        channel.write()
+
+        for _ in range(100):
+            if not flusher.pending:
+                break
+            time.sleep(0.01)
+
+        om.writebehind.disable()
+        assert_equals(om.read(tempdir, 'properties', 'edit'), {'index': 5})
+
+    finally:
+        om.writebehind.disable()
+        shutil.rmtree(tempdir)
+
+
+def test_key_cache():
+    """Unchanged keys are parsed once per process"""
+    tempdir = tempfile.mkdtemp()
+    om.cache.clear()
+
+    try:
+        om.update(tempdir, 'properties', 'settings', {'fps': 24})
+        path = os.path.join(tempdir, '.meta', 'properties.kvs',
+                            'settings.json')
+
+        before = om.cache.stats()
+        first = om.Factory.create(path).read().data
+        second = om.Factory.create(path).read().data
+        after = om.cache.stats()
+
+        assert_equals(after['misses'] - before['misses'], 1)
+        assert_equals(after['hits'] - before['hits'], 1)
+
+        # Each read is a copy of its own
+        first['fps'] = 25
+        assert_equals(second, {'fps': 24})
+        assert_equals(om.Factory.create(path).read().data, {'fps': 24})
+
+        # Changed files are parsed again
+        om.update(tempdir, 'properties', 'settings', {'fps': 2500})
+        assert_equals(om.Factory.create(path).read().data, {'fps': 2500})
+
+        # Memory is bounded
+        om.cache.configure(maxbytes=1)
+        assert_equals(om.cache.stats()['entries'], 0)
+        assert_true(om.cache.stats()['evictions'] > 0)
+
+    finally:
+        om.cache.configure()
+        shutil.rmtree(tempdir)
+
+
+def test_refresh():
+    """refresh() re-reads only what changed"""
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        om.update_many(tempdir, 'properties', {'camera': {'fps': 24},
+                                               'status': {'done': False}})
+
+        folder = om.Folder(tempdir)
+        folder.read()
+
+        changes = folder.refresh()
+        assert_equals(changes, {'added': [], 'changed': [], 'removed': []})
+
+        om.update(tempdir, 'properties', 'status', {'done': 'almost'})
+        om.update(tempdir, 'notes', 'document', 'some text')
+
+        changes = folder.refresh()
+        channel = os.path.join(tempdir, '.meta', 'properties.kvs')
+        notes = os.path.join(tempdir, '.meta', 'notes.txt')
+
+        assert_equals(changes['changed'],
+                      [os.path.join(channel, 'status.json')])
+        assert_equals(sorted(changes['added']),
+                      [notes, os.path.join(notes, 'document.txt')])
+        assert_equals(folder.data['properties']['status'], {'done': 'almost'})
+        assert_equals(folder.data['notes'], {'document': 'some text'})
+
+        om.Factory.create(notes).clear()
+
+        changes = folder.refresh()
+        assert_equals(changes['removed'], [notes])
+        assert_false('notes' in folder.data)
+
+        # Keys vanished since read(), rather than since refresh()
+        om.update(tempdir, 'properties', 'gone', {'soon': True})
+        folder = om.Folder(tempdir)
+        folder.read()
+        os.remove(os.path.join(channel, 'gone.json'))
+
+        changes = folder.refresh()
+        assert_equals(changes['removed'], [os.path.join(channel, 'gone.json')])
+        assert_false('gone' in folder.data['properties'])
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_archive():
+    """Snapshot is readable via the same API"""
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        root = os.path.join(tempdir, 'project')
+        shot = os.path.join(root, 'shots', '1000')
+        om.update_many(root, 'properties', {'fps': 24})
+        om.update_many(shot, 'properties', {'camera': {'lens': 35}})
+        om.update(shot, 'notes', 'document', 'some text')
+        om.Factory.create(os.path.join(shot, '.meta', 'notes.txt')).clear()
+        om.update(shot, 'notes', 'document', 'other text')
+
+        path = os.path.join(tempdir, 'project.zip')
+        assert_equals(om.archive.snapshot(root, path), 3)
+
+        folder = om.archive.open(path)
+        try:
+            assert_equals(folder.path, path)
+            assert_equals(folder.read().data,
+                          {'properties': {'fps': 24}})
+
+            archived = os.path.join(path, 'shots', '1000')
+            assert_equals(om.read(archived),
+                          {'properties': {'camera': {'lens': 35}},
+                           'notes': {'document': 'other text'}})
+            assert_true(om.exists(archived, 'notes', 'document'))
+
+            # Tombstones are left out
+            assert_equals(om.archive.mount(path).listdir(
+                os.path.join(archived, '.meta')),
+                ['notes.txt', 'properties.kvs'])
+
+            key = om.Folder(archived).child('properties').child('camera')
+            assert_raises(IOError, key.write)
+
+        finally:
+            om.archive.unmount(path)
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_memory_backend():
+    """Metadata is read and written without disk"""
+    root = os.path.join(tempfile.gettempdir(), 'om-memory')
+    memory = om.backend.Memory()
+    om.backend.mount(root, memory)
+
+    try:
+        shot = os.path.join(root, 'shots', '1000')
+        om.update(root, 'properties', 'fps', 24)
+        om.update_many(shot, 'properties', {'camera': {'lens': 35}})
+        om.update(shot, 'samples.arr', 'curve', array.array('d', [0.5, 1.5]))
+
+        assert_false(os.path.exists(root))
+        assert_equals(om.read(shot, 'properties'), {'camera': {'lens': 35}})
+        assert_equals(om.read(shot, 'samples', 'curve').tolist(), [0.5, 1.5])
+        assert_equals(om.cascade(shot, 'properties'),
+                      {'fps': 24, 'camera': {'lens': 35}})
+
+        folder = om.Folder(shot)
+        channel = om.Channel('notes.txt', folder)
+        channel.data = {'document': 'some text'}
+        channel.write()
+
+        folder.read()
+        om.update(shot, 'properties', 'camera', {'lens': 50})
+        changes = folder.refresh()
+        assert_equals(changes['changed'], [os.path.join(
+            shot, '.meta', 'properties.kvs', 'camera.json')])
+
+        # Features store via the backend too
+        om.journal.enable(root)
+        om.update(shot, 'properties', 'fps', 25)
+        assert_equals([record.op for record, _ in om.journal.tail(root)],
+                      ['update'])
+
+        properties = om.Channel('properties.kvs', om.Folder(shot))
+        first = properties.store()
+        om.update(shot, 'properties', 'fps', 30)
+        first.restore(properties)
+        assert_equals(om.read(shot, 'properties', 'fps'), 25)
+
+        with om.lock.exclusive(properties.path) as held:
+            assert_true(isinstance(held, om.lock.ThreadLock))
+
+        om.trash.setpolicy(om.trash.Policy(maxcount=0))
+        try:
+            channel.clear()
+        finally:
+            om.trash.setpolicy(None)
+
+        assert_false(om.exists(shot, 'notes'))
+        assert_false(any(basename.endswith('notes.txt') for basename in
+                         memory.listdir(os.path.join(shot, '.meta'))))
+
+        om.delete(os.path.join(shot, '.meta', 'properties.kvs'))
+        assert_false(om.exists(shot, 'properties'))
+
+    finally:
+        om.backend.unmount(root)
+        om.journal._roots.clear()
+
+
+def test_latency():
+    """Simulated latency delays and counts each round-trip"""
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        om.update(tempdir, 'properties', 'fps', 24)
+        om.cache.clear()
+
+        slow = om.backend.Latency(om.backend.filesystem,
+                                  latency={'read': 0.05})
+        om.backend.mount(tempdir, slow)
+        try:
+            started = time.time()
+            assert_equals(om.read(tempdir, 'properties', 'fps'), 24)
+            assert_true(time.time() - started >= 0.05)
+            assert_equals(slow.calls['read'], 1)
+
+            # Locks and the journal are delayed alike
+            assert_true(slow.local)
+            om.journal.enable(tempdir)
+            slow.reset()
+            om.update(tempdir, 'properties', 'fps', 25)
+            assert_true(slow.calls['lock'] >= 1)
+            assert_equals(slow.calls['append'], 1)
+        finally:
+            om.backend.unmount(tempdir)
+            om.journal._roots.clear()
+
+        from openmetadata import benchmark
+        fast, slow = benchmark.latency(roundtrips=[0, 0.002], depth=2, keys=2)
+        for name in ('write', 'read', 'cascade'):
+            assert_true(slow[name][0] > fast[name][0])
+            assert_true(slow[name][0] >= 0.002 * slow[name][1])
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_identity_map():
+    """Each path resolves to one shared node"""
+    import gc
+
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        shot = os.path.join(tempdir, 'shot')
+        om.update(shot, 'properties', 'fps', 24)
+        channel_path = os.path.join(shot, '.meta', 'properties.kvs')
+
+        assert_false(om.Factory.create(shot) is om.Factory.create(shot))
+
+        identitymap = om.domain.IdentityMap(root=tempdir)
+        with om.domain.identity(identitymap):
+            folder = om.Factory.create(shot)
+            assert_true(om.Factory.create(shot) is folder)
+            assert_true(om.Factory.create(channel_path).parent is folder)
+            assert_true(om.Folder(shot).parent is
+                        om.Factory.create(tempdir))
+
+            # Outside of root
+            assert_false(om.Factory.create(os.path.dirname(tempdir)) is
+                         om.Factory.create(os.path.dirname(tempdir)))
+
+            # om.read() populates the shared node
+            assert_equals(om.read(shot), {'properties': {'fps': 24}})
+            assert_equals(len(folder._children), 1)
+
+            # Children are shared too
+            channel = folder.children[0]
+            assert_true(om.Factory.create(channel_path) is channel)
+            key = channel.children[0]
+            assert_true(om.Factory.create(key.path) is key)
+
+            # Removed keys are forgotten
+            os.remove(key.path)
+            assert_equals(key.read().data, None)
+            assert_false(key.path in identitymap)
+
+            om.update(shot, 'properties', 'status', 'done')
+            assert_equals(om.read(shot), {'properties': {'status': 'done'}})
+            del channel, key
+
+        assert_true(shot in identitymap)
+
+        del folder
+        gc.collect()
+        assert_false(shot in identitymap)
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_server():
+    """Clients are served over a socket, or in-process"""
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        shot = os.path.join(tempdir, 'shot')
+        om.update(shot, 'properties', 'fps', 24)
+
+        address = os.path.join(tempdir, 'om.sock')
+        server = om.server.Server(address)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        try:
+            client = om.server.client(address)
+            assert_true(client.remote)
+
+            assert_equals(client.read(shot, channel='properties'),
+                          {'fps': 24})
+            assert_equals(client.update(shot, 'properties', 'lens', 35), 35)
+            assert_equals(client.cascade(shot, 'properties'),
+                          {'fps': 24, 'lens': 35})
+            assert_true(client.exists(shot, 'properties', 'lens'))
+            assert_raises(ValueError, client.update, shot, 'properties')
+            assert_equals(client.stats()['requests'], 5)
+
+            # Results are of the types returned in-process
+            assert_equals(client.read(shot), om.read(shot))
+            for name in client.read(shot, channel='properties'):
+                assert_is_instance(name, str)
+
+            # Binary values are sent as arrays and Blobs
+            om.update(shot, 'samples.arr', 'curve', array.array('d', [0.5]))
+            om.update(shot, 'thumbnails.img', 'image1.png', 'png')
+            data = client.read(shot)
+            assert_equals(data['samples']['curve'], array.array('d', [0.5]))
+            assert_equals(data['thumbnails']['image1'].read(), 'png')
+            assert_is_instance(data['thumbnails']['image1'], om.process.Blob)
+            assert_is_instance(om.read(shot)['samples']['curve'],
+                               om.process.ArrayView)
+
+            # Cascades are reused until changed
+            past = time.time() - 10
+            for dirpath, dirnames, filenames in os.walk(tempdir):
+                for basename in dirnames + filenames:
+                    os.utime(os.path.join(dirpath, basename), (past, past))
+
+            client.cascade(shot, 'properties')
+            assert_equals(client.cascade(shot, 'properties'),
+                          {'fps': 24, 'lens': 35})
+            assert_equals(client.stats()['results']['hits'], 1)
+
+            om.update(shot, 'properties', 'lens', 50)
+            assert_equals(client.cascade(shot, 'properties'),
+                          {'fps': 24, 'lens': 50})
+
+            # Malformed requests are answered, and the connection kept
+            sock = om.server._connect(address)
+            try:
+                sock.sendall(om.server.Header.pack(3) + 'bad')
+                assert_false(om.server.recv(sock)['ok'])
+                om.server.send(sock, {'op': 'read', 'args': 'bad'})
+                assert_false(om.server.recv(sock)['ok'])
+                om.server.send(sock, {'op': 'exists', 'args': (shot,)})
+                assert_true(om.server.recv(sock)['result'])
+            finally:
+                sock.close()
+
+            client.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert_false(os.path.exists(address))
+
+        # Without a server, clients operate in-process
+        client = om.server.client(address)
+        assert_false(client.remote)
+        assert_equals(client.read(shot, channel='properties'),
+                      {'fps': 24, 'lens': 50})
+        assert_equals(client.stats()['requests'], 0)
+
+        # Sockets default to a directory private to the user
+        environ = dict(os.environ)
+        try:
+            os.environ.pop('OPENMETADATA_SOCKET', None)
+            os.environ['XDG_RUNTIME_DIR'] = tempdir
+            assert_equals(om.server.address(),
+                          os.path.join(tempdir, 'openmetadata.sock'))
+
+            os.environ.pop('XDG_RUNTIME_DIR')
+            private = os.path.dirname(om.server.address())
+            assert_true(private.startswith(tempfile.gettempdir()))
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_channel_lock():
+    """Concurrent writers of a channel are serialised"""
+    tempdir = tempfile.mkdtemp()
+
+    def write(name, index):
+        channel = om.Channel(name, om.Folder(tempdir))
+        channel.data = dict(('key%i' % key, {'writer': index})
+                            for key in range(10))
+        channel.write(defer=False)
+
+    try:
+        threads = [threading.Thread(target=write, args=('chan.kvs', index))
+                   for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        data = om.read(tempdir, 'chan')
+        assert_equals(len(data), 10)
+        assert_equals(len(set(value['writer'] for value in data.values())), 1)
+
+        # Lock files are kept apart from channels and their tombstones
+        path = os.path.join(tempdir, '.meta', 'chan.kvs')
+        assert_equals(om.lock.lockpath(path),
+                      os.path.join(tempdir, '.meta', '.lock', 'chan.kvs.lock'))
+        assert_true(os.path.exists(om.lock.lockpath(path)))
+        assert_true(os.path.isdir(os.path.join(tempdir, '.meta',
+                                               om.constant.Pointer)))
+        for dirpath, _, filenames in os.walk(os.path.join(tempdir, '.meta')):
+            if not dirpath.startswith(os.path.join(tempdir, '.meta', '.lock')):
+                assert_false(any(name.endswith('.lock') for name in filenames))
+
+        om.lock.resetstats()
+        with om.lock.exclusive(path):
+            # Other channels never contend
+            other = threading.Thread(target=write, args=('other.kvs', 0))
+            other.start()
+            other.join(5)
+            assert_false(other.is_alive())
+
+            reader = threading.Thread(target=om.read, args=(tempdir, 'chan'))
+            reader.start()
+            time.sleep(0.1)
+            assert_true(reader.is_alive())
+
+        reader.join()
+
+        stats = om.lock.stats()
+        assert_equals(stats['contended'], 1)
+        assert_true(stats['waited'] >= 0.05)
+
+        # Cascades are read whilst locked too
+        om.update(tempdir, 'properties', 'fps', 24)
+        properties = os.path.join(tempdir, '.meta', 'properties.kvs')
+        with om.lock.exclusive(properties):
+            reader = threading.Thread(target=om.cascade,
+                                      args=(tempdir, 'properties'))
+            reader.start()
+            time.sleep(0.1)
+            assert_true(reader.is_alive())
+
+        reader.join()
+
+        # Readers create no lock files
+        notes = os.path.join(tempdir, '.meta', 'notes.kvs')
+        os.makedirs(notes)
+        with open(os.path.join(notes, 'document.json'), 'w') as f:
+            f.write('{"text": "some"}')
+
+        assert_equals(om.read(tempdir, 'notes'),
+                      {'document': {'text': 'some'}})
+        assert_false(os.path.exists(om.lock.lockpath(notes)))
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_template():
+    """Templates materialise onto many folders"""
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        folder = om.Folder(os.path.join(tempdir, 'template'))
+        channel = om.Channel('properties.kvs', folder)
+        channel.data = {'fps': 24, 'status': 'waiting'}
+        notes = om.Channel('notes.txt', folder)
+        om.Key('document.txt', notes).data = 'some text'
+
+        template = om.template.Template.fromfolder(folder,
+                                                   immutable=['notes'])
+        assert_equals(template.channels, ['notes.txt', 'properties.kvs'])
+
+        shots = [os.path.join(tempdir, 'shots', str(index))
+                 for index in range(20)]
+        om.update(shots[0], 'properties.kvs', 'status', 'done')
+
+        objects = os.path.join(tempdir, '.objects')
+        reports = template.apply_many(shots, objects=objects)
+
+        assert_equals(sorted(reports), sorted(shots))
+        for shot in shots:
+            assert_equals(reports[shot], (shot, 2, 1, None))
+            assert_equals(om.read(shot), {
+                'properties': {'fps': 24, 'status': 'waiting'},
+                'notes': {'document': 'some text'}})
+
+        # Immutable keys are hardlinked from one copy..
+        document = os.path.join(shots[1], '.meta', 'notes.txt',
+                                'document.txt')
+        assert_equals(os.stat(document).st_nlink, len(shots) + 1)
+
+        # ..which remains unchanged once a key is written
+        key = om.Factory.create(document)
+        key.data = 'other text'
+        key.write()
+        assert_equals(om.read(shots[2], 'notes', 'document'), 'some text')
+
+        # Replaced channels are kept as tombstones
+        assert_equals(len(om.Folder(shots[0]).child('properties').trash), 1)
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_journal():
+    """Changes beneath a root are journaled and tailed"""
+    tempdir = tempfile.mkdtemp()
+    maxsegment = om.journal.MaxSegment
+
+    try:
+        om.update(tempdir, 'properties', 'fps', 24)
+        om.journal.enable(tempdir)
+        assert_equals(list(om.journal.tail(tempdir)), [])
+
+        shot = os.path.join(tempdir, 'shots', '1000')
+        om.update(shot, 'properties', 'fps', 25)
+
+        channel = om.Channel('notes.txt', om.Folder(shot))
+        for _ in range(2):
+            channel.data = {'document': 'some text'}
+            channel.write(defer=False)
+
+        records = list(om.journal.tail(tempdir))
+        properties = os.path.join(shot, '.meta', 'properties.kvs')
+        notes = os.path.join(shot, '.meta', 'notes.txt')
+        assert_equals([(r.op, r.path) for r, _ in records], [
+            ('update', os.path.join(properties, 'fps.json')),
+            ('write', os.path.join(notes, 'document.txt')),
+            ('clear', notes),
+            ('write', os.path.join(notes, 'document.txt'))])
+        assert_equals(records[1][0].hash, records[3][0].hash)
+
+        # Resume from last offset, across rotated segments
+        offset = records[-1][1]
+        om.journal.MaxSegment = 1
+        om.update(shot, 'properties', 'fps', 30)
+        om.update(shot, 'properties', 'fps', 48)
+
+        records = list(om.journal.tail(tempdir, offset))
+        assert_equals(len(records), 2)
+        assert_equals(records[-1][1].segment, 2)
+        assert_equals(list(om.journal.tail(tempdir, records[-1][1])), [])
+        offset = records[-1][1]
+
+        # Records hash the bytes written, binary and unicode alike
+        om.update(shot, 'samples.arr', 'curve', array.array('d', [0.5]))
+        om.update(shot, 'properties', 'title', u'caf\xe9')
+
+        records = [r for r, _ in om.journal.tail(tempdir, offset)]
+        curve = os.path.join(shot, '.meta', 'samples.arr', 'curve.arr')
+        assert_equals([(r.op, r.path) for r in records], [
+            ('update', curve),
+            ('update', os.path.join(properties, 'title.json'))])
+        for record in records:
+            with open(record.path, 'rb') as f:
+                assert_equals(record.hash, hashlib.sha1(f.read()).hexdigest())
+
+        revision = om.Channel('properties.kvs', om.Folder(shot)).store()
+        revision.restore(om.Channel('properties.kvs', om.Folder(shot)))
+        om.delete(os.path.join(shot, '.meta', 'samples.arr'))
+
+        records = [r for r, _ in om.journal.tail(tempdir, offset)][2:]
+
+        restored = [r.path for r in records if r.op == 'write']
+        assert_equals(sorted(restored), [os.path.join(properties, 'fps.json'),
+                                         os.path.join(properties, 'title.json')])
+        assert_equals((records[-1].op, records[-1].hash),
+                      ('delete', None))
+
+    finally:
+        om.journal.MaxSegment = maxsegment
+        shutil.rmtree(tempdir)
+
+
+def test_sync():
+    """Only changed keys are transferred between roots"""
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        src = os.path.join(tempdir, 'studio')
+        dst = os.path.join(tempdir, 'cache')
+        shot = os.path.join('shots', '1000')
+
+        om.update_many(os.path.join(src, shot), 'properties',
+                       {'fps': {'value': 24}, 'lens': {'value': 35}})
+        om.update(os.path.join(src, shot), 'notes', 'document', 'some text')
+
+        difference = om.sync(src, dst)
+        assert_equals(len(difference.added), 3)
+        assert_equals(om.read(os.path.join(dst, shot)),
+                      om.read(os.path.join(src, shot)))
+        assert_equals(om.diff(src, dst), ([], [], []))
+
+        om.update(os.path.join(src, shot), 'properties', 'fps',
+                  {'value': 25})
+        om.Factory.create(os.path.join(src, shot, '.meta',
+                                       'notes.txt')).clear()
+
+        # Manifests are reusable
+        manifest = om.mirror.Manifest.build(src, hash=True)
+        path = os.path.join(tempdir, 'manifest.json')
+        manifest.save(path)
+        manifest = om.mirror.Manifest.load(path)
+
+        meta = os.path.join(shot, '.meta')
+        assert_equals(om.diff(manifest, dst, hash=True), (
+            [], [os.path.join(meta, 'properties.kvs', 'fps.json')],
+            [os.path.join(meta, 'notes.txt')]))
+
+        om.sync(manifest, dst, hash=True)
+        assert_equals(om.read(os.path.join(dst, shot)),
+                      {'properties': {'fps': {'value': 25},
+                                      'lens': {'value': 35}}})
+        assert_equals(om.diff(src, dst), ([], [], []))
+
+        # Removed channels are kept as tombstones
+        trash = om.trash.tombstones(os.path.join(dst, meta))
+        assert_equals([t.name for t in trash], ['notes.txt'])
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_manifest():
+    """Folders are enumerated from their manifest whilst current"""
+    import json
+
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        om.manifest.enable()
+
+        shot = os.path.join(tempdir, 'shot')
+        meta = os.path.join(shot, '.meta')
+        om.update(shot, 'properties', 'fps', 24)
+
+        channel = om.Channel('notes.txt', om.Folder(shot))
+        channel.data = {'document': 'some text'}
+        channel.write(defer=False)
+
+        # Left stale by update(), written anew upon reading
+        expected = {'properties': {'fps': 24}, 'notes': {'document': 'some text'}}
+        assert_equals(om.read(shot), expected)
+        assert_true(os.path.exists(om.manifest.manifestpath(meta)))
+
+        # Listed once more past the resolution of mtimes, and used after
+        time.sleep(om.manifest.Resolution + 0.1)
+        assert_equals(sorted(om.manifest.load(meta)), ['notes.txt',
+                                                       'properties.kvs'])
+
+        slow = om.backend.Latency(om.backend.filesystem)
+        om.backend.mount(tempdir, slow)
+        try:
+            assert_equals(om.read(shot), expected)
+            listed = slow.calls['listdir']
+
+            om.manifest.disable()
+            slow.reset()
+            assert_equals(om.read(shot), expected)
+            assert_true(listed < slow.calls['listdir'])
+            om.manifest.enable()
+        finally:
+            om.backend.unmount(tempdir)
+
+        # Writing a key records only that key
+        with open(om.manifest.manifestpath(meta)) as f:
+            before = json.load(f)
+
+        properties = om.Factory.create(os.path.join(meta, 'properties.kvs'))
+        key = om.Key('lens.json', properties)
+        key.data = 35
+        key.write()
+
+        with open(om.manifest.manifestpath(meta)) as f:
+            after = json.load(f)
+
+        assert_equals(sorted(after['channels']['properties.kvs']['keys']),
+                      ['fps.json', 'lens.json'])
+        assert_equals(after['channels']['notes.txt'],
+                      before['channels']['notes.txt'])
+        assert_equals(after['time'], before['time'])
+
+        # Channels written within the resolution are listed as usual
+        listing = om.manifest.load(meta)
+        assert_equals(listing['notes.txt'], ['document.txt'])
+        assert_equals(listing['properties.kvs'], None)
+        assert_equals(om.read(shot, 'properties'), {'fps': 24, 'lens': 35})
+
+        # Stale manifests are not used
+        om.update(shot, 'other', 'status', 'done')
+        assert_equals(om.manifest.load(meta), None)
+        assert_equals(om.read(shot)['other'], {'status': 'done'})
+        with open(om.manifest.manifestpath(meta)) as f:
+            assert_true('other.txt' in json.load(f)['channels'])
+
+    finally:
+        om.manifest.disable()
+        shutil.rmtree(tempdir)
+
+
+def test_table():
+    """One channel of many folders is read into columns"""
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        shots = [os.path.join(tempdir, 'shots', name)
+                 for name in ('1000', '2000', '3000')]
+        for fps, shot in zip((24, 25, 30), shots):
+            om.update_many(shot, 'properties', {'fps': fps,
+                                                'camera': {'lens': 35}})
+        om.update(shots[0], 'properties', 'status', 'waiting')
+        om.update(os.path.join(tempdir, 'assets', 'hulk'),
+                  'notes', 'document', 'some text')
+
+        columns = om.table(tempdir, 'properties', numpy=False)
+        assert_equals(columns, {'path': shots,
+                                'fps': [24, 25, 30],
+                                'camera': [{'lens': 35}] * 3,
+                                'status': ['waiting', None, None]})
+
+        columns = om.table(tempdir, 'properties', numpy=False,
+                           fields=['fps', 'camera.lens', 'missing'])
+        assert_equals(columns['camera.lens'], [35, 35, 35])
+        assert_equals(columns['missing'], [None, None, None])
+
+        chunks = list(om.tabular.chunks(tempdir, 'properties', ['fps'],
+                                        size=2, numpy=False))
+        assert_true(all(len(chunk['fps']) <= 2 for chunk in chunks))
+        assert_equals(sum([chunk['fps'] for chunk in chunks], []),
+                      [24, 25, 30])
+
+        # The path of each folder is not overwritten
+        om.update(shots[0], 'properties', 'path', '/x')
+        assert_raises(ValueError, om.table, tempdir, 'properties',
+                      numpy=False)
+
+        dtype = om.tabular.dtype
+        assert_equals(dtype([24, 25]), 'int64')
+        assert_equals(dtype([24, None]), 'float64')
+        assert_equals(dtype([24, 23.976]), 'float64')
+        assert_equals(dtype([True, False]), 'bool')
+        assert_equals(dtype([u'waiting', 'final']), 'unicode')
+        assert_equals(dtype([u'waiting', None]), 'object')
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_table_numpy():
+    """Columns are arrays, should NumPy be installed"""
+    try:
+        import numpy
+    except ImportError:
+        raise SkipTest("NumPy not installed")
+
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        shots = [os.path.join(tempdir, 'shots', name)
+                 for name in ('1000', '2000')]
+        for fps, shot in zip((24, 25), shots):
+            om.update_many(shot, 'properties', {'fps': fps,
+                                                'frames': [1001, 1100]})
+        om.update(shots[0], 'properties', 'status', 'waiting')
+
+        columns = om.table(tempdir, 'properties')
+        assert_equals(columns['fps'].dtype, numpy.dtype('int64'))
+        assert_equals(list(columns['fps']), [24, 25])
+        assert_equals(columns['frames'].shape, (2,))
+        assert_equals(list(columns['frames'][0]), [1001, 1100])
+        assert_equals(list(columns['status']), ['waiting', None])
+
+        records = om.tabular.records(columns)
+        assert_equals(list(records.fps), [24, 25])
+        assert_equals(list(records.path), shots)
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_schema():
+    """Keys are decoded as per the schema of their channel"""
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        shot = os.path.join(tempdir, 'shot')
+        properties = os.path.join(shot, '.meta', 'properties.kvs')
+        om.update_many(shot, 'properties.kvs', {'fps': 24,
+                                                'status': 'waiting',
+                                                'camera': {'lens': 35.0}})
+
+        spec = {'properties': {
+            'fps': {'type': 'number'},
+            'status': {'enum': ['waiting', 'final']},
+            'camera': {'type': 'object',
+                       'properties': {'lens': {'type': 'integer'},
+                                      'fstop': {'default': 2.8}}}},
+            'required': ['fps', 'camera']}
+
+        assert_raises(ValueError, om.schema.define, properties,
+                      {'properties': {'fps': {'type': 'float'}}})
+        om.schema.define(properties, spec)
+        assert_true(om.schema.load(properties) is om.schema.compile(spec))
+
+        data = om.read(shot, 'properties')
+        assert_equals(data, {'fps': 24.0, 'status': 'waiting',
+                             'camera': {'lens': 35, 'fstop': 2.8}})
+        assert_true(isinstance(data['fps'], float))
+        assert_true(isinstance(data['camera']['lens'], int))
+
+        # Content not matching raises at read time
+        om.update(shot, 'properties', 'status', 'bogus')
+        assert_raises(om.SchemaError, om.read, shot)
+        om.update(shot, 'properties', 'status', 'final')
+
+        # Schemas are kept across writes
+        channel = om.Channel('properties.kvs', om.Folder(shot))
+        channel.data = {'fps': 25, 'camera': {'lens': 50}}
+        channel.write(defer=False)
+        assert_equals(om.read(shot, 'properties', 'fps'), 25.0)
+        assert_equals(om.read(shot), {'properties': {
+            'fps': 25.0, 'camera': {'lens': 50, 'fstop': 2.8}}})
+
+        # So do required keys missing
+        om.Channel(properties).clear()
+        om.update(shot, 'properties', 'fps', 24)
+        om.schema.define(properties, spec)
+        assert_raises(om.SchemaError, om.read, shot, 'properties')
+
+        assert_equals(om.process.cast({'range': (1, 10)}, '.json'),
+                      {'range': [1, 10]})
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def test_pointer():
+    """JSON keys are read in part, by pointer"""
+    tempdir = tempfile.mkdtemp()
+
+    try:
+        shot = os.path.join(tempdir, 'shot')
+        assets = {'characters': [{'name': 'hulk', 'tags': ['green']},
+                                 {'name': 'banner', 'props': {'a/b': 1}}],
+                  'count': 2}
+        om.update(shot, 'breakdown.kvs', 'assets', assets)
+
+        channel = os.path.join(shot, '.meta', 'breakdown.kvs')
+        path = os.path.join(channel, 'assets.json')
+        index = om.pointer.indexpath(path)
+
+        # Keys changed within the same tick are not indexed
+        key = om.Key(path)
+        assert_equals(key.get('/characters/0/name'), 'hulk')
+        assert_false(os.path.exists(index))
+
+        time.sleep(om.pointer.Resolution + 0.1)
+        mtime = os.stat(channel).st_mtime
+        meta_mtime = os.stat(os.path.dirname(channel)).st_mtime
+
+        assert_equals(key.get('/characters/0/name'), 'hulk')
+        assert_true(os.path.exists(index))
+        assert_equals(os.stat(channel).st_mtime, mtime)
+        assert_equals(os.stat(os.path.dirname(channel)).st_mtime, meta_mtime)
+
+        assert_equals(key.get('/characters/1/props/a~1b'), 1)
+        assert_equals(key.get('/characters/0/tags/0'), 'green')
+        assert_equals(key.get('/characters/2', 'missing'), 'missing')
+        assert_equals(key.get('/count/0'), None)
+        assert_equals(key.get(''), assets)
+
+        # Indexes are hidden and read from disk once forgotten
+        assert_equals(om.read(shot), {'breakdown': {'assets': assets}})
+        om.pointer._indexes.clear()
+        assert_equals(om.Key(path).get('/characters/1/name'), 'banner')
+
+        # Keys not matching their index are read as a whole
+        _, stale = om.pointer._indexes[path]
+        stale.containers['']['count'] = (0, 3)
+        assert_equals(om.Key(path).get('/count'), 2)
+        assert_false(os.path.exists(index))
+
+        # Changed keys are indexed anew
+        om.update(shot, 'breakdown.kvs', 'assets', {'count': 3})
+        assert_equals(om.Key(path).get('/count'), 3)
+
+        # Keys already read are looked up in memory
+        key = om.Key(path)
+        key.read()
+        assert_equals(key.get('/count'), 3)
+
+        # Indexes are removed alongside their channel
+        time.sleep(om.pointer.Resolution + 0.1)
+        assert_equals(om.Key(path).get('/count'), 3)
+        assert_true(os.path.exists(index))
+
+        om.Factory.create(channel).clear()
+        assert_false(os.path.exists(os.path.dirname(index)))
+        assert_false(path in om.pointer._indexes)
+
+        # .meta folders lacking a .pointer folder are left as-is
+        om.update(shot, 'breakdown.kvs', 'assets', assets)
+        shutil.rmtree(os.path.join(shot, '.meta', om.constant.Pointer))
+        time.sleep(om.pointer.Resolution + 0.1)
+        meta_mtime = os.stat(os.path.dirname(channel)).st_mtime
+
+        assert_equals(om.Key(path).get('/characters/0/name'), 'hulk')
+        assert_false(os.path.exists(index))
+        assert_equals(os.stat(os.path.dirname(channel)).st_mtime, meta_mtime)
+
+    finally:
+        shutil.rmtree(tempdir)
+
+
 if __name__ == '__main__':
     import logging
     log = logging.getLogger('openmetadata')
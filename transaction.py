@@ -15,10 +15,12 @@ import os
 # import sys
 import errno
 import logging
-import shutil
-import collections
+import contextlib
 
+from openmetadata import backend
+from openmetadata import constant
 from openmetadata import domain
+from openmetadata import process
 
 log = logging.getLogger('openmetadata.transaction')
 
@@ -50,8 +52,204 @@ def write(path, channel=None, key=None, data=None):
 
 
 def update(path, channel=None, key=None, data=None):
-    """Convenience method for updating metadata"""
-    raise NotImplementedError
+    """Convenience method for updating metadata
+
+    Deep-merge `data` into the physical file of `key`, leaving any
+    other key of `channel` untouched. Non-dictionaries replace the
+    existing content. Missing channels and keys are created.
+
+    The file is read, merged and atomically replaced whilst holding
+    an exclusive lock, such that concurrent updates to the same key
+    are serialised rather than lost.
+
+    Parameters
+        path    (str)   : Path to meta folder
+        channel (str)   : Name of channel, with or without extension
+        key     (str)   : Name of key, with or without extension
+        data    (obj)   : Content to merge
+
+    Returns
+        Merged content of `key`
+
+    """
+
+    if not channel or not key:
+        raise ValueError("Must supply `channel` and `key` arguments, "
+                         "see update_many() for updating many keys")
+
+    return update_many(path, channel, {key: data})[key]
+
+
+def update_many(path, channel, data):
+    """Update many keys of `channel` at once, see update()
+
+    Parameters
+        path    (str)   : Path to meta folder
+        channel (str)   : Name of channel, with or without extension
+        data    (dict)  : Content to merge per key, {key: content}
+
+    Returns
+        Merged content per key, {key: content}
+
+    """
+
+    if not isinstance(data, dict):
+        raise ValueError("Data passed to update_many "
+                         "must be of type <dict>")
+
+    metapath = os.path.join(path, constant.Meta)
+    channel_path = _locate(metapath, channel, process.channel_to_file)
+
+    if not channel_path:
+        ext = os.path.splitext(channel)[1]
+        if not ext in process.channel_to_file:
+            # Text only if every key is text, such that
+            # no content is ever stored as text by accident
+            text = data and all(isinstance(value, basestring)
+                                for value in data.itervalues())
+            channel += constant.Txt if text else constant.Kvs
+        channel_path = os.path.join(metapath, channel)
+
+    channel_ext = os.path.splitext(channel_path)[1]
+    file_ext = process.channel_to_file.get(channel_ext)
+    if not file_ext:
+        raise ValueError('Could not determine file format '
+                         'for channel "%s"' % channel)
+
+    key_paths = {}
+    for key, value in data.iteritems():
+        key_path = _locate(channel_path, key, process.mapping)
+        if not key_path:
+            basename = key
+            if not os.path.splitext(key)[1] in process.mapping:
+                basename += file_ext
+            key_path = os.path.join(channel_path, basename)
+
+        format = process.mapping.get(os.path.splitext(key_path)[1])
+        if format is not None and issubclass(format, process.DotTxt) and \
+                not isinstance(value, basestring):
+            raise ValueError("Can't store %r as text in %s"
+                             % (value, key_path))
+
+        key_paths[key] = key_path
+
+    merged = {}
+    for key, key_path in key_paths.iteritems():
+        merged[key] = _update(key_path, data[key])
+
+    return merged
+
+
+def _update(path, data):
+    """Merge `data` into file at `path`"""
+    from openmetadata import journal
+
+    ext = os.path.splitext(path)[1]
+    store = backend.get(path)
+
+    dirname = os.path.dirname(path)
+    if not store.exists(dirname):
+        domain.makedirs(dirname)
+
+    with _locked(path):
+        if process.isbinary(ext):
+            # Binary content can't be merged
+            digest = process.dump(path, data, ext)
+
+            journal.record('update', path, digest=digest)
+            return data
+
+        existing = None
+        if store.exists(path):
+            raw = store.read(path)
+
+            try:
+                existing = process.processincoming(raw, ext)
+            except ValueError:
+                log.warning("update(): Replacing unreadable %s" % path)
+
+        if isinstance(existing, dict) and isinstance(data, dict):
+            data = _merge(existing, data)
+
+        processed = process.processoutgoing(data, ext)
+        store.write(path, processed)
+
+        journal.record('update', path, processed)
+
+    log.info("update(): Updated %s" % path)
+
+    return data
+
+
+@contextlib.contextmanager
+def _locked(path):
+    """Lock key `path` exclusively and its channel shared
+
+    Updates of different keys of a channel proceed at once,
+    whereas updates and writes of the whole channel do not.
+
+    """
+
+    from openmetadata import lock
+
+    with lock.shared(os.path.dirname(path)):
+        with lock.exclusive(path):
+            yield
+
+
+def _merge(d, u):
+    """Deep-merge dictionary `u` into `d`
+
+    Dictionaries replace existing content other than dictionaries.
+
+    """
+
+    import collections
+
+    # The following algorithm is based on this answer:
+    # http://stackoverflow.com/questions/3232943/update-value-of-a-nested-dictionary-of-varying-depth
+    for k, v in u.iteritems():
+        if isinstance(v, collections.Mapping):
+            existing = d.get(k)
+            if not isinstance(existing, collections.Mapping):
+                existing = {}
+            r = _merge(existing, v)
+            d[k] = r
+        else:
+            d[k] = u[k]
+    return d
+
+
+def _locate(dirname, name, extensions):
+    """Return path of child `name` within `dirname`, or None
+
+    `name` is either a basename, if its extension is any of
+    `extensions`, or a name without extension in which case
+    `dirname` is listed for a matching child.
+
+    """
+
+    if os.path.splitext(name)[1] in extensions:
+        path = os.path.join(dirname, name)
+        return path if domain.exists(path) else None
+
+    try:
+        basenames = domain.listdir(dirname)
+    except OSError:
+        return None
+
+    for basename in basenames:
+        if basename.startswith("."):
+            continue
+
+        _name = basename.rsplit(".", 1)[0]
+        if domain.hidden(_name):
+            _name = _name[2:-2]
+
+        if _name == name:
+            return os.path.join(dirname, basename)
+
+    return None
 
 
 def read(path, channel=None, key=None):
@@ -75,12 +273,12 @@ def read(path, channel=None, key=None):
     if key and not channel:
         raise ValueError("Must supply `channel` with `key` argument")
 
-    if not os.path.exists(path):
+    if not domain.exists(path):
         return {}
 
     try:
         obj = domain.Factory.create(path)
-    except WindowsError as e:
+    except OSError as e:
         # Temporary fix. An error occurs when trying to
         # read junctions pointing to invalid targets.
         if e.errno == errno.ENOENT:
@@ -103,108 +301,155 @@ def read(path, channel=None, key=None):
     return obj.read().data
 
 
-def exists(path, channel=None, key=None):
-    pass
+def read_many(paths, channel=None, key=None, processes=8, errors=None):
+    """Read metadata of many folders at once, see read()
 
+    Paths are read in parallel by a bounded pool of threads which
+    share directory listings, such that directories common to many
+    paths are only listed once. Duplicate paths are read once. The
+    domain.IdentityMap of the calling thread, if any, is shared too.
 
-def cascade(path, channel, key=None):
-    """Merge metadata of each channel matching `term` up-wards through hierarchy"""
-    folder = domain.Folder(path)
+    Parameters
+        paths       (list)  : Paths to meta folders
+        channel     (str)   : (optional) Name of individual channel
+        key         (str)   : (optional) Name of individual file
+        processes   (int)   : Maximum number of concurrent reads
+        errors      (dict)  : (optional) Receives the exception of each
+                              path that failed, {path: exception}
 
-    hierarchy = _findchannels(folder, channel)
-    hierarchy.reverse()
+    Returns
+        dict()              : {path: data} of each path read successfully
 
-    # An implementation of the Property-Pattern as discussed here:
-    # http://steve-yegge.blogspot.co.uk/2008/10/universal-design-pattern.html
-    metadata_hierarchy = []
-    for _channel in hierarchy:
-        _channel.read()
-        _data = _channel.data or {}
-        metadata_hierarchy.append(_data)
+    """
 
-    # The following algorithm is based on this answer:
-    # http://stackoverflow.com/questions/3232943/update-value-of-a-nested-dictionary-of-varying-depth
-    def update(d, u):
-        for k, v in u.iteritems():
-            if isinstance(v, collections.Mapping):
-                r = update(d.get(k, {}), v)
-                d[k] = r
-            else:
-                d[k] = u[k]
-        return d
+    from openmetadata import util
+
+    unique = []
+    seen = set()
+    for path in paths:
+        if path not in seen:
+            seen.add(path)
+            unique.append(path)
+
+    if not unique:
+        return {}
+
+    cache = domain.ScanCache()
+    identitymap = domain.currentidentity()
+
+    def _read(path):
+        with domain.scanning(cache), domain.identity(identitymap):
+            try:
+                return path, read(path, channel, key), None
+            except Exception as e:
+                return path, None, e
+
+    results = util.parallel(_read, unique, processes)
 
     metadata = {}
-    for _metadata in metadata_hierarchy:
-        update(metadata, _metadata)
+    for path, data, error in results:
+        if error is not None:
+            log.error("read_many(): Could not read %s: %s" % (path, error))
+            if errors is not None:
+                errors[path] = error
+            continue
+
+        metadata[path] = data
 
     return metadata
 
 
-def delete(path, channel=None, key=None, max_retries=10):
-    assert os.path.exists(path)
-
-    retries = 0
-    while True:
-        try:
-            if os.path.isdir(path):
-                shutil.rmtree(path)
-            else:
-                os.remove(path)
-            break
-        except WindowsError as e:
-            # Sometimes, Dropbox can bother this operation;
-            # creating files in the midst of deleting a folder.
-            #
-            # If this happens, try again in a short while.
-            
-            retries += 1
-            if retries > max_retries:
-                log.error(e)
-                break
-
-            import time
-            time.sleep(0.1)
-            log.info("Retired %i time(s) for %s" % (retries, path))
+def exists(path, channel=None, key=None):
+    """Convenience method for querying the existence of metadata
 
-    log.info("Removed %s" % path)
+    Resolves straight to the candidate path without building any
+    objects; at most one stat per level, or a single listing for
+    names given without extension.
+
+    Parameters
+        path    (str)   : Path to meta folder
+        channel (str)   : (optional) Name of channel, with or without extension
+        key     (str)   : (optional) Name of key, with or without extension
+
+    Returns
+        bool
 
+    """
+
+    if key and not channel:
+        raise ValueError("Must supply `channel` with `key` argument")
+
+    metapath = os.path.join(path, constant.Meta)
+
+    if not channel:
+        return domain.isdir(metapath)
+
+    channel_path = _locate(metapath, channel, process.channel_to_file)
+    if not channel_path:
+        return False
+
+    if not key:
+        return True
+
+    return _locate(channel_path, key, process.mapping) is not None
+
+
+def cascade(path, channel, key=None, lazy=False):
+    """Merge metadata of each channel matching `channel` up-wards through hierarchy
+
+    Channels closer to `path` override those further up. The search
+    stops at the root of the file-system or at a channel containing
+    an isRoot key of True. Only channels of type .kvs cascade.
+
+    Parameters
+        path    (str)   : Path to meta folder
+        channel (str)   : Name of channel, without extension
+        key     (str)   : (optional) Only resolve this key, in O(depth)
+        lazy    (bool)  : Return a lazy overlay.Cascade, rather than a dict
 
+    Returns
+        dict()          : {'key': content}, or content of `key`
+
+    """
+
+    from openmetadata import overlay
 
-def _findchannels(folder, term, result=None):
-    """Return channels matching `term` up-wards through hierarchy"""
-    assert isinstance(folder, domain.Folder)
-    result = result or []
+    view = overlay.Cascade.find(path, channel)
 
-    # Note: We can only cascade channels of type .kvs
+    if key is not None:
+        value = view.get(key)
+        return value if lazy else overlay.materialize(value)
 
-    current_channel = None
-    # Look for `term` within folder
-    for _channel in folder:
-        if _channel.name == term and _channel.extension == '.kvs':
-            result.append(_channel)
-            current_channel = _channel
+    if lazy:
+        return view
 
-    # Recurse
-    parent = folder.parent
-    if parent:
-        # Before we recurse, ensure this is not a path.
-        isroot = False
+    return view.materialize()
 
-        # TODO
-        # Find a way to optimize this. Channel is being read here
-        # to find the isRoot property which is used solely to
-        # determine whether or not to continue searching.
-        # This is an expensive operation, and whats worse,
-        # the channel is being re-read in `cascade`.
-        if current_channel:
-            data = current_channel.read().data or {}
-            if data.get('isRoot') is True:
-                isroot = True
 
-        if not isroot:
-            return _findchannels(parent, term, result)
+def delete(path, channel=None, key=None, max_retries=10):
+    """Permanently remove `path`, via its backend
+
+    Removal is retried up to `max_retries` times, such as
+    when another process creates files in the midst of it.
+
+    """
+
+    store = backend.get(path)
+
+    assert store.exists(path)
+
+    try:
+        store.delete(path, max_retries)
+    except OSError as e:
+        log.error(e)
+        return
+
+    from openmetadata import journal, pointer
+    pointer.discard(path)
+    journal.record('delete', path)
+
+    log.info("Removed %s" % path)
 
-    return result
 
 
 # def cascade(folder, term):
@@ -0,0 +1,320 @@
+"""Garbage collection of .deleted tombstones
+
+# Overview
+    AbstractPath.clear() never removes anything. Instead, the item is
+    renamed into a tombstone alongside its original location.
+
+    E.g. \folder\.meta\chan.txt --> \folder\.meta\.deleted.20131115103402.chan.txt
+
+    Tombstones accumulate with every Channel.write() and, though hidden,
+    are still listed each time a directory is scanned. This module purges
+    them according to a retention Policy.
+
+
+# Usage
+    Inline, each clear() purges expired tombstones of the cleared item
+
+    >>> trash.setpolicy(trash.Policy(maxcount=5))
+
+    In a background thread
+
+    >>> collector = trash.Collector(root, trash.Policy(maxage=3600))
+    >>> collector.start()
+
+    As a sweep from the command-line
+
+    $ python -m openmetadata.trash /projects/hulk --max-age 7d
+
+"""
+
+from __future__ import absolute_import
+
+import os
+import time
+import logging
+import calendar
+import threading
+import collections
+
+from openmetadata import backend
+from openmetadata import constant
+
+log = logging.getLogger('openmetadata.trash')
+
+TimeFormat = "%Y%m%d%H%M%S"
+
+Tombstone = collections.namedtuple('Tombstone', ['path', 'name', 'time'])
+
+# Policy applied by AbstractPath.clear(), see setpolicy()
+_policy = None
+
+
+def tombstone(path):
+    """Return tombstone path of `path`, unique per-second"""
+    dirname, basename = os.path.split(path)
+    deleted_time = time.strftime(TimeFormat, time.gmtime())
+    deleted_basename = "%s.%s.%s" % (constant.Deleted, deleted_time, basename)
+    return os.path.join(dirname, deleted_basename)
+
+
+def parse(basename):
+    """Return (name, time) of tombstone `basename` or None
+
+    E.g.
+    >>> parse('.deleted.20131115103402.chan.txt')
+    ('chan.txt', 1384511642)
+
+    """
+
+    prefix = constant.Deleted + "."
+    if not basename.startswith(prefix):
+        return None
+
+    try:
+        stamp, name = basename[len(prefix):].split(".", 1)
+        deleted_time = calendar.timegm(time.strptime(stamp, TimeFormat))
+    except ValueError:
+        return None
+
+    return name, deleted_time
+
+
+def tombstones(path, name=None):
+    """Return tombstones within directory `path`, newest first
+
+    Parameters
+        path    (str)   : Directory in which to look
+        name    (str)   : (optional) Only return tombstones of this basename
+
+    """
+
+    try:
+        basenames = backend.get(path).listdir(path)
+    except OSError:
+        return []
+
+    result = []
+    for basename in basenames:
+        parsed = parse(basename)
+        if not parsed:
+            continue
+
+        if name is not None and parsed[0] != name:
+            continue
+
+        result.append(Tombstone(os.path.join(path, basename), *parsed))
+
+    result.sort(key=lambda t: t.time, reverse=True)
+    return result
+
+
+class Policy(object):
+    """Retention policy of tombstones
+
+    Parameters
+        maxage      (int)   : Seconds after which a tombstone is purged
+        maxcount    (int)   : Number of tombstones kept per item
+
+    Policy(maxcount=0) purges every tombstone.
+
+    """
+
+    def __init__(self, maxage=None, maxcount=None):
+        self.maxage = maxage
+        self.maxcount = maxcount
+
+    def __repr__(self):
+        return "%s.Policy(maxage=%r, maxcount=%r)" % (
+            __name__, self.maxage, self.maxcount)
+
+    def expired(self, tombstones, now=None):
+        """Return the subset of `tombstones` no longer retained"""
+        now = now or time.time()
+
+        # Group per original item, newest first
+        items = {}
+        for stone in sorted(tombstones, key=lambda t: t.time, reverse=True):
+            items.setdefault(stone.name, []).append(stone)
+
+        expired = []
+        for stones in items.itervalues():
+            for index, stone in enumerate(stones):
+                if self.maxcount is not None and index >= self.maxcount:
+                    expired.append(stone)
+                elif self.maxage is not None and now - stone.time > self.maxage:
+                    expired.append(stone)
+
+        return expired
+
+
+def setpolicy(policy):
+    """Purge expired tombstones each time an item is cleared
+
+    Pass None to disable.
+
+    """
+
+    global _policy
+    _policy = policy
+
+
+def getpolicy():
+    return _policy
+
+
+def purge(path, max_retries=10):
+    """Permanently remove `path` via its backend, see Backend.delete()
+
+    Returns True upon success.
+
+    """
+
+    try:
+        backend.get(path).delete(path, max_retries)
+        return True
+    except OSError as e:
+        log.error("purge(): Could not remove %s: %s" % (path, e))
+        return False
+
+
+def collect(root, policy, recursive=True, name=None, dry_run=False, max_retries=10):
+    """Purge tombstones under `root` as per `policy`
+
+    Each directory is listed once and its expired
+    tombstones are purged in bulk.
+
+    Parameters
+        root        (str)       : Directory in which to look
+        policy      (Policy)    : Which tombstones to purge
+        recursive   (bool)      : Also look within sub-directories
+        name        (str)       : (optional) Only consider tombstones of `name`
+        dry_run     (bool)      : Return what would have been purged
+
+    Returns
+        list of purged paths
+
+    """
+
+    now = time.time()
+    purged = []
+
+    for dirpath, dirnames, filenames in backend.get(root).walk(root):
+        stones = []
+        for basename in dirnames + filenames:
+            parsed = parse(basename)
+            if not parsed:
+                continue
+
+            if name is not None and parsed[0] != name:
+                continue
+
+            stones.append(Tombstone(os.path.join(dirpath, basename), *parsed))
+
+        for stone in policy.expired(stones, now):
+            if dry_run or purge(stone.path, max_retries):
+                purged.append(stone.path)
+
+        if not recursive:
+            break
+
+        # Never descend into tombstones
+        dirnames[:] = [d for d in dirnames
+                       if not d.startswith(constant.Deleted + ".")]
+
+    if purged:
+        log.info("collect(): Purged %i tombstone(s) under %s"
+                 % (len(purged), root))
+
+    return purged
+
+
+class Collector(threading.Thread):
+    """Periodically purge tombstones under one or more roots
+
+    Parameters
+        roots       (str, list) : Directories to sweep
+        policy      (Policy)    : Which tombstones to purge
+        interval    (float)     : Seconds between sweeps
+
+    """
+
+    def __init__(self, roots, policy, interval=60.0):
+        super(Collector, self).__init__(name='openmetadata.trash.Collector')
+        self.daemon = True
+
+        if isinstance(roots, basestring):
+            roots = [roots]
+
+        self.roots = list(roots)
+        self.policy = policy
+        self.interval = interval
+        self.purged = 0
+
+        self._stopped = threading.Event()
+
+    def sweep(self):
+        """Perform one full sweep of each root"""
+        count = 0
+        for root in self.roots:
+            try:
+                count += len(collect(root, self.policy))
+            except Exception as e:
+                # Keep collecting in the face of unexpected errors
+                log.error("Collector: sweep of %s failed: %s" % (root, e))
+
+        self.purged += count
+        return count
+
+    def run(self):
+        while not self._stopped.is_set():
+            self.sweep()
+            self._stopped.wait(self.interval)
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+def _parseage(age):
+    """Return seconds from e.g. '90', '30m', '12h' or '7d'"""
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    if age[-1] in units:
+        return float(age[:-1]) * units[age[-1]]
+    return float(age)
+
+
+def main(args=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='python -m openmetadata.trash',
+        description='Purge .deleted tombstones')
+    parser.add_argument('roots', nargs='+')
+    parser.add_argument('--max-age', help="E.g. 3600, 30m, 12h, 7d")
+    parser.add_argument('--max-count', type=int,
+                        help="Tombstones to keep per item")
+    parser.add_argument('--dry-run', action='store_true')
+    parser.add_argument('--verbose', action='store_true')
+
+    options = parser.parse_args(args)
+
+    if options.max_age is None and options.max_count is None:
+        parser.error("Specify --max-age and/or --max-count")
+
+    maxage = _parseage(options.max_age) if options.max_age else None
+    policy = Policy(maxage=maxage, maxcount=options.max_count)
+
+    count = 0
+    for root in options.roots:
+        for path in collect(root, policy, dry_run=options.dry_run):
+            if options.verbose or options.dry_run:
+                print path
+            count += 1
+
+    print "%s %i tombstone(s)" % (
+        "Would purge" if options.dry_run else "Purged", count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Shared utilities of Open Metadata"""
+
+from __future__ import absolute_import
+
+import os
+import threading
+import contextlib
+
+
+def makedirs(path):
+    """Create `path` unless it exists, tolerating concurrent creation"""
+    if os.path.isdir(path):
+        return
+
+    try:
+        os.makedirs(path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+
+
+def replace(src, dst):
+    """Move `src` onto `dst`, replacing `dst` if it exists
+
+    Atomic on POSIX. Windows can't rename onto an existing
+    file, and so `dst` is briefly absent there.
+
+    """
+
+    if os.name == 'nt' and os.path.exists(dst):
+        os.remove(dst)
+    os.rename(src, dst)
+
+
+@contextlib.contextmanager
+def atomic(path, mode='wb'):
+    """Write to `path` via a temporary file in the same directory
+
+    Readers never observe a partially written file, and those
+    still holding the previous file (e.g. via mmap) are unaffected.
+
+    E.g.
+    >>> with atomic(path) as f:
+    ...     f.write('data')
+
+    """
+
+    dirname, basename = os.path.split(path)
+    makedirs(dirname)
+
+    # Prefixed with "." so as to remain hidden from listings
+    temp = os.path.join(dirname, ".%s.%i.%i.tmp" % (
+        basename, os.getpid(), threading.current_thread().ident))
+    try:
+        with open(temp, mode) as f:
+            yield f
+        replace(temp, path)
+
+    except:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+def atomicwrite(path, raw, mode='wb'):
+    """Write string `raw` to `path` atomically, see atomic()"""
+    with atomic(path, mode) as f:
+        f.write(raw)
+
+
+def parallel(function, items, processes=8):
+    """Return map(function, items), called from up to `processes` threads
+
+    Unlike multiprocessing.pool.ThreadPool, threads are joined as
+    soon as they are done, and a single item is called in-line.
+    The first exception raised by any call is re-raised.
+
+    """
+
+    items = list(items)
+    if processes <= 1 or len(items) <= 1:
+        return map(function, items)
+
+    results = [None] * len(items)
+    errors = []
+    indexes = iter(range(len(items)))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                index = next(indexes, None)
+            if index is None or errors:
+                return
+
+            try:
+                results[index] = function(items[index])
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker)
+               for _ in range(min(processes, len(items)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+    return results
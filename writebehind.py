@@ -0,0 +1,173 @@
+"""Write-behind of dirty channels
+
+# Overview
+    Front-ends such as About set Channel.data many times and write
+    after each edit. With write-behind enabled, Channel.write() returns
+    immediately and the channel is written by a background thread once
+    it has been left alone for `window` seconds. Repeated writes to the
+    same channel within the window are coalesced into one.
+
+    Pending channels are flushed upon exit, upon disable() and upon
+    an explicit flush().
+
+    E.g.
+    >>> writebehind.enable(window=0.5)
+    >>> channel.data = {'key': 'value'}
+    >>> channel.write()  # Returns immediately
+    >>> writebehind.flush()  # Blocks until written
+
+"""
+
+from __future__ import absolute_import
+
+import time
+import atexit
+import logging
+import threading
+
+log = logging.getLogger('openmetadata.writebehind')
+
+_flusher = None
+_lock = threading.Lock()
+
+
+class Flusher(threading.Thread):
+    """Background writer of scheduled channels
+
+    Parameters
+        window  (float) : Seconds a channel must be left alone
+                          before being written
+
+    """
+
+    def __init__(self, window=0.5):
+        super(Flusher, self).__init__(name='openmetadata.writebehind.Flusher')
+        self.daemon = True
+        self.window = window
+
+        # {path: [channel, deadline]}
+        self._pending = {}
+        self._condition = threading.Condition()
+        self._writing = threading.Lock()
+        self._stopped = False
+
+        self.stats = {'scheduled': 0, 'coalesced': 0,
+                      'written': 0, 'failed': 0}
+
+    def schedule(self, channel):
+        """Write `channel` once left alone for `self.window` seconds"""
+        with self._condition:
+            path = channel.path
+            if path in self._pending:
+                self.stats['coalesced'] += 1
+
+            self._pending[path] = [channel, time.time() + self.window]
+            self.stats['scheduled'] += 1
+            self._condition.notify()
+
+    @property
+    def pending(self):
+        """Return channels not yet written"""
+        with self._condition:
+            return [channel for channel, _ in self._pending.itervalues()]
+
+    def _pop(self, due=None):
+        """Remove and return channels due at time `due`, or all"""
+        with self._condition:
+            channels = []
+            for path, (channel, deadline) in self._pending.items():
+                if due is None or deadline <= due:
+                    channels.append(channel)
+                    del self._pending[path]
+            return channels
+
+    def _write(self, channels):
+        # Serialise writes of the flusher and of flush()
+        with self._writing:
+            for channel in channels:
+                try:
+                    channel.write(defer=False)
+                    self.stats['written'] += 1
+                except Exception as e:
+                    self.stats['failed'] += 1
+                    log.error("Could not write %r: %s" % (channel, e))
+
+    def flush(self):
+        """Write all pending channels, blocking until written"""
+        self._write(self._pop())
+
+    def run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopped:
+                    self._condition.wait()
+
+                if self._stopped:
+                    return
+
+                timeout = min(d for _, d in self._pending.itervalues())
+                timeout -= time.time()
+                if timeout > 0:
+                    self._condition.wait(timeout)
+                    continue
+
+            self._write(self._pop(time.time()))
+
+    def stop(self):
+        """Write all pending channels and stop"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+        if self.is_alive():
+            self.join()
+
+        self.flush()
+
+
+def enable(window=0.5):
+    """Defer Channel.write() to a background Flusher"""
+    global _flusher
+
+    with _lock:
+        if _flusher is not None:
+            _flusher.window = window
+            return _flusher
+
+        _flusher = Flusher(window)
+        _flusher.start()
+
+    return _flusher
+
+
+def disable():
+    """Write pending channels and resume writing synchronously"""
+    global _flusher
+
+    with _lock:
+        flusher, _flusher = _flusher, None
+
+    if flusher is not None:
+        flusher.stop()
+
+
+def enabled():
+    return _flusher is not None
+
+
+def schedule(channel):
+    """Schedule `channel` for writing, see Flusher.schedule()"""
+    flusher = _flusher
+    if flusher is None:
+        return channel.write(defer=False)
+    flusher.schedule(channel)
+
+
+def flush():
+    """Write all pending channels, blocking until written"""
+    flusher = _flusher
+    if flusher is not None:
+        flusher.flush()
+
+
+atexit.register(flush)